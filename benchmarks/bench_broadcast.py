@@ -0,0 +1,99 @@
+"""
+Broadcast encoding: one full message + JSON encode per player (old) vs the common part
+encoded once per broadcast with personal fields spliced in (BroadcastFrames).
+
+Usage:
+    python benchmarks/bench_broadcast.py [broadcasts]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import WordBasketGame
+from state_sync import RoomStateSync
+from wire import BroadcastFrames, JsonCodec, MsgpackCodec, msgpack
+
+
+def build_states(game: WordBasketGame):
+    common = {
+        "type": "game_state", "room_code": game.room_code, "status": game.status,
+        "current_word": game.current_word, "target_char": game.get_target_char(),
+        "deck_count": len(game.deck), "discard_pile_count": len(game.discard_pile),
+        "dictionary_size": len(game.dictionary), "message": "りんごを出しました", "game_over": False,
+        "winner": None, "ranks": [], "opposition_votes": 0, "approval_votes": 0,
+        "active_players": len(game.players), "active_voting_players": len(game.players),
+        "finishing_check": False, "game_settings": game.game_settings, "finishing_player_id": None,
+        "players_info": [dict(p.to_dict(), is_connected=True) for p in game.players.values()],
+    }
+    personal = {}
+    for player_id, player in game.players.items():
+        personal[player_id] = {
+            "my_hand": list(player.hand),
+            "my_player_id": player_id, "is_host": player.is_host, "my_priority": player.card_priority,
+            "has_voted": False, "playable_cards": game.get_playable_cards(player_id),
+            "suggest_exchange": False, "my_special_cards": [sc.to_dict() for sc in player.special_cards],
+            "my_pending_special_card": None,
+        }
+    return common, personal
+
+
+def legacy_broadcast(common, personal, sync, codec):
+    # Old broadcast: a fresh dict per card for every player, then one full encode per player
+    for state in personal.values():
+        state["my_hand"] = [{"type": c.type, "value": c.value, "display": c.display} for c in state["my_hand"]]
+    changes = sync.update_common(common)
+    return [codec.encode(sync.render(pid, common, changes, personal[pid])) for pid in personal]
+
+
+def frames_broadcast(common, personal, sync, codec):
+    changes = sync.update_common(common)
+    frames = BroadcastFrames(sync.version, common, changes)
+    result = []
+    for pid, state in personal.items():
+        personal_changes = sync.prepare(pid, state)
+        if personal_changes is None:
+            result.append(frames.snapshot(codec, state))
+        else:
+            result.append(frames.patch(codec, personal_changes))
+    return result
+
+
+def run(broadcast, codec, players: int, broadcasts: int) -> float:
+    """Mean time to diff + encode one broadcast (building the state dicts is not timed)."""
+    game = WordBasketGame("bench", seed=1)
+    for i in range(players):
+        game.add_player(f"p{i}", f"プレイヤー{i}")
+    game.start_game()
+    sync = RoomStateSync()
+    elapsed = 0.0
+    for i in range(broadcasts):
+        # Something changes every broadcast, like a played word
+        player = game.players[f"p{i % players}"]
+        if len(player.hand) > 1:
+            game.discard_pile.push(player.hand.pop())
+        if i % 10 == 0:
+            sync = RoomStateSync()  # every 10th broadcast is a full snapshot for everyone
+        common, personal = build_states(game)
+        start = time.perf_counter()
+        broadcast(common, personal, sync, codec)
+        elapsed += time.perf_counter() - start
+    return elapsed / broadcasts * 1e6
+
+
+def main():
+    broadcasts = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    codecs = [("json", JsonCodec())]
+    if msgpack is not None:
+        codecs.append(("msgpack", MsgpackCodec()))
+    print(f"{'(us / broadcast)':<26}{'per-player':>12}{'encode-once':>13}")
+    for name, codec in codecs:
+        for players in (2, 4, 8):
+            before = run(legacy_broadcast, codec, players, broadcasts)
+            after = run(frames_broadcast, codec, players, broadcasts)
+            print(f"{name + f', {players} players':<26}{before:>12.1f}{after:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
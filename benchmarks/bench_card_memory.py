@@ -0,0 +1,134 @@
+"""
+Per-room memory of started games: dict-backed Card/Player objects allocated per room
+(old behaviour) vs the interned card registry and __slots__ models.
+
+Usage:
+    python benchmarks/bench_card_memory.py [num_rooms] [players_per_room]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dictionary import dictionary_registry
+from game import WordBasketGame, STANDARD_DECK
+
+
+class LegacyCard:
+    def __init__(self, type: str, value: str, display: str):
+        self.type = type
+        self.value = value
+        self.display = display
+
+    def to_dict(self):
+        return {"type": self.type, "value": self.value, "display": self.display}
+
+
+class LegacySpecialCard:
+    def __init__(self, card_type: str, name: str, description: str):
+        self.card_type = card_type
+        self.name = name
+        self.description = description
+        self.is_pending = False
+
+
+class LegacyPlayer:
+    def __init__(self, player_id: str, name: str, is_host: bool = False):
+        self.player_id = player_id
+        self.name = name
+        self.hand = []
+        self.is_host = is_host
+        self.card_priority = ['char', 'row', 'length']
+        self.rank = None
+        self.special_cards = []
+        self.pending_special_card = None
+
+
+class LegacyPile(list):
+    """The old list-of-objects deck, with the methods start_game now calls."""
+
+    def shuffle(self):
+        random.shuffle(self)
+
+    def draw_many(self, count):
+        return [self.pop() for _ in range(min(count, len(self)))]
+
+    def take_random(self, predicate):
+        matches = [card for card in self if predicate(card)]
+        if not matches:
+            return None
+        card = random.choice(matches)
+        self.remove(card)
+        return card
+
+    push = list.append
+
+
+class LegacyGame(WordBasketGame):
+    """Reproduces the old behaviour: a fresh set of dict-backed objects per room and per start_game."""
+
+    def initialize_deck(self):
+        self.deck = LegacyPile(LegacyCard(c.type, c.value, c.display) for c in STANDARD_DECK)
+
+    def initialize_special_deck(self):
+        super().initialize_special_deck()
+        self.special_deck = [LegacySpecialCard(sc.card_type, sc.name, sc.description) for sc in self.special_deck]
+
+    def __init__(self, room_code: str):
+        super().__init__(room_code)
+        self.discard_pile = LegacyPile()
+
+    def add_player(self, player_id: str, name: str):
+        player = LegacyPlayer(player_id, name, len(self.players) == 0)
+        self.players[player_id] = player
+        return player
+
+
+def measure(game_class, num_rooms: int, players: int):
+    dictionary_registry.get()  # shared; not part of the per-room cost
+    tracemalloc.start()
+    start = time.perf_counter()
+    rooms = []
+    for i in range(num_rooms):
+        game = game_class(str(i))
+        for p in range(players):
+            game.add_player(f"p{p}", f"player{p}")
+        game.start_game()
+        rooms.append(game)
+    elapsed = time.perf_counter() - start
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for game in rooms:
+        for player in game.players.values():
+            [c.to_dict() for c in player.hand]
+    to_dict_elapsed = time.perf_counter() - start
+    return {
+        "latency_ms": elapsed / num_rooms * 1000,
+        "memory_per_room_kb": current / num_rooms / 1024,
+        "to_dict_us": to_dict_elapsed / num_rooms * 1e6,
+    }
+
+
+def main():
+    num_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    before = measure(LegacyGame, num_rooms, players)
+    after = measure(WordBasketGame, num_rooms, players)
+
+    print(f"Rooms: {num_rooms} ({players} players each, started)")
+    print(f"{'':<26}{'before':>12}{'after':>12}")
+    print(f"{'create+start / room (ms)':<26}{before['latency_ms']:>12.3f}{after['latency_ms']:>12.3f}")
+    print(f"{'memory / room (KB)':<26}{before['memory_per_room_kb']:>12.2f}{after['memory_per_room_kb']:>12.2f}")
+    print(f"{'hand to_dict / room (us)':<26}{before['to_dict_us']:>12.2f}{after['to_dict_us']:>12.2f}")
+    saved = (before["memory_per_room_kb"] - after["memory_per_room_kb"]) * num_rooms / 1024
+    print(f"Memory saved for {num_rooms} rooms: {saved:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Deck operations: the old list-of-Card code paths vs the array-backed CardPile.
+
+Usage:
+    python benchmarks/bench_deck.py [iterations]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deck import CardPile
+from game import Card, STANDARD_DECK, STANDARD_DECK_IDS
+
+
+def legacy_start_card(rng):
+    deck = list(STANDARD_DECK)
+    rng.shuffle(deck)
+    char_cards = [card for card in deck if card.type == "char"]
+    start_card = rng.choice(char_cards)
+    deck.remove(start_card)
+    return start_card
+
+
+def pile_start_card(rng):
+    deck = CardPile.from_ids(Card._by_id, STANDARD_DECK_IDS, rng=rng)
+    deck.shuffle()
+    return deck.take_random(lambda card: card.type == "char")
+
+
+def legacy_reshuffle(rng, deck_size, discard_size):
+    deck = list(STANDARD_DECK[:deck_size])
+    discard = list(STANDARD_DECK[deck_size:deck_size + discard_size])
+    most_recent = discard[-1]
+    deck.extend(discard[:-1])
+    rng.shuffle(deck)
+    discard = [most_recent]
+    return deck.pop()
+
+
+def pile_reshuffle(rng, deck_size, discard_size):
+    deck = CardPile.from_ids(Card._by_id, STANDARD_DECK_IDS[:deck_size], rng=rng)
+    discard = CardPile.from_ids(Card._by_id, STANDARD_DECK_IDS[deck_size:deck_size + discard_size], rng=rng)
+    discard.shuffle_into(deck, keep_top=True)
+    return deck.draw()
+
+
+def timed(fn, iterations, *args):
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(rng, *args)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rows = [
+        ("shuffle + start card", timed(legacy_start_card, iterations), timed(pile_start_card, iterations)),
+        ("reshuffle (deck 5, discard 40)", timed(legacy_reshuffle, iterations, 5, 40),
+         timed(pile_reshuffle, iterations, 5, 40)),
+        ("reshuffle (deck 40, discard 5)", timed(legacy_reshuffle, iterations, 40, 5),
+         timed(pile_reshuffle, iterations, 40, 5)),
+    ]
+    print(f"{'(us / op)':<34}{'list':>10}{'CardPile':>10}")
+    for name, before, after in rows:
+        print(f"{name:<34}{before:>10.2f}{after:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Micro-benchmarks for the WordBasketGame hot paths, with JSON baselines.
+
+Cases:
+- check_move: a valid move, a finishing move, and every rejection branch
+- auto_select_card with 1 to 30 cards in hand
+- exchange_hand, _execute_draw_cards and _execute_rotate_swap
+- main.broadcast_game_state (state building + diff + encoding) with 2 to 8 players, JSON and msgpack
+- room construction (WordBasketGame and GameManager.create_room)
+- BotPlayer.choose_action (bot.py) with 7 to 30 cards in hand, for a stuck hand and for a vote
+- get_hints with 7 and 15 cards in hand, answered from the HintCache and built from the word index
+
+Every case is seeded, so runs are comparable. Batches alternate with a fixed reference workload
+and each batch is measured relative to the reference batch next to it, so a machine that is faster
+or slower overall (frequency scaling, noisy neighbours) does not read as a change in the engine.
+A case's `relative` is the median of those ratios over --repeat batches in each of --runs passes
+over the suite, and its `spread` is their interquartile range as a fraction of the median.
+Best and median microseconds per call are reported too. Cases that change the game run on
+pickled copies of a prepared game, made outside the timed loop.
+
+Usage:
+    python benchmarks/bench_engine.py [--filter check_move] [--runs 5 --save baseline.json]
+    python benchmarks/bench_engine.py --compare benchmarks/baselines/engine.json [--threshold 0.3]
+
+--compare flags a case when it is slower than its baseline by more than both threshold and the
+noise of the two measurements (baseline spread + current spread), and exits with status 1 if
+any case is flagged. Record baselines with several --runs. Baselines are only comparable on the
+same machine and Python version.
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.pop("ROOM_LOG_DIR", None)
+os.environ.pop("ROOM_STORE", None)
+
+from bot import BotPlayer
+from dictionary import HintCache
+from game import Card, GameManager, STANDARD_DECK, WordBasketGame
+from room_codes import RoomCodeAllocator
+from wire import JsonCodec, MsgpackCodec, msgpack
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "engine.json")
+
+CHAR_I = Card("char", "い", "い")
+ROW_KA = Card("row", "かきくけこ", "か行")
+LENGTH_5 = Card("length", "5", "5文字")
+
+
+class Case:
+    """
+    One benchmark: setup() builds the argument for a single call of run(arg).
+    mutates=True means every call needs its own argument (built before the timed loop).
+    """
+
+    def __init__(self, name: str, setup: Callable, run: Callable, mutates: bool = False, number: int = 500):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.mutates = mutates
+        self.number = number
+
+
+def new_game(players: int = 3, seed: int = 1, hand: List[Card] = None) -> WordBasketGame:
+    game = WordBasketGame("bench", seed=seed)
+    for i in range(players):
+        game.add_player(f"p{i}", f"プレイヤー{i}")
+    game.start_game()
+    game.current_word = "ゲーム開始_あ"
+    if hand is not None:
+        game.players["p0"].hand = list(hand)
+    return game
+
+
+def cloner(game: WordBasketGame) -> Callable[[], WordBasketGame]:
+    blob = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+    return lambda: pickle.loads(blob)
+
+
+def check_move_cases() -> List[Case]:
+    hand = [CHAR_I, ROW_KA, LENGTH_5]
+    playing = new_game(hand=hand)
+    waiting = WordBasketGame("bench", seed=1)
+    waiting.add_player("p0", "p0")
+    strict = new_game(hand=hand)
+    strict.game_settings["strict_dictionary"] = True
+    finishing = new_game(hand=[CHAR_I])
+
+    rejections = {
+        "not_playing": (waiting, "p0", "あいいい", 0),
+        "unknown_player": (playing, "nobody", "あいいい", 0),
+        "bad_card_index": (playing, "p0", "あいいい", 9),
+        "not_kana": (playing, "p0", "abc", 0),
+        "double_long_vowel": (playing, "p0", "あいーー", 0),
+        "wrong_start": (playing, "p0", "かいいい", 0),
+        "ends_with_n": (playing, "p0", "あいいん", 0),
+        "too_short": (playing, "p0", "あい", 0),
+        "char_mismatch": (playing, "p0", "あいいか", 0),
+        "row_mismatch": (playing, "p0", "あいいい", 1),
+        "length_mismatch": (playing, "p0", "あいいい", 2),
+        "strict_not_in_dictionary": (strict, "p0", "あいいい", 0),
+    }
+    cases = []
+    for name, (game, player_id, word, index) in rejections.items():
+        cases.append(Case(f"check_move/{name}", lambda g=game: g,
+                          lambda g, p=player_id, w=word, i=index: g.check_move(p, w, i)))
+    cases.append(Case("check_move/valid", cloner(playing), lambda g: g.check_move("p0", "あいいい", 0), mutates=True))
+    cases.append(Case("check_move/valid_finishing", cloner(finishing),
+                      lambda g: g.check_move("p0", "あいいい", 0), mutates=True))
+    return cases
+
+
+def auto_select_cases() -> List[Case]:
+    cases = []
+    rng = random.Random(2)
+    words = sorted(WordBasketGame("bench").dictionary.words)
+    for hand_size in (1, 7, 15, 30):
+        game = new_game(hand=rng.sample(STANDARD_DECK, hand_size))
+        sample = rng.sample(words, 64)
+        cursor = iter(range(10 ** 9))
+        cases.append(Case(f"auto_select_card/hand_{hand_size}", lambda g=game: g,
+                          lambda g, s=sample, c=cursor: g.auto_select_card("p0", s[next(c) % 64])))
+    return cases
+
+
+def hand_cases() -> List[Case]:
+    cases = []
+    for hand_size in (7, 15):
+        game = new_game(hand=random.Random(3).sample(STANDARD_DECK, hand_size))
+        cases.append(Case(f"exchange_hand/hand_{hand_size}", cloner(game),
+                          lambda g: g.exchange_hand("p0", 0), mutates=True))
+    for players in (2, 4, 8):
+        game = new_game(players=players)
+        cases.append(Case(f"_execute_draw_cards/{players}_players", cloner(game),
+                          lambda g: g._execute_draw_cards("p0", 3, 10), mutates=True))
+        # Rotating again is as good as the first time: no copy needed
+        cases.append(Case(f"_execute_rotate_swap/{players}_players", lambda g=game: g,
+                          lambda g: g._execute_rotate_swap("p0")))
+    return cases
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine that never suspends (broadcast_game_state only queues frames) without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("coroutine suspended: it needs an event loop")
+
+
+class BenchConnection:
+    """Stands in for main.ClientConnection: keeps the frames instead of writing them to a socket."""
+
+    def __init__(self, codec):
+        self.codec = codec
+        self.frames = 0
+
+    def send(self, frame) -> bool:
+        self.frames += 1
+        return True
+
+
+def broadcast_cases() -> List[Case]:
+    import main
+
+    codecs = [("json", JsonCodec())]
+    if msgpack is not None:
+        codecs.append(("msgpack", MsgpackCodec()))
+    cases = []
+    for codec_name, codec in codecs:
+        for players in (2, 4, 8):
+            room_code = f"B{codec_name[0]}{players}"
+            game = new_game(players=players)
+            main.manager.active_connections[room_code] = {pid: BenchConnection(codec) for pid in game.players}
+            words = ["あいいい", "いかか", "かあい"]
+            turn = iter(range(10 ** 9))
+
+            def broadcast(g, room_code=room_code, words=words, turn=turn):
+                # A new word every broadcast (mostly patches, like a real game)
+                g.current_word = words[next(turn) % len(words)]
+                run_coroutine(main.broadcast_game_state(g, room_code, message="ベンチマーク"))
+
+            cases.append(Case(f"broadcast_game_state/{codec_name}_{players}_players", lambda g=game: g, broadcast,
+                              number=500))
+    return cases
+
+
+def room_cases() -> List[Case]:
+    seeds = iter(range(10 ** 9))
+    return [
+        Case("room/construct", lambda: None, lambda _: WordBasketGame("bench", seed=next(seeds)), number=100),
+        # A fresh manager per batch: each has its own 10000 room codes
+        Case("room/create_room", lambda: GameManager(RoomCodeAllocator()), lambda manager: manager.create_room(),
+             number=100),
+    ]
+
+
+def bot_cases() -> List[Case]:
+    cases = []
+    rng = random.Random(4)
+    for hand_size in (7, 15, 30):
+        game = new_game(hand=rng.sample(STANDARD_DECK, hand_size))
+        bot = BotPlayer("p0", seed=1)
+        cases.append(Case(f"bot/choose_action/hand_{hand_size}", lambda g=game: g, bot.choose_action))
+
+    # No word fits any card: the bot falls back to a hand exchange
+    stuck = new_game(hand=[])
+    stuck.current_word = "ゲーム開始_ぬ"
+    oracle = stuck.dictionary.oracle
+    stuck.players["p0"].hand = [card for card in STANDARD_DECK if not oracle.can_play_card("ぬ", card)][:7]
+    stuck.players["p0"].special_cards = []
+    cases.append(Case("bot/choose_action/stuck", lambda g=stuck: g, BotPlayer("p0", seed=1).choose_action))
+
+    voting = new_game(hand=[CHAR_I])
+    voting.check_move("p0", "あいいい", 0)
+    cases.append(Case("bot/choose_action/vote", lambda g=voting: g, BotPlayer("p1", seed=1).choose_action))
+    return cases
+
+
+def hint_cases() -> List[Case]:
+    cases = []
+    for hand_size in (7, 15):
+        game = new_game(hand=random.Random(5).sample(STANDARD_DECK, hand_size))
+        cases.append(Case(f"get_hints/cached_hand_{hand_size}", lambda g=game: g, lambda g: g.get_hints("p0")))
+        # A cache of one entry that is cleared before every lookup
+        uncached = pickle.loads(pickle.dumps(game))
+        cache = HintCache(uncached.dictionary.index, uncached.dictionary.oracle, maxsize=1)
+        hand = uncached.players["p0"].hand
+        cases.append(Case(f"get_hints/miss_hand_{hand_size}", lambda c=cache: c,
+                          lambda c, h=hand: (c.clear(), c.lookup("あ", h, 3))))
+    return cases
+
+
+ALL_CASES = (check_move_cases, auto_select_cases, hand_cases, broadcast_cases, room_cases, bot_cases, hint_cases)
+
+
+def reference_work():
+    """Fixed pure-Python workload (dict/str/list operations, like the engine) used as a speed yardstick."""
+    counts = {}
+    for i in range(200):
+        key = "あいうえお"[i % 5] * (i % 3 + 1)
+        counts[key] = counts.get(key, 0) + 1
+    return sorted(counts.items())
+
+
+def time_batch(case: Case) -> float:
+    args = [case.setup() for _ in range(case.number)] if case.mutates else [case.setup()] * case.number
+    run = case.run
+    start = time.perf_counter()
+    for arg in args:
+        run(arg)
+    return (time.perf_counter() - start) / case.number * 1e6
+
+
+REFERENCE = Case("reference", lambda: None, lambda _: reference_work(), number=200)
+
+
+def time_case(case: Case, repeat: int) -> Tuple[List[float], List[float]]:
+    """
+    repeat batch timings (us per call) and, for each batch, its time in units of the reference
+    workload timed right before it (on a machine whose speed drifts, this is what baselines compare).
+    """
+    timings, ratios = [], []
+    # The first round only warms up (caches, allocator) and is not counted
+    for round_ in range(repeat + 1):
+        reference = time_batch(REFERENCE)
+        timing = time_batch(case)
+        if round_:
+            timings.append(timing)
+            ratios.append(timing / reference)
+    return timings, ratios
+
+
+def summarize(timings: List[float], ratios: List[float]) -> Dict[str, float]:
+    relative = statistics.median(ratios)
+    quartiles = statistics.quantiles(ratios, n=4) if len(ratios) > 1 else [relative] * 3
+    return {
+        "best_us": min(timings),
+        "median_us": statistics.median(timings),
+        "relative": relative,
+        "spread": (quartiles[2] - quartiles[0]) / relative,
+    }
+
+
+def run_suite(pattern: str, repeat: int, runs: int = 1) -> Dict[str, Dict[str, float]]:
+    """Each pass times every case once more; batches of all passes are pooled per case."""
+    cases = [case for make_cases in ALL_CASES for case in make_cases() if not pattern or pattern in case.name]
+    timings: Dict[str, List[float]] = {case.name: [] for case in cases}
+    ratios: Dict[str, List[float]] = {case.name: [] for case in cases}
+    for run in range(runs):
+        if runs > 1:
+            print(f"-- pass {run + 1}/{runs}", flush=True)
+        for case in cases:
+            case_timings, case_ratios = time_case(case, repeat)
+            timings[case.name] += case_timings
+            ratios[case.name] += case_ratios
+            print(f"{case.name:<48}{min(case_timings):>10.2f}{statistics.median(case_timings):>10.2f}", flush=True)
+    return {case.name: summarize(timings[case.name], ratios[case.name]) for case in cases}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    print(f"\n{'case':<48}{'baseline':>10}{'now':>10}{'change':>9}{'noise':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<48}{'-':>10}{result['best_us']:>10.2f}{'new':>9}")
+            continue
+        if "relative" in before:
+            change = result["relative"] / before["relative"] - 1
+        else:
+            change = result["best_us"] / before["best_us"] - 1
+        # A change inside the measurements' own spread isn't one
+        noise = before.get("spread", 0.0) + result["spread"]
+        limit = max(threshold, noise)
+        flag = ""
+        if change > limit:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -limit:
+            flag = "  faster"
+        print(f"{name:<48}{before['median_us']:>10.2f}{result['median_us']:>10.2f}{change:>+9.0%}{noise:>8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=20, help="timed batches per case and pass")
+    parser.add_argument("--runs", type=int, default=1, help="passes over the suite (use several when saving a baseline)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"compare with a baseline (default {os.path.relpath(DEFAULT_BASELINE, ROOT)})")
+    parser.add_argument("--threshold", type=float, default=0.3, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    print(f"{'case (us / call)':<48}{'best':>10}{'median':>10}")
+    results = run_suite(args.filter, args.repeat, args.runs)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "runs": args.runs,
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("python") != platform.python_version():
+            print(f"\n[WARN] baseline was recorded with Python {baseline.get('python')}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} and the noise: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cost of journaling moves to the room event log (room_log.py).
+
+- per-move latency on the calling (event loop) thread: no journal vs RoomLog (buffered) vs
+  an inline write + fsync per move (what the log would cost without group commit)
+- how many records each fsync covers when many rooms play at once
+
+Usage:
+    python benchmarks/bench_event_log.py [moves] [rooms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import GameManager
+from room_log import RoomLog
+
+PRIORITIES = (["char", "row", "length"], ["row", "length", "char"])
+
+
+def make_room(manager: GameManager) -> str:
+    code = manager.create_room()
+    game = manager.get_room(code)
+    for i in range(4):
+        game.add_player(f"p{i}", f"player{i}")
+    game.start_game()
+    return code
+
+
+def play(game, moves: int) -> float:
+    """A mix of hand exchanges (deck draws, RNG) and cheap setting changes."""
+    start = time.perf_counter()
+    for i in range(moves):
+        if i % 2:
+            game.exchange_hand(f"p{i % 4}", 0)
+        else:
+            game.set_card_priority(f"p{i % 4}", PRIORITIES[i % 4 // 2])
+    return (time.perf_counter() - start) / moves * 1e6
+
+
+def inline_fsync_journal(path: str):
+    f = open(path, "a", encoding="utf-8")
+
+    def journal(op, args):
+        f.write(f"{op} {args!r}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return journal
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    directory = tempfile.mkdtemp()
+    try:
+        plain = GameManager()
+        baseline = play(plain.get_room(make_room(plain)), moves)
+
+        log = RoomLog(directory)
+        logged = GameManager(event_log=log)
+        buffered = play(logged.get_room(make_room(logged)), moves)
+        log.flush()
+
+        inline = GameManager()
+        game = inline.get_room(make_room(inline))
+        game.journal = inline_fsync_journal(os.path.join(directory, "inline.log"))
+        synchronous = play(game, moves)
+
+        print(f"Moves per room: {moves}")
+        print(f"{'':<30}{'us/move':>10}{'overhead':>10}")
+        print(f"{'no journal':<30}{baseline:>10.1f}{'':>10}")
+        print(f"{'RoomLog (group commit)':<30}{buffered:>10.1f}{buffered - baseline:>10.1f}")
+        print(f"{'write + fsync per move':<30}{synchronous:>10.1f}{synchronous - baseline:>10.1f}")
+
+        # Many rooms moving at once: one fsync per touched file per batch
+        log.batches = log.fsyncs = 0
+        games = [logged.get_room(make_room(logged)) for _ in range(rooms)]
+        log.flush()
+        log.batches = log.fsyncs = 0
+        start = time.perf_counter()
+        total = 0
+        for i in range(moves // 10):
+            for game in games:
+                game.set_card_priority("p0", PRIORITIES[i % 2])
+                total += 1
+            if i % 10 == 9:
+                time.sleep(0.01)  # let the writer thread run, as the event loop would
+        log.close()
+        elapsed = time.perf_counter() - start
+        print(f"\n{rooms} rooms, {total} records in {elapsed:.2f}s: "
+              f"{log.batches} batches, {log.fsyncs} fsyncs, {total / max(log.fsyncs, 1):.1f} records/fsync")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
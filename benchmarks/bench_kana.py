@@ -0,0 +1,90 @@
+"""
+Per-move kana normalization cost: per-call dict literals (old) vs KanaNormalizer tables.
+A "move" is the normalization work done by check_move plus auto_select_card over a 7-card hand.
+
+Usage:
+    python benchmarks/bench_kana.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kana import kana
+from game import Card
+from test_kana import legacy_normalize_kana
+
+
+def legacy_get_vowel(char):
+    vowel_map = {
+        'あ': 'あ', 'い': 'い', 'う': 'う', 'え': 'え', 'お': 'お',
+        'か': 'あ', 'き': 'い', 'く': 'う', 'け': 'え', 'こ': 'お',
+        'が': 'あ', 'ぎ': 'い', 'ぐ': 'う', 'げ': 'え', 'ご': 'お',
+        'さ': 'あ', 'し': 'い', 'す': 'う', 'せ': 'え', 'そ': 'お',
+        'ざ': 'あ', 'じ': 'い', 'ず': 'う', 'ぜ': 'え', 'ぞ': 'お',
+        'た': 'あ', 'ち': 'い', 'つ': 'う', 'て': 'え', 'と': 'お',
+        'だ': 'あ', 'ぢ': 'い', 'づ': 'う', 'で': 'え', 'ど': 'お',
+        'な': 'あ', 'に': 'い', 'ぬ': 'う', 'ね': 'え', 'の': 'お',
+        'は': 'あ', 'ひ': 'い', 'ふ': 'う', 'へ': 'え', 'ほ': 'お',
+        'ば': 'あ', 'び': 'い', 'ぶ': 'う', 'べ': 'え', 'ぼ': 'お',
+        'ぱ': 'あ', 'ぴ': 'い', 'ぷ': 'う', 'ぺ': 'え', 'ぽ': 'お',
+        'ま': 'あ', 'み': 'い', 'む': 'う', 'め': 'え', 'も': 'お',
+        'や': 'あ', 'ゆ': 'う', 'よ': 'お',
+        'ら': 'あ', 'り': 'い', 'る': 'う', 'れ': 'え', 'ろ': 'お',
+        'わ': 'あ', 'を': 'お',
+        'ん': 'ん',
+        'ゃ': 'あ', 'ゅ': 'う', 'ょ': 'お',
+        'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
+    }
+    return vowel_map.get(char, char)
+
+
+HAND = [
+    Card("char", "た", "た"), Card("char", "ふ", "ふ"), Card("char", "き", "き"),
+    Card("row", "かきくけこ", "か行"), Card("row", "さしすせそ", "さ行"),
+    Card("length", "5", "5文字"), Card("length", "7", "7文字以上"),
+]
+CURRENT_WORD = "すきー"
+WORD = "いんたーねっとかふぇー"
+
+
+def legacy_move():
+    last = CURRENT_WORD[-1]
+    if last == "ー":
+        target = legacy_normalize_kana(legacy_get_vowel(CURRENT_WORD[-2]))
+    else:
+        target = legacy_normalize_kana(last)
+    legacy_normalize_kana(WORD[0]) == legacy_normalize_kana(target)
+    effective_end = WORD[-1]
+    if WORD.endswith("ー"):
+        effective_end = legacy_get_vowel(WORD[-2])
+    for card in HAND:
+        if card.type == "char":
+            legacy_normalize_kana(effective_end) == legacy_normalize_kana(card.value)
+        elif card.type == "row":
+            legacy_normalize_kana(effective_end) in card.value
+
+
+def table_move():
+    target = kana.target_char(CURRENT_WORD)
+    kana.normalize_char(WORD[0]) == target
+    end_key = kana.end_key(WORD)
+    for card in HAND:
+        if card.type == "char":
+            end_key == kana.normalize_char(card.value)
+        elif card.type == "row":
+            end_key in card.value
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    before = min(timeit.repeat(legacy_move, number=iterations, repeat=5)) / iterations
+    after = min(timeit.repeat(table_move, number=iterations, repeat=5)) / iterations
+    print(f"legacy (dict literal per call): {before * 1e6:.2f} us/move")
+    print(f"KanaNormalizer tables:          {after * 1e6:.2f} us/move")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
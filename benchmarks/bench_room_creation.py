@@ -0,0 +1,55 @@
+"""
+Room creation cost: per-room JSON parsing (old behaviour) vs the shared dictionary registry.
+
+Usage:
+    python benchmarks/bench_room_creation.py [num_rooms]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dictionary import dictionary_registry, load_words, DEFAULT_DICTIONARY_PATH
+from game import WordBasketGame
+
+
+class PerRoomDictionaryGame(WordBasketGame):
+    """Reproduces the old behaviour: every room parses words.json into its own set."""
+
+    def load_dictionary(self, path: str = None):
+        self.dictionary = set(load_words(path or DEFAULT_DICTIONARY_PATH))
+
+
+def measure(game_class, num_rooms: int):
+    dictionary_registry.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rooms = [game_class(str(i)) for i in range(num_rooms)]
+    elapsed = time.perf_counter() - start
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rooms": len(rooms),
+        "latency_ms": elapsed / num_rooms * 1000,
+        "memory_per_room_kb": current / num_rooms / 1024,
+    }
+
+
+def main():
+    num_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    before = measure(PerRoomDictionaryGame, num_rooms)
+    after = measure(WordBasketGame, num_rooms)
+
+    print(f"Rooms created: {num_rooms}")
+    print(f"{'':<22}{'before':>12}{'after':>12}")
+    print(f"{'latency / room (ms)':<22}{before['latency_ms']:>12.3f}{after['latency_ms']:>12.3f}")
+    print(f"{'memory / room (KB)':<22}{before['memory_per_room_kb']:>12.1f}{after['memory_per_room_kb']:>12.1f}")
+    saved = (before["memory_per_room_kb"] - after["memory_per_room_kb"]) * num_rooms / 1024
+    print(f"Memory saved for {num_rooms} rooms: {saved:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Throughput of the room-sharded deployment (gateway.py) by number of engine processes.
+
+Each run starts the gateway with N shards, creates rooms through it, connects bots to every room
+and has each bot repeatedly ask for a full state snapshot ("resync") and wait for it. The engine
+work per request is a complete game_state render, so throughput is bounded by engine CPU until
+the gateway relay or the load generator becomes the bottleneck. Scaling needs free cores:
+the table is only meaningful when os.cpu_count() exceeds the largest shard count.
+
+Usage:
+    python benchmarks/bench_sharding.py [--shards 1,2,4] [--rooms 16] [--players 4] [--duration 5] [--load-procs N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def http(method: str, url: str, body: bytes = None) -> dict:
+    request = urllib.request.Request(url, data=body, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def start_gateway(shards: int, port: int, engine_port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "gateway.py", "--shards", str(shards), "--host", "127.0.0.1",
+         "--port", str(port), "--engine-port", str(engine_port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if all(s["healthy"] for s in http("GET", f"http://127.0.0.1:{port}/api/shards")["shards"]):
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gateway did not start")
+
+
+async def recv_until(ws, message_type: str):
+    while True:
+        frame = json.loads(await ws.recv())
+        if frame.get("type") == message_type:
+            return frame
+
+
+async def run_room(base_url: str, players: int, deadline: float) -> int:
+    room_code = (await asyncio.to_thread(http, "POST", f"http://{base_url}/api/rooms", b"{}"))["room_code"]
+    bots = []
+    for i in range(players):
+        ws = await websockets.connect(f"ws://{base_url}/ws/{room_code}/bot{i}", max_size=None)
+        await recv_until(ws, "game_state")
+        bots.append(ws)
+    await bots[0].send(json.dumps({"action": "start_game"}))
+    await asyncio.sleep(0.2)
+
+    async def bot_loop(ws) -> int:
+        round_trips = 0
+        while time.monotonic() < deadline:
+            await ws.send(json.dumps({"action": "resync"}))
+            await recv_until(ws, "game_state")
+            round_trips += 1
+        return round_trips
+
+    try:
+        return sum(await asyncio.gather(*(bot_loop(ws) for ws in bots)))
+    finally:
+        for ws in bots:
+            await ws.close()
+
+
+def load_process(base_url: str, rooms: int, players: int, start_at: float, duration: float) -> int:
+    async def main():
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        deadline = time.monotonic() + duration
+        return sum(await asyncio.gather(*(run_room(base_url, players, deadline) for _ in range(rooms))))
+    return asyncio.run(main())
+
+
+def measure(shards: int, args) -> float:
+    port, engine_port = 8790, 9300
+    gateway = start_gateway(shards, port, engine_port)
+    try:
+        rooms_per_proc = [args.rooms // args.load_procs + (i < args.rooms % args.load_procs) for i in range(args.load_procs)]
+        start_at = time.time() + 1.0
+        with multiprocessing.Pool(args.load_procs) as pool:
+            results = [pool.apply_async(load_process, (f"127.0.0.1:{port}", rooms, args.players, start_at, args.duration))
+                       for rooms in rooms_per_proc if rooms]
+            round_trips = sum(result.get() for result in results)
+        return round_trips / args.duration
+    finally:
+        gateway.send_signal(signal.SIGTERM)
+        gateway.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", default="1,2,4")
+    parser.add_argument("--rooms", type=int, default=16)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--load-procs", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}  rooms: {args.rooms}  players/room: {args.players}  "
+          f"duration: {args.duration}s  load processes: {args.load_procs}")
+    print(f"{'shards':>8}{'snapshots/s':>14}{'speedup':>10}")
+    baseline = None
+    for shards in (int(n) for n in args.shards.split(",")):
+        throughput = measure(shards, args)
+        baseline = baseline or throughput
+        print(f"{shards:>8}{throughput:>14.0f}{throughput / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
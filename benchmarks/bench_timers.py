@@ -0,0 +1,97 @@
+"""
+Pending-timer cost: one asyncio task sleeping per timer (the old voting timeout) vs the
+process-wide TimerWheel (timers.py).
+
+Usage:
+    python benchmarks/bench_timers.py [num_timers]
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timers import TimerWheel
+
+
+def noop():
+    pass
+
+
+async def sleeping_task(delay: float):
+    await asyncio.sleep(delay)
+    noop()
+
+
+async def start_tasks(count: int, delay: float) -> list:
+    tasks = [asyncio.create_task(sleeping_task(delay + i * 1e-6)) for i in range(count)]
+    await asyncio.sleep(0)  # let every task start its sleep
+    return tasks
+
+
+async def cancel_tasks(tasks: list):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def start_wheel(count: int, delay: float) -> list:
+    wheel = TimerWheel()
+    return [wheel.schedule(delay + i * 1e-6, noop) for i in range(count)]
+
+
+def cancel_wheel(handles: list):
+    for handle in handles:
+        handle.cancel()
+
+
+async def measure(start, cancel, count: int, delay: float) -> dict:
+    async def call(fn, *args):
+        result = fn(*args)
+        return await result if asyncio.iscoroutine(result) else result
+
+    begin = time.perf_counter()
+    timers = await call(start, count, delay)
+    schedule = time.perf_counter() - begin
+    begin = time.perf_counter()
+    await call(cancel, timers)
+    cancelled = time.perf_counter() - begin
+
+    # Memory in a separate pass: tracing allocations slows everything down
+    tracemalloc.start()
+    timers = await call(start, count, delay)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await call(cancel, timers)
+    return {"schedule_us": schedule / count * 1e6, "cancel_us": cancelled / count * 1e6, "memory_b": memory / count}
+
+
+async def wheel_lag(count: int) -> float:
+    """Fire count timers spread over one second; report the worst lag."""
+    wheel = TimerWheel(tick=0.01)
+    for i in range(count):
+        wheel.schedule(0.2 + i / count, noop)
+    runner = asyncio.create_task(wheel.run())
+    while wheel.pending:
+        await asyncio.sleep(0.05)
+    runner.cancel()
+    return wheel.max_lag
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    delay = 30.0
+    tasks = await measure(start_tasks, cancel_tasks, count, delay)
+    wheel = await measure(start_wheel, cancel_wheel, count, delay)
+    print(f"Pending timers: {count}")
+    print(f"{'':<24}{'tasks':>12}{'wheel':>12}")
+    print(f"{'schedule (us/timer)':<24}{tasks['schedule_us']:>12.2f}{wheel['schedule_us']:>12.2f}")
+    print(f"{'cancel (us/timer)':<24}{tasks['cancel_us']:>12.2f}{wheel['cancel_us']:>12.2f}")
+    print(f"{'memory (bytes/timer)':<24}{tasks['memory_b']:>12.0f}{wheel['memory_b']:>12.0f}")
+    print(f"\nWheel max lag firing {count} timers over 1s (10 ms tick): {await wheel_lag(count) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Wire format comparison on recorded game states: JSON text vs MessagePack with the short-key schema.
+
+Usage:
+    python benchmarks/bench_wire.py [repeat]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorded_states import record_game_states
+from wire import JsonCodec, MsgpackCodec, msgpack
+
+
+def measure(codec, messages, repeat: int):
+    total_bytes = sum(len(codec.encode(m).encode("utf-8") if not codec.binary else codec.encode(m)) for m in messages)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            codec.encode(message)
+    elapsed = time.perf_counter() - start
+    return total_bytes, elapsed / (repeat * len(messages)) * 1e6
+
+
+def main():
+    if msgpack is None:
+        sys.exit("msgpack is not installed (pip install msgpack)")
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    messages = [json.loads(frame) for _player_id, frame in record_game_states()]
+    snapshots = [m for m in messages if m["type"] == "game_state"]
+    patches = [m for m in messages if m["type"] == "game_state_patch"]
+
+    print(f"Recorded {len(messages)} messages ({len(snapshots)} snapshots, {len(patches)} patches)")
+    print(f"{'':<22}{'JSON bytes':>12}{'msgpack':>12}{'ratio':>8}{'JSON us':>10}{'msgpack us':>12}")
+    for name, group in (("snapshots", snapshots), ("patches", patches), ("all", messages)):
+        if not group:
+            continue
+        json_bytes, json_us = measure(JsonCodec(), group, repeat)
+        mp_bytes, mp_us = measure(MsgpackCodec(), group, repeat)
+        print(f"{name:<22}{json_bytes:>12}{mp_bytes:>12}{mp_bytes / json_bytes:>8.2f}{json_us:>10.2f}{mp_us:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+WebSocket load test: how many rooms one server instance can hold.
+
+Starts a local uvicorn with main:app (or targets --url), then grows the number of rooms step by
+step. Every room is created with POST /api/rooms and gets K bot clients on /ws/{room}/{name}
+that play real games over the normal action protocol:
+
+- play_word with a dictionary word for one of their playable cards (card_index=-1: the server
+  auto-selects the card, like the UI's auto mode)
+- reroll when the server suggests an exchange
+- approve (or sometimes oppose) a finishing move, and oppose ordinary moves now and then
+- rematch when the game is over
+
+Bots keep the merged state from game_state snapshots and game_state_patch deltas (resyncing on a
+version gap, as the browser does). Latency is measured from sending an action to receiving the
+first broadcast that shows its effect (or the error reply). After each step the table shows
+p50/p99 of that latency, messages/s and bytes/s received by all bots, and the server's RSS.
+
+The bots run in this process: on a machine with few cores they compete with the server for CPU,
+so treat the numbers as a lower bound for the server.
+
+Usage:
+    python benchmarks/load_test.py [--rooms 10,25,50,100] [--players 4] [--duration 10]
+                                   [--think 1.0] [--oppose-rate 0.05] [--codec json|msgpack]
+                                   [--url 127.0.0.1:8000 --pid PID]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import namedtuple
+from typing import Callable, List, Optional
+
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dictionary import dictionary_registry
+from wire import MSGPACK_SUBPROTOCOL, expand_keys
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Settings for bot rooms: no special cards (bots don't play them)
+ROOM_SETTINGS = {"settings": {"num_special_cards_per_player": 0}}
+ACTION_TIMEOUT = 5.0
+
+# Enough of a Card for WordIndex.words_for_card
+BotCard = namedtuple("BotCard", "type value display")
+
+
+def http(method: str, url: str, body: bytes = None) -> dict:
+    request = urllib.request.Request(url, data=body, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def start_server(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            http("GET", f"http://127.0.0.1:{port}/health")
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start")
+
+
+def rss_mb(pid: Optional[int]) -> Optional[float]:
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class Stats:
+    """Counters for one measurement window (shared by every bot)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.latencies: List[float] = []
+        self.messages = 0
+        self.bytes = 0
+        self.actions = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.resyncs = 0
+        self.games = 0
+
+
+class Bot:
+    def __init__(self, name: str, stats: Stats, words, args):
+        self.name = name
+        self.stats = stats
+        self.index = words.index
+        self.args = args
+        self.rng = random.Random(name)
+        self.state: dict = {}
+        self.ws = None
+        # (sent_at, predicate on the new state) of the action waiting for its broadcast
+        self.pending: Optional[tuple] = None
+        self.changed = asyncio.Event()
+        self.rematch_sent = False
+        self.status = None
+
+    async def connect(self, base_url: str, room_code: str):
+        subprotocols = [MSGPACK_SUBPROTOCOL] if self.args.codec == "msgpack" else None
+        self.ws = await websockets.connect(f"ws://{base_url}/ws/{room_code}/{self.name}",
+                                           subprotocols=subprotocols, max_size=None, compression=None)
+        while "version" not in self.state:
+            self.receive(await self.ws.recv())
+
+    def decode(self, frame) -> dict:
+        if isinstance(frame, bytes):
+            return expand_keys(msgpack.unpackb(frame, raw=False, strict_map_key=False))
+        return json.loads(frame)
+
+    def receive(self, frame):
+        stats = self.stats
+        stats.messages += 1
+        stats.bytes += len(frame)
+        message = self.decode(frame)
+        kind = message.get("type")
+        if kind == "game_state":
+            self.state = message
+        elif kind == "game_state_patch":
+            if message["base_version"] != self.state.get("version"):
+                stats.resyncs += 1
+                asyncio.create_task(self.send({"action": "resync"}))
+                return
+            self.state.update(message["changes"])
+            self.state["version"] = message["version"]
+        elif kind == "error":
+            if self.pending is not None:
+                self.pending = None
+                stats.rejected += 1
+                self.changed.set()
+            return
+        elif kind == "rematch_vote":
+            self.resolve(lambda state: True)
+            self.changed.set()
+            return
+        else:
+            return
+        status = self.state.get("status")
+        if status == "finished" and self.status != "finished" and self.state.get("is_host"):
+            stats.games += 1
+        self.status = status
+        self.resolve()
+        self.changed.set()
+
+    def resolve(self, predicate: Callable[[dict], bool] = None):
+        if self.pending is None:
+            return
+        sent_at, expect = self.pending
+        if (predicate or expect)(self.state):
+            self.stats.latencies.append(time.monotonic() - sent_at)
+            self.pending = None
+
+    async def send(self, message: dict):
+        try:
+            await self.ws.send(json.dumps(message, ensure_ascii=False))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def act(self, message: dict, expect: Callable[[dict], bool]):
+        self.stats.actions += 1
+        self.pending = (time.monotonic(), expect)
+        await self.send(message)
+        deadline = time.monotonic() + ACTION_TIMEOUT
+        while self.pending is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats.timeouts += 1
+                self.pending = None
+                break
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def choose_word(self) -> Optional[str]:
+        state = self.state
+        hand = state.get("my_hand") or []
+        start = state.get("target_char")
+        if not start:
+            return None
+        min_length = 4 if len(hand) == 1 else 3
+        for card_index in self.rng.sample(state.get("playable_cards") or [], len(state.get("playable_cards") or [])):
+            card = hand[card_index]
+            card = BotCard(card["type"], card["value"], card["display"])
+            words = [w for w in self.index.words_for_card(start, card, min_length) if w != state.get("current_word")]
+            if words:
+                return self.rng.choice(words)
+        return None
+
+    async def next_action(self):
+        """Pick and perform one action for the current state (or wait for a change)."""
+        state = self.state
+        me = state.get("my_player_id")
+        status = state.get("status")
+        my_rank = next((p.get("rank") for p in state.get("players_info", ()) if p.get("player_id") == me), None)
+        last_move_id = state.get("last_move_id")
+
+        if status == "waiting" and state.get("is_host") and len(state.get("players_info", ())) >= self.args.players:
+            await self.act({"action": "start_game"}, lambda s: s.get("status") != "waiting")
+        elif status == "finished" and not self.rematch_sent:
+            self.rematch_sent = True
+            await self.act({"action": "rematch"}, lambda s: s.get("status") != "finished")
+        elif status == "finishing_check" and not state.get("has_voted") and state.get("finishing_player_id") != me:
+            action = "oppose" if self.rng.random() < self.args.oppose_rate else "approve"
+            message = {"action": action, "move_id": last_move_id} if action == "oppose" else {"action": action}
+            await self.act(message, lambda s: s.get("has_voted") or s.get("last_move_id") != last_move_id
+                           or s.get("status") != "finishing_check")
+        elif status == "playing" and my_rank is None:
+            self.rematch_sent = False
+            if (last_move_id is not None and state.get("finishing_player_id") != me
+                    and not state.get("has_voted") and self.rng.random() < self.args.oppose_rate):
+                await self.act({"action": "oppose", "move_id": last_move_id},
+                               lambda s: s.get("has_voted") or s.get("last_move_id") != last_move_id)
+                return
+            word = self.choose_word()
+            if word is not None:
+                await self.act({"action": "play_word", "word": word, "card_index": -1},
+                               lambda s: s.get("current_word") == word)
+            elif state.get("suggest_exchange") and state.get("my_hand"):
+                hand = state.get("my_hand")
+                await self.act({"action": "reroll", "card_index": 0}, lambda s: s.get("my_hand") != hand)
+            else:
+                await self.wait_for_change()
+        else:
+            await self.wait_for_change()
+
+    async def wait_for_change(self):
+        self.changed.clear()
+        try:
+            await asyncio.wait_for(self.changed.wait(), ACTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    async def reader(self):
+        try:
+            async for frame in self.ws:
+                self.receive(frame)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def run(self):
+        reader = asyncio.create_task(self.reader())
+        try:
+            while not reader.done():
+                # Human-ish think time before each action
+                await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.args.think)
+                await self.next_action()
+        finally:
+            reader.cancel()
+            # Open sockets would hold up the server's graceful shutdown
+            await self.ws.close()
+
+
+async def start_room(base_url: str, stats: Stats, words, args, room_number: int) -> List[asyncio.Task]:
+    room_code = (await asyncio.to_thread(http, "POST", f"http://{base_url}/api/rooms",
+                                         json.dumps(ROOM_SETTINGS).encode()))["room_code"]
+    bots = [Bot(f"bot{room_number}_{i}", stats, words, args) for i in range(args.players)]
+    for bot in bots:
+        # Connect in order: the first bot is the host
+        await bot.connect(base_url, room_code)
+    return [asyncio.create_task(bot.run()) for bot in bots]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(args, base_url: str, pid: Optional[int]):
+    words = dictionary_registry.get()
+    words.index  # build before measuring
+    stats = Stats()
+    tasks: List[asyncio.Task] = []
+    print(f"players/room: {args.players}  think: {args.think}s  step: {args.duration}s  codec: {args.codec}")
+    print(f"{'rooms':>6}{'conns':>7}{'actions/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'msgs/s':>9}"
+          f"{'KB/s':>9}{'games':>7}{'rejected':>10}{'timeouts':>10}{'resyncs':>9}{'RSS MB':>9}")
+    rooms = 0
+    for target in (int(n) for n in args.rooms.split(",")):
+        while rooms < target:
+            tasks.extend(await start_room(base_url, stats, words, args, rooms))
+            rooms += 1
+        await asyncio.sleep(args.think * 2)  # let the new rooms start their games
+        stats.reset()
+        await asyncio.sleep(args.duration)
+        elapsed = time.monotonic() - stats.started
+        rss = rss_mb(pid)
+        print(f"{rooms:>6}{rooms * args.players:>7}{stats.actions / elapsed:>11.1f}"
+              f"{percentile(stats.latencies, 0.50) * 1000:>9.1f}{percentile(stats.latencies, 0.99) * 1000:>9.1f}"
+              f"{stats.messages / elapsed:>9.0f}{stats.bytes / elapsed / 1024:>9.1f}"
+              f"{stats.games:>7}{stats.rejected:>10}{stats.timeouts:>10}{stats.resyncs:>9}"
+              f"{(f'{rss:.1f}' if rss is not None else '-'):>9}", flush=True)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", default="10,25,50,100", help="room counts to step through")
+    parser.add_argument("--players", type=int, default=4, help="bots per room")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured at each step")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a bot's actions")
+    parser.add_argument("--oppose-rate", type=float, default=0.05)
+    parser.add_argument("--codec", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--url", help="host:port of a running server (default: start one)")
+    parser.add_argument("--pid", type=int, help="server pid for RSS when using --url")
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+    if args.codec == "msgpack" and msgpack is None:
+        parser.error("msgpack is not installed")
+
+    server = None
+    if args.url:
+        base_url, pid = args.url, args.pid
+    else:
+        server = start_server(args.port)
+        base_url, pid = f"127.0.0.1:{args.port}", server.pid
+    try:
+        asyncio.run(run(args, base_url, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
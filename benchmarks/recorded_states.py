@@ -0,0 +1,71 @@
+"""
+Record the messages a real game broadcasts, for wire-format benchmarks.
+Runs main.broadcast_game_state against recording connections while players pick words
+straight from the dictionary index.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from game import WordBasketGame
+from wire import JsonCodec
+
+
+class RecordingConnection:
+    def __init__(self, player_id: str, log: list):
+        self.player_id = player_id
+        self.log = log
+        self.codec = JsonCodec()
+
+    def send(self, message) -> bool:
+        self.log.append((self.player_id, message))
+        return True
+
+
+def find_move(game: WordBasketGame, player_id: str):
+    player = game.players[player_id]
+    min_length = game.get_min_word_length(player)
+    for idx, card in enumerate(player.hand):
+        for word in game.dictionary.index.words_for_card(game.get_target_char(), card, min_length):
+            return word, idx
+    return None
+
+
+async def _record(num_players: int, max_moves: int, seed: int):
+    room_code = f"bench{seed}"
+    game = WordBasketGame(room_code, seed=seed)
+    log = []
+    connections = main.manager.active_connections.setdefault(room_code, {})
+    for i in range(num_players):
+        player_id = f"p{i}"
+        game.add_player(player_id, f"プレイヤー{i}")
+        connections[player_id] = RecordingConnection(player_id, log)
+        await main.broadcast_game_state(game, room_code, f"プレイヤー{i}さんが参加しました")
+
+    game.start_game()
+    await main.broadcast_game_state(game, room_code, "ゲーム開始！")
+
+    moves = 0
+    while game.status == "playing" and moves < max_moves:
+        player_id = f"p{moves % num_players}"
+        move = find_move(game, player_id)
+        if move is None:
+            game.exchange_hand(player_id, 0)
+            await main.broadcast_game_state(game, room_code, "手札を交換しました")
+        else:
+            word, idx = move
+            result = game.check_move(player_id, word, idx)
+            await main.broadcast_game_state(game, room_code, result.get("message"))
+        moves += 1
+
+    del main.manager.active_connections[room_code]
+    main.manager.state_syncs.pop(room_code, None)
+    return log
+
+
+def record_game_states(num_players: int = 4, max_moves: int = 40, seed: int = 0):
+    """List of (player_id, JSON frame) in send order."""
+    return asyncio.run(_record(num_players, max_moves, seed))
@@ -0,0 +1,184 @@
+import os
+import random
+import uuid
+from typing import List, Optional
+
+from dictionary import LENGTH_BUCKETS
+from game import Player, WordBasketGame
+
+# Bots join rooms as ordinary players; their ids carry this prefix so any worker can tell them apart
+BOT_ID_PREFIX = "bot-"
+# Seconds a bot may take to answer a state change (it waits between half and all of it)
+BOT_THINK_TIME = float(os.environ.get("BOT_THINK_TIME", 1.5))
+MIN_THINK_TIME = 0.01
+MAX_THINK_TIME = 60.0
+# Bots one room may hold (whoever adds them)
+MAX_BOTS_PER_ROOM = int(os.environ.get("MAX_BOTS_PER_ROOM", 8))
+# Words considered per playable card
+CANDIDATES_PER_CARD = 8
+
+# ドロー2/ドロー3が発動する文字数
+DRAW_CARD_LENGTHS = {"draw2": 7, "draw3": 10}
+
+
+def is_bot(player_id: str) -> bool:
+    return player_id.startswith(BOT_ID_PREFIX)
+
+
+def bot_count(game: WordBasketGame) -> int:
+    return sum(1 for player_id in game.players if is_bot(player_id))
+
+
+def new_bot_id() -> str:
+    return BOT_ID_PREFIX + uuid.uuid4().hex[:12]
+
+
+def bot_name(game: WordBasketGame) -> str:
+    taken = {p.name for p in game.players.values()}
+    n = 1
+    while f"ボット{n}" in taken:
+        n += 1
+    return f"ボット{n}"
+
+
+class BotPlayer:
+    """
+    Server-side player. choose_action() looks at the room and returns the next WebSocket-style action
+    for this bot ({"action": "play_word", ...}) or None when there is nothing to do.
+
+    Words come from the shared WordIndex and cards are picked with the same matching as
+    auto_select_card (play_word is sent with card_index -1); the PlayabilityOracle answers
+    "can this hand move at all" before any word is looked at. A decision is a handful of dict lookups.
+    """
+
+    def __init__(self, player_id: str, think_time: float = BOT_THINK_TIME, seed: Optional[int] = None):
+        self.player_id = player_id
+        self.think_time = min(max(think_time, MIN_THINK_TIME), MAX_THINK_TIME)
+        self.rng = random.Random(seed)
+
+    def think_delay(self) -> float:
+        return self.think_time * self.rng.uniform(0.5, 1.0)
+
+    def choose_action(self, game: WordBasketGame) -> Optional[dict]:
+        player = game.players.get(self.player_id)
+        if player is None:
+            return None
+        if game.status == "waiting":
+            # Only a bot hosting a room of bots starts it (people start their own games)
+            if player.is_host and len(game.players) >= 2 and all(is_bot(pid) for pid in game.players):
+                return {"action": "start_game"}
+            return None
+        if game.status == "finished":
+            if self.player_id not in getattr(game, "rematch_votes", ()):
+                return {"action": "rematch"}
+            return None
+        if game.status == "finishing_check":
+            return self._vote(game)
+        if game.status == "playing" and player.rank is None and player.hand:
+            return self._play(game, player)
+        return None
+
+    def _vote(self, game: WordBasketGame) -> Optional[dict]:
+        move = game.last_move
+        if move is None or move.player_id == self.player_id:
+            return None
+        if self.player_id in game.approval_votes or self.player_id in game.opposition_votes:
+            return None
+        # 辞書にある単語なら承諾、ない単語なら拒否
+        if game.dictionary.contains_reading(game.current_word):
+            return {"action": "approve"}
+        return {"action": "oppose", "move_id": move.move_id}
+
+    def _play(self, game: WordBasketGame, player: Player) -> Optional[dict]:
+        pending = player.pending_special_card
+        if pending is not None and pending.card_type == "select_swap":
+            target = self._smallest_opponent(game, player)
+            if target is None:
+                return {"action": "cancel_pending_special_card"}
+            return {"action": "execute_select_swap", "target_player_id": target.player_id}
+
+        target_char = game.get_target_char()
+        min_length = game.get_min_word_length(player)
+        words = self._candidates(game, player, target_char, min_length)
+        if words:
+            draw_card = self._special_index(player, "draw3", "draw2")
+            if draw_card is not None and (pending is None or pending.card_type not in DRAW_CARD_LENGTHS):
+                needed = DRAW_CARD_LENGTHS[player.special_cards[draw_card].card_type]
+                if self._has_opponents(game, player) and any(len(w) >= needed for w in words):
+                    return {"action": "set_special_card_pending", "card_index": draw_card}
+            if pending is not None and pending.card_type in DRAW_CARD_LENGTHS:
+                word = max(words, key=len)
+            else:
+                word = self.rng.choice(words)
+            return {"action": "play_word", "word": word, "card_index": -1}
+        return self._unstick(game, player, target_char, min_length)
+
+    def _candidates(self, game: WordBasketGame, player: Player, target_char: str, min_length: int) -> List[str]:
+        """A few words per card the oracle says is playable (never the word on the table)."""
+        index = game.dictionary.index
+        words = []
+        for card_index in game.dictionary.oracle.playable_cards(target_char, player.hand, min_length):
+            found = 0
+            for word in index.words_for_card(target_char, player.hand[card_index], min_length):
+                if word != game.current_word:
+                    words.append(word)
+                    found += 1
+                    if found == CANDIDATES_PER_CARD:
+                        break
+        return words
+
+    def _unstick(self, game: WordBasketGame, player: Player, target_char: str, min_length: int) -> dict:
+        """No word fits: try a special card, otherwise exchange the hand."""
+        pending = player.pending_special_card
+        if pending is None:
+            dual_word = self._special_index(player, "dual_word")
+            if dual_word is not None and min_length > 2 and game.dictionary.oracle.can_move(target_char, player.hand, 2):
+                return {"action": "set_special_card_pending", "card_index": dual_word}
+            select_swap = self._special_index(player, "select_swap")
+            if select_swap is not None and self._smallest_opponent(game, player) is not None:
+                return {"action": "set_special_card_pending", "card_index": select_swap}
+            rotate_swap = self._special_index(player, "rotate_swap")
+            if rotate_swap is not None and len(self._rotated_hand(game)) < len(player.hand):
+                return {"action": "set_special_card_pending", "card_index": rotate_swap}
+            no_penalty = self._special_index(player, "no_penalty")
+            if no_penalty is not None:
+                return {"action": "set_special_card_pending", "card_index": no_penalty}
+        return {"action": "reroll", "card_index": self._exchange_card(game, player)}
+
+    def _exchange_card(self, game: WordBasketGame, player: Player) -> int:
+        """The char card whose kana starts the most words (it becomes the next start character)."""
+        index = game.dictionary.index
+        best, best_count = 0, -1
+        for card_index, card in enumerate(player.hand):
+            if card.type == "char":
+                count = sum(index.count_with_length(card.value, bucket) for bucket in LENGTH_BUCKETS if bucket >= 3)
+                if count > best_count:
+                    best, best_count = card_index, count
+        return best
+
+    @staticmethod
+    def _special_index(player: Player, *card_types: str) -> Optional[int]:
+        for card_type in card_types:
+            for i, card in enumerate(player.special_cards):
+                if card.card_type == card_type:
+                    return i
+        return None
+
+    @staticmethod
+    def _has_opponents(game: WordBasketGame, player: Player) -> bool:
+        return any(p is not player and p.rank is None for p in game.players.values())
+
+    @staticmethod
+    def _smallest_opponent(game: WordBasketGame, player: Player) -> Optional[Player]:
+        """The active opponent with the fewest cards, if they have fewer than this player."""
+        best = None
+        for p in game.players.values():
+            if p is not player and p.rank is None and len(p.hand) < len(player.hand):
+                if best is None or len(p.hand) < len(best.hand):
+                    best = p
+        return best
+
+    def _rotated_hand(self, game: WordBasketGame) -> list:
+        # Same order as _execute_rotate_swap: each player receives the previous player's hand
+        player_ids = sorted(game.players)
+        return game.players[player_ids[player_ids.index(self.player_id) - 1]].hand
@@ -0,0 +1,145 @@
+import random
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+# Card ids fit in an unsigned short (the registry holds a few dozen distinct cards)
+ID_TYPECODE = "H"
+
+
+class CardPile:
+    """
+    A pile of cards stored as integer card ids in an array.
+    The top of the pile is the end of the array, so draw/push are O(1), removing a card
+    at a known position is an O(1) swap-remove, and merging cards in shuffled is
+    O(number of cards added) (inside-out Fisher–Yates).
+
+    `cards` maps an id back to its card object (the Card registry); `rng` is the room's RNG.
+    """
+    __slots__ = ("_ids", "_cards", "rng")
+
+    def __init__(self, cards: Sequence, items: Iterable = (), rng: random.Random = None):
+        self._cards = cards
+        self._ids = array(ID_TYPECODE, (card.id for card in items))
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def from_ids(cls, cards: Sequence, ids: array, rng: random.Random = None) -> "CardPile":
+        pile = cls(cards, rng=rng)
+        pile._ids = array(ID_TYPECODE, ids)
+        return pile
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    def __iter__(self) -> Iterator:
+        cards = self._cards
+        return (cards[i] for i in self._ids)
+
+    def __getitem__(self, position: int):
+        return self._cards[self._ids[position]]
+
+    @property
+    def ids(self) -> array:
+        return self._ids
+
+    def top(self):
+        return self._cards[self._ids[-1]] if self._ids else None
+
+    def push(self, card):
+        self._ids.append(card.id)
+
+    # list-compatible names
+    append = push
+
+    def extend(self, cards: Iterable):
+        self._ids.extend(card.id for card in cards)
+
+    def draw(self):
+        """Take the top card (O(1))."""
+        return self._cards[self._ids.pop()]
+
+    pop = draw
+
+    def draw_many(self, count: int) -> List:
+        """Take up to count cards from the top, topmost first."""
+        count = min(count, len(self._ids))
+        if count <= 0:
+            return []
+        ids = self._ids
+        taken = ids[len(ids) - count:]
+        del ids[len(ids) - count:]
+        cards = self._cards
+        return [cards[i] for i in reversed(taken)]
+
+    def remove_at(self, position: int):
+        """Swap-remove: the top card moves into the hole (order is not preserved)."""
+        ids = self._ids
+        card_id = ids[position]
+        last = ids.pop()
+        if position < len(ids):
+            ids[position] = last
+        return self._cards[card_id]
+
+    def remove_topmost(self, card) -> bool:
+        """Remove the copy of card nearest the top, keeping the order of the rest. Returns False if absent."""
+        ids = self._ids
+        for position in range(len(ids) - 1, -1, -1):
+            if ids[position] == card.id:
+                del ids[position]
+                return True
+        return False
+
+    def take_random(self, predicate: Callable[[object], bool], max_tries: int = 32) -> Optional[object]:
+        """
+        Remove and return a uniformly random card matching predicate.
+        Rejection sampling (usually a couple of tries); falls back to a scan when matches are rare.
+        """
+        ids, cards, rng = self._ids, self._cards, self.rng
+        if not ids:
+            return None
+        random_ = rng.random
+        for _ in range(max_tries):
+            position = int(random_() * len(ids))
+            if predicate(cards[ids[position]]):
+                return self.remove_at(position)
+        matches = [pos for pos, card_id in enumerate(ids) if predicate(cards[card_id])]
+        if not matches:
+            return None
+        return self.remove_at(rng.choice(matches))
+
+    def shuffle(self):
+        """Full Fisher–Yates shuffle (done on a list: shuffling the array directly boxes every swap)."""
+        ids = self._ids.tolist()
+        self.rng.shuffle(ids)
+        self._ids = array(ID_TYPECODE, ids)
+
+    def add_shuffled(self, card_ids: Sequence[int]):
+        """
+        Insert each card at a uniformly random position (inside-out Fisher–Yates).
+        If the pile is already shuffled the result is a uniform shuffle, and only the added
+        cards cost any work. When more cards are added than the pile holds, a full shuffle is cheaper.
+        """
+        if len(card_ids) > len(self._ids):
+            self._ids.extend(card_ids)
+            self.shuffle()
+            return
+        ids, random_ = self._ids, self.rng.random
+        for card_id in card_ids:
+            ids.append(card_id)
+            j = int(random_() * len(ids))
+            ids[-1], ids[j] = ids[j], ids[-1]
+
+    def clear(self):
+        del self._ids[:]
+
+    def shuffle_into(self, other: "CardPile", keep_top: bool = True):
+        """Move this pile's cards into other at random positions, optionally keeping the top card here."""
+        ids = self._ids
+        top = ids.pop() if keep_top and ids else None
+        other.add_shuffled(ids)
+        del ids[:]
+        if top is not None:
+            ids.append(top)
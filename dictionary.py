@@ -0,0 +1,379 @@
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from itertools import islice
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+from kana import kana
+
+DEFAULT_DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "words.json")
+
+# Length buckets: 2, 3, 4, 5, 6, 7+ (7 matches the "7文字以上" length card)
+MIN_LENGTH_BUCKET = 2
+MAX_LENGTH_BUCKET = 7
+LENGTH_BUCKETS = tuple(range(MIN_LENGTH_BUCKET, MAX_LENGTH_BUCKET + 1))
+
+# Hint words returned per card, and how many hint lists each dictionary keeps
+HINT_WORDS_PER_CARD = 3
+HINT_CACHE_SIZE = int(os.environ.get("HINT_CACHE_SIZE", 4096))
+
+# Fallback dictionary
+DUMMY_WORDS = frozenset({
+    "りんご", "ゴリラ", "ラッパ", "パンツ", "積み木", "キツネ", "ネコ", "コマ", "マント",
+    "トマト", "トランプ", "プリン", "リボン", "スイカ", "カラス", "スズメ", "メダカ",
+    "カメラ", "ラクダ", "ダチョウ", "ウシ", "シマウマ", "マクラ", "ラッコ", "コアラ",
+    "ライオン", "ンゴロンゴロ", "ロバ", "バイク", "クルマ", "マイク", "クスリ", "リス",
+    "スイミング", "グミ", "ミカン", "ンジャメナ", "ナシ", "シカ", "カバ", "バナナ",
+    "ナマケモノ", "ノリ", "リクガメ", "メロン", "ン", "ルビー", "ビール",
+    "イヌ", "ヌマ", "マリモ", "モチ", "チクワ", "ワニ", "ニワトリ", "トリ", "リスマーク",
+    "クライミング", "グライダー", "ダンプカー", "カーテン", "テント", "トンネル", "ルンバ",
+    "バスケット", "トースト", "トマトソース", "ステーキ", "キリン", "リンゴジュース",
+    "スイス", "スタンプ", "プラモデル", "ビーズ", "ズボン",
+    "アイロン", "ロケット", "トケイ", "イカ", "カニ", "ニジ", "ジドウシャ", "ヤカン",
+})
+
+
+def length_bucket(length: int) -> Optional[int]:
+    if length < MIN_LENGTH_BUCKET:
+        return None
+    return min(length, MAX_LENGTH_BUCKET)
+
+def is_playable_reading(word: str) -> bool:
+    """Same character rules as check_move (kana only, no trailing ん / ーー)."""
+    if len(word) < MIN_LENGTH_BUCKET:
+        return False
+    for char in word:
+        if not (('\u3041' <= char <= '\u3096') or ('\u30A1' <= char <= '\u30F4') or char == '\u30FC'):
+            return False
+    return not (word.endswith("ん") or word.endswith("ーー"))
+
+
+IndexKey = Tuple[str, str, int]
+
+
+class WordIndex:
+    """
+    Words grouped by (normalized start kana, normalized effective end kana, length bucket).
+    Counts for card queries are precomputed so they are constant-time lookups.
+    """
+
+    def __init__(self, words):
+        groups: Dict[IndexKey, list] = defaultdict(list)
+        for word in words:
+            if not is_playable_reading(word):
+                continue
+            start = kana.normalize_char(word[0])
+            end = kana.end_key(word)
+            groups[(start, end, length_bucket(len(word)))].append(word)
+
+        self._words: Dict[IndexKey, Tuple[str, ...]] = {key: tuple(sorted(ws)) for key, ws in groups.items()}
+        self.size = sum(len(ws) for ws in self._words.values())
+
+        # (start, end, min_bucket) -> number of words with bucket >= min_bucket
+        self._at_least: Dict[IndexKey, int] = defaultdict(int)
+        # (start, bucket) -> words of that length bucket, any end
+        by_length: Dict[Tuple[str, int], list] = defaultdict(list)
+        for (start, end, bucket), ws in self._words.items():
+            by_length[(start, bucket)].extend(ws)
+            for b in LENGTH_BUCKETS:
+                if bucket >= b:
+                    self._at_least[(start, end, b)] += len(ws)
+        self._at_least = dict(self._at_least)
+        self._by_length: Dict[Tuple[str, int], Tuple[str, ...]] = {key: tuple(sorted(ws)) for key, ws in by_length.items()}
+
+    def words(self, start: str, end: str, bucket: int) -> Tuple[str, ...]:
+        return self._words.get((start, end, bucket), ())
+
+    def count(self, start: str, end: str, bucket: int) -> int:
+        return len(self._words.get((start, end, bucket), ()))
+
+    def count_at_least(self, start: str, end: str, min_length: int) -> int:
+        """Words from start to end with at least min_length characters."""
+        return self._at_least.get((start, end, max(min_length, MIN_LENGTH_BUCKET)), 0)
+
+    def count_with_length(self, start: str, bucket: int) -> int:
+        return len(self._by_length.get((start, bucket), ()))
+
+    def count_for_card(self, start: str, card, min_length: int = 3) -> int:
+        """Number of valid words starting with start that the card would accept."""
+        start = kana.normalize_char(start)
+        if card.type == "char":
+            return self.count_at_least(start, kana.normalize_char(card.value), min_length)
+        if card.type == "row":
+            return sum(self.count_at_least(start, end, min_length) for end in card.value)
+        if card.type == "length":
+            bucket = int(card.value)
+            if bucket < min_length:
+                return 0
+            return self.count_with_length(start, bucket)
+        return 0
+
+    def words_for_card(self, start: str, card, min_length: int = 3) -> Iterator[str]:
+        """Valid words starting with start that the card would accept."""
+        start = kana.normalize_char(start)
+        if card.type == "length":
+            bucket = int(card.value)
+            if bucket >= min_length:
+                yield from self._by_length.get((start, bucket), ())
+            return
+
+        if card.type == "char":
+            ends = (kana.normalize_char(card.value),)
+        elif card.type == "row":
+            ends = card.value
+        else:
+            return
+        for end in ends:
+            for bucket in LENGTH_BUCKETS:
+                if bucket >= min_length:
+                    yield from self._words.get((start, end, bucket), ())
+
+
+class PlayabilityOracle:
+    """
+    "Can this hand move at all?" from precomputed bitsets.
+    For each (start, min_length): a bitmask of end kana and a bitmask of length buckets
+    that have at least one valid word. Card masks are cached per card kind.
+    """
+
+    def __init__(self, index: WordIndex):
+        ends = sorted({end for (_start, end, _bucket) in index._words})
+        starts = sorted({start for (start, _end, _bucket) in index._words})
+        self._end_bits: Dict[str, int] = {end: 1 << i for i, end in enumerate(ends)}
+        self._card_masks: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+        # (start, min_length) -> (end_mask, length_mask)
+        self._table: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        for start in starts:
+            for min_length in LENGTH_BUCKETS:
+                end_mask = 0
+                for end, bit in self._end_bits.items():
+                    if index.count_at_least(start, end, min_length):
+                        end_mask |= bit
+                length_mask = 0
+                for bucket in LENGTH_BUCKETS:
+                    if bucket >= min_length and index.count_with_length(start, bucket):
+                        length_mask |= 1 << bucket
+                self._table[(start, min_length)] = (end_mask, length_mask)
+
+    def card_mask(self, card) -> Tuple[int, int]:
+        key = (card.type, card.value)
+        mask = self._card_masks.get(key)
+        if mask is None:
+            if card.type == "char":
+                mask = (self._end_bits.get(kana.normalize_char(card.value), 0), 0)
+            elif card.type == "row":
+                end_mask = 0
+                for char in card.value:
+                    end_mask |= self._end_bits.get(char, 0)
+                mask = (end_mask, 0)
+            elif card.type == "length":
+                mask = (0, 1 << int(card.value))
+            else:
+                mask = (0, 0)
+            self._card_masks[key] = mask
+        return mask
+
+    def _masks(self, start: str, min_length: int) -> Tuple[int, int]:
+        min_length = min(max(min_length, MIN_LENGTH_BUCKET), MAX_LENGTH_BUCKET)
+        return self._table.get((kana.normalize_char(start), min_length), (0, 0))
+
+    def can_play_card(self, start: str, card, min_length: int = 3) -> bool:
+        end_mask, length_mask = self._masks(start, min_length)
+        card_end_mask, card_length_mask = self.card_mask(card)
+        return bool((end_mask & card_end_mask) or (length_mask & card_length_mask))
+
+    def playable_cards(self, start: str, hand, min_length: int = 3) -> List[int]:
+        """Indices of the cards in hand that at least one dictionary word satisfies."""
+        end_mask, length_mask = self._masks(start, min_length)
+        playable = []
+        for idx, card in enumerate(hand):
+            card_end_mask, card_length_mask = self.card_mask(card)
+            if (end_mask & card_end_mask) or (length_mask & card_length_mask):
+                playable.append(idx)
+        return playable
+
+    def can_move(self, start: str, hand, min_length: int = 3) -> bool:
+        end_mask, length_mask = self._masks(start, min_length)
+        for card in hand:
+            card_end_mask, card_length_mask = self.card_mask(card)
+            if (end_mask & card_end_mask) or (length_mask & card_length_mask):
+                return True
+        return False
+
+
+HintKey = Tuple[str, Tuple[int, ...], int]
+
+
+class HintCache:
+    """
+    Bounded LRU of hint words: (start kana, hand signature, min length) -> {card id: words}.
+    The hand signature is the sorted set of card ids, so the order of the hand and duplicate
+    cards don't matter. One more word than HINT_WORDS_PER_CARD is kept so the caller can still
+    return enough after dropping the word on the table.
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self, index: WordIndex, oracle: PlayabilityOracle, maxsize: int = HINT_CACHE_SIZE,
+                 words_per_card: int = HINT_WORDS_PER_CARD):
+        self.index = index
+        self.oracle = oracle
+        self.maxsize = maxsize
+        self.words_per_card = words_per_card
+        self._entries: Dict[HintKey, Dict[int, Tuple[str, ...]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, start: str, hand, min_length: int) -> Dict[int, Tuple[str, ...]]:
+        """Words per card id for the playable cards of hand (cards nothing fits are left out)."""
+        start = kana.normalize_char(start)
+        cards = {card.id: card for card in hand}
+        key = (start, tuple(sorted(cards)), min_length)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        unique = list(cards.values())
+        entry = {}
+        for i in self.oracle.playable_cards(start, unique, min_length):
+            card = unique[i]
+            entry[card.id] = tuple(islice(self.index.words_for_card(start, card, min_length), self.words_per_card + 1))
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+
+class WordDictionary:
+    """読み込み済みの辞書（イミュータブル、全ルームで共有）"""
+    __slots__ = ("path", "words", "readings", "_index", "_oracle", "_hints")
+
+    def __init__(self, path: Optional[str], words: FrozenSet[str]):
+        object.__setattr__(self, "path", path)
+        object.__setattr__(self, "words", words)
+        # Readings folded to hiragana, for strict-mode lookups
+        object.__setattr__(self, "readings", frozenset(kana.to_hiragana(w) for w in words))
+        object.__setattr__(self, "_index", None)
+        object.__setattr__(self, "_oracle", None)
+        object.__setattr__(self, "_hints", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WordDictionary is immutable")
+
+    @property
+    def index(self) -> WordIndex:
+        # Built on first use; building twice under a race is harmless
+        if self._index is None:
+            object.__setattr__(self, "_index", WordIndex(self.words))
+        return self._index
+
+    @property
+    def oracle(self) -> PlayabilityOracle:
+        if self._oracle is None:
+            object.__setattr__(self, "_oracle", PlayabilityOracle(self.index))
+        return self._oracle
+
+    @property
+    def hints(self) -> HintCache:
+        if self._hints is None:
+            object.__setattr__(self, "_hints", HintCache(self.index, self.oracle))
+        return self._hints
+
+    def contains_reading(self, word: str) -> bool:
+        """Katakana input matches hiragana entries (and vice versa)."""
+        return kana.to_hiragana(word) in self.readings
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word) -> bool:
+        return word in self.words
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+
+def load_words(path: str) -> FrozenSet[str]:
+    """Parse a words.json file. Falls back to the dummy dictionary on any error."""
+    if not os.path.exists(path):
+        return DUMMY_WORDS
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            words = json.load(f)
+    except Exception as e:
+        print(f"Error loading dictionary: {e}")
+        return DUMMY_WORDS
+
+    if not isinstance(words, list):
+        return DUMMY_WORDS
+    if words and isinstance(words[0], dict):
+        return frozenset(w.get('kana', w.get('reading', '')) for w in words)
+    return frozenset(words)
+
+
+class DictionaryRegistry:
+    """Process-wide cache of parsed dictionaries: each file is read once and shared by every room."""
+
+    def __init__(self):
+        self._dictionaries: Dict[str, WordDictionary] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, path: str = None) -> WordDictionary:
+        if path is None:
+            path = DEFAULT_DICTIONARY_PATH
+        key = os.path.abspath(path)
+        dictionary = self._dictionaries.get(key)
+        if dictionary is not None:
+            return dictionary
+
+        with self._lock:
+            # Another thread may have loaded it while we waited
+            dictionary = self._dictionaries.get(key)
+            if dictionary is None:
+                dictionary = WordDictionary(key, load_words(key))
+                self._dictionaries[key] = dictionary
+                self.loads += 1
+        return dictionary
+
+    def hint_stats(self) -> dict:
+        """HintCache stats summed over the loaded dictionaries."""
+        totals = {"size": 0, "maxsize": 0, "hits": 0, "misses": 0, "evictions": 0}
+        for dictionary in list(self._dictionaries.values()):
+            if dictionary._hints is not None:
+                for key, value in dictionary._hints.stats().items():
+                    if key in totals:
+                        totals[key] += value
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_rate"] = totals["hits"] / lookups if lookups else 0.0
+        return totals
+
+    def preload(self, path: str = None) -> WordDictionary:
+        """Load a dictionary ahead of time (called at app startup)."""
+        return self.get(path)
+
+    def clear(self):
+        with self._lock:
+            self._dictionaries.clear()
+
+
+dictionary_registry = DictionaryRegistry()
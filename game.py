@@ -1,24 +1,113 @@
-import random
+import functools
+import inspect
 import json
-import os
+from array import array
+import random
+import time
 import uuid
-from typing import List, Optional, Set, Dict
+from typing import Callable, List, Optional, Set, Dict
+from dictionary import dictionary_registry, WordDictionary, DUMMY_WORDS, MAX_LENGTH_BUCKET, HINT_WORDS_PER_CARD
+from kana import kana
+from room_codes import RoomCodeAllocator
+from deck import CardPile
+from move_history import Move, MoveHistory
+from room_store import RoomStore, InMemoryRoomStore
 
 class Card:
-    def __init__(self, type: str, value: str, display: str):
-        self.type = type  # "char", "row", "length"
-        self.value = value
-        self.display = display
+    """
+    山札のカード（イミュータブル）。
+    Interned: Card(type, value, display) always returns the same instance for the same card,
+    so every deck in every room shares one object per distinct card. Each card gets a small
+    integer id, and its dict/JSON forms are built once.
+    """
+    __slots__ = ("type", "value", "display", "id", "_dict", "_json")
+
+    _interned: Dict[tuple, "Card"] = {}
+    _by_id: List["Card"] = []
+
+    def __new__(cls, type: str, value: str, display: str):
+        key = (type, value, display)
+        card = cls._interned.get(key)
+        if card is None:
+            card = object.__new__(cls)
+            object.__setattr__(card, "type", type)  # "char", "row", "length"
+            object.__setattr__(card, "value", value)
+            object.__setattr__(card, "display", display)
+            object.__setattr__(card, "id", len(cls._by_id))
+            object.__setattr__(card, "_dict", {"type": type, "value": value, "display": display})
+            object.__setattr__(card, "_json", json.dumps(card._dict, ensure_ascii=False))
+            card = cls._interned.setdefault(key, card)
+            if card.id == len(cls._by_id):
+                cls._by_id.append(card)
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        # Unpickling goes back through the registry
+        return (Card, (self.type, self.value, self.display))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"Card({self.type!r}, {self.value!r}, {self.display!r})"
+
+    @classmethod
+    def from_id(cls, card_id: int) -> "Card":
+        return cls._by_id[card_id]
+
+    def to_dict(self) -> dict:
+        """Shared dict: callers must not mutate it."""
+        return self._dict
+
+    def to_json(self) -> str:
+        return self._json
+
+
+def _build_standard_deck() -> tuple:
+    deck = []
+    # Hiragana cards
+    hiragana = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ"
+    for char in hiragana:
+        deck.append(Card("char", char, char))
+
+    # Add extra "わ" card (2x total)
+    deck.append(Card("char", "わ", "わ"))
+
+    # Row cards (わ行 removed for balance)
+    rows = [
+        ("あ行", "あいうえお"), ("か行", "かきくけこ"), ("さ行", "さしすせそ"),
+        ("た行", "たちつてと"), ("な行", "なにぬねの"), ("は行", "はひふへほ"),
+        ("ま行", "まみむめも"), ("や行", "やゆよ"), ("ら行", "らりるれろ")
+    ]
+    for name, chars in rows:
+        deck.append(Card("row", chars, name))
+
+    # Length cards (2 of each for 60 card total)
+    lengths = [5, 6, MAX_LENGTH_BUCKET]
+    for l in lengths:
+        display = f"{l}文字" if l < MAX_LENGTH_BUCKET else f"{MAX_LENGTH_BUCKET}文字以上"
+        val = str(l)
+        for _ in range(2):  # Changed from 3 to 2
+            deck.append(Card("length", val, display))
+    return tuple(deck)
+
+
+# 標準の山札（60枚）。ルームごとにカードを生成せず、このタプルをコピーして使う
+STANDARD_DECK = _build_standard_deck()
+STANDARD_DECK_IDS = array("H", (card.id for card in STANDARD_DECK))
 
-    def to_dict(self):
-        return {
-            "type": self.type,
-            "value": self.value,
-            "display": self.display
-        }
 
 class SpecialCard:
     """特殊カードクラス"""
+    # Not interned: is_pending is per-instance state and cards are compared by identity
+    __slots__ = ("card_type", "name", "description", "is_pending")
+
     def __init__(self, card_type: str, name: str, description: str):
         self.card_type = card_type  # "draw2", "draw3", "dual_word", "no_penalty", "rotate_swap", "select_swap"
         self.name = name
@@ -34,6 +123,9 @@ class SpecialCard:
         }
 
 class Player:
+    __slots__ = ("player_id", "name", "hand", "is_host", "card_priority", "rank",
+                 "special_cards", "pending_special_card")
+
     def __init__(self, player_id: str, name: str, is_host: bool = False):
         self.player_id = player_id
         self.name = name
@@ -56,24 +148,71 @@ class Player:
             "pending_special_card": self.pending_special_card.to_dict() if self.pending_special_card else None
         }
 
+# Moves kept for opposition/undo per room
+MOVE_HISTORY_SIZE = 32
+
+# Methods that change a room's state; their calls are journaled for crash recovery (room_log.py)
+JOURNALED_METHODS: Set[str] = set()
+
+def journaled(method):
+    """
+    Record each outermost call of a state-changing method in game.journal (if set) before running it.
+    Calls made from inside another journaled method are not recorded: replaying the outer call repeats them.
+    While the room is traced (game.tracer set), every call is also timed as a span.
+    """
+    JOURNALED_METHODS.add(method.__name__)
+    signature = inspect.signature(method)
+    span_name = f"game.{method.__name__}"
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        journal = self.journal
+        tracer = self.tracer
+        if journal is None and tracer is None:
+            return method(self, *args, **kwargs)
+        if journal is not None:
+            if kwargs:
+                # Records hold positional arguments only
+                args, kwargs = signature.bind(self, *args, **kwargs).args[1:], {}
+            journal(method.__name__, args)
+            self.journal = None
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if tracer is not None:
+                tracer.add(span_name, start)
+            if journal is not None:
+                self.journal = journal
+    return wrapper
+
 class WordBasketGame:
-    def __init__(self, room_code: str, dictionary_path: str = None):
+    # Callable(op, args) that records state-changing calls (set by GameManager when a RoomLog is enabled)
+    journal: Optional[Callable[[str, tuple], None]] = None
+    # tracing.RoomTracer timing the journaled methods (set by the room actor while the room is traced)
+    tracer = None
+
+    def __init__(self, room_code: str, dictionary_path: str = None, seed: Optional[int] = None):
         self.room_code = room_code
-        self.deck: List[Card] = []
-        self.discard_pile: List[Card] = []  # 場の札
+        # ルームごとの乱数（seedを指定すると山札・特殊カードの順番が再現できる）
+        self.rng = random.Random(seed)
+        self.deck = CardPile(Card._by_id, rng=self.rng)
+        self.discard_pile = CardPile(Card._by_id, rng=self.rng)  # 場の札
         self.players: Dict[str, Player] = {}
         self.current_word: str = ""
-        self.dictionary: Set[str] = set()
+        self.dictionary: WordDictionary = None
         self.status: str = "waiting" # waiting, playing, finished, finishing_check
         self.finished_players: List[Player] = []
         self.opposition_votes: Set[str] = set()
         self.approval_votes: Set[str] = set()  # For game end approval
-        self.pending_revert_state: Optional[dict] = None
+        # 直近の手の履歴（拒否・取り消し用、固定長）
+        self.history = MoveHistory(MOVE_HISTORY_SIZE)
         
         # 特殊カード関連
         self.special_deck: List[SpecialCard] = []
         self.game_settings: Dict = {
             "initial_hand_size": 7,
+            "strict_dictionary": False,  # 辞書にない単語を自動で却下
             "num_special_cards_per_player": 2,
             "special_cards_enabled": {
                 "draw2": 3,
@@ -85,77 +224,40 @@ class WordBasketGame:
             }
         }
 
-        
-        if dictionary_path is None:
-            dictionary_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "words.json")
-            
         self.load_dictionary(dictionary_path)
         self.initialize_deck()
 
-    def load_dictionary(self, path: str):
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    words = json.load(f)
-                    if isinstance(words, list):
-                        if words and isinstance(words[0], dict):
-                             self.dictionary = {w.get('kana', w.get('reading', '')) for w in words}
-                        else:
-                            self.dictionary = set(words)
-            except Exception as e:
-                print(f"Error loading dictionary: {e}")
-                self.use_dummy_dictionary()
-        else:
+    def __getstate__(self):
+        # For external room stores: the shared dictionary is referenced by path, piles as raw card ids
+        state = self.__dict__.copy()
+        state.pop("journal", None)
+        state.pop("tracer", None)
+        state["dictionary"] = self.dictionary.path if self.dictionary is not None else None
+        state["deck"] = self.deck.ids
+        state["discard_pile"] = self.discard_pile.ids
+        return state
+
+    def __setstate__(self, state):
+        dictionary_path = state.pop("dictionary")
+        self.__dict__.update(state)
+        self.deck = CardPile.from_ids(Card._by_id, state["deck"], rng=self.rng)
+        self.discard_pile = CardPile.from_ids(Card._by_id, state["discard_pile"], rng=self.rng)
+        if dictionary_path is None:
             self.use_dummy_dictionary()
+        else:
+            self.load_dictionary(dictionary_path)
+
+    def load_dictionary(self, path: str = None):
+        # 辞書はプロセス全体で共有（ルームごとに読み込み直さない）
+        self.dictionary = dictionary_registry.get(path)
 
     def use_dummy_dictionary(self):
         # Fallback dictionary
-        self.dictionary = {
-            "りんご", "ゴリラ", "ラッパ", "パンツ", "積み木", "キツネ", "ネコ", "コマ", "マント",
-            "トマト", "トランプ", "プリン", "リボン", "スイカ", "カラス", "スズメ", "メダカ",
-            "カメラ", "ラクダ", "ダチョウ", "ウシ", "シマウマ", "マクラ", "ラッコ", "コアラ",
-            "ライオン", "ンゴロンゴロ", "ロバ", "バイク", "クルマ", "マイク", "クスリ", "リス",
-            "スイミング", "グミ", "ミカン", "ンジャメナ", "ナシ", "シカ", "カバ", "バナナ",
-            "ナマケモノ", "ノリ", "リクガメ", "メロン", "ン", "ルビー", "ビール", "ルビー",
-            "イヌ", "ヌマ", "マリモ", "モチ", "チクワ", "ワニ", "ニワトリ", "トリ", "リスマーク",
-            "クライミング", "グライダー", "ダンプカー", "カーテン", "テント", "トンネル", "ルンバ",
-            "バスケット", "トースト", "トマトソース", "ステーキ", "キリン", "リンゴジュース",
-            "スイス", "スタンプ", "プラモデル", "ルビー", "ビーズ", "ズボン", "ン",
-            "アイロン", "ロケット", "トケイ", "イカ", "カニ", "ニジ", "ジドウシャ", "ヤカン",
-            "ン", "ルビー", "ビール", "ルビー", "イヌ", "ヌマ", "マリモ", "モチ", "チクワ",
-            "ワニ", "ニワトリ", "トリ", "リスマーク", "クライミング", "グライダー", "ダンプカー",
-            "カーテン", "テント", "トンネル", "ルンバ", "バスケット", "トースト", "トマトソース",
-            "ステーキ", "キリン", "リンゴジュース", "スイス", "スタンプ", "プラモデル", "ルビー",
-            "ビーズ", "ズボン", "ン", "アイロン", "ロケット", "トケイ", "イカ", "カニ", "ニジ",
-            "ジドウシャ", "ヤカン"
-        }
+        self.dictionary = WordDictionary(None, DUMMY_WORDS)
 
     def initialize_deck(self):
-        self.deck = []
-        # Hiragana cards
-        hiragana = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ"
-        for char in hiragana:
-            self.deck.append(Card("char", char, char))
-        
-        # Add extra "わ" card (2x total)
-        self.deck.append(Card("char", "わ", "わ"))
-        
-        # Row cards (わ行 removed for balance)
-        rows = [
-            ("あ行", "あいうえお"), ("か行", "かきくけこ"), ("さ行", "さしすせそ"),
-            ("た行", "たちつてと"), ("な行", "なにぬねの"), ("は行", "はひふへほ"),
-            ("ま行", "まみむめも"), ("や行", "やゆよ"), ("ら行", "らりるれろ")
-        ]
-        for name, chars in rows:
-            self.deck.append(Card("row", chars, name))
-
-        # Length cards (2 of each for 60 card total)
-        lengths = [5, 6, 7]
-        for l in lengths:
-            display = f"{l}文字" if l < 7 else "7文字以上"
-            val = str(l)
-            for _ in range(2):  # Changed from 3 to 2
-                self.deck.append(Card("length", val, display))
+        # カードは共有インスタンスなので、リストのコピーだけで済む
+        self.deck = CardPile.from_ids(Card._by_id, STANDARD_DECK_IDS, rng=self.rng)
 
     def initialize_special_deck(self):
         """特殊カード専用の山札（裏山札）を初期化"""
@@ -180,16 +282,18 @@ class WordBasketGame:
                     self.special_deck.append(SpecialCard(card_type, name, description))
         
         # シャッフル
-        random.shuffle(self.special_deck)
+        self.rng.shuffle(self.special_deck)
 
 
 
+    @journaled
     def add_player(self, player_id: str, name: str) -> Player:
         is_host = len(self.players) == 0
         player = Player(player_id, name, is_host)
         self.players[player_id] = player
         return player
 
+    @journaled
     def remove_player(self, player_id: str):
         if player_id in self.players:
             del self.players[player_id]
@@ -198,9 +302,10 @@ class WordBasketGame:
                 first_player_id = next(iter(self.players))
                 self.players[first_player_id].is_host = True
 
+    @journaled
     def start_game(self):
         self.initialize_deck()
-        random.shuffle(self.deck)
+        self.deck.shuffle()
         
         # 特殊カードを初期化
         self.initialize_special_deck()
@@ -208,7 +313,7 @@ class WordBasketGame:
         # Distribute cards
         initial_hand_size = self.game_settings.get("initial_hand_size", 7)
         for player in self.players.values():
-            player.hand = [self.deck.pop() for _ in range(initial_hand_size)]
+            player.hand = self.deck.draw_many(initial_hand_size)
             # 特殊カードを配布
             player.special_cards = []
             player.pending_special_card = None
@@ -223,102 +328,38 @@ class WordBasketGame:
         
         
         # Draw a char card from deck for starting character
-        char_cards = [card for card in self.deck if card.type == "char"]
-        if char_cards:
-            start_card = random.choice(char_cards)
+        start_card = self.deck.take_random(lambda card: card.type == "char")
+        if start_card is not None:
             # Remove from deck and add to discard pile
-            self.deck.remove(start_card)
-            self.discard_pile.append(start_card)
+            self.discard_pile.push(start_card)
             start_char = start_card.value
         else:
             # Fallback if no char cards available
-            start_char = random.choice("あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろ")
+            start_char = self.rng.choice("あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろ")
         
         self.current_word = "ゲーム開始_" + start_char
         self.status = "playing"
         self.finished_players = []
         self.opposition_votes = set()
         self.approval_votes = set()
-        self.pending_revert_state = None
+        self.history.clear()
         for p in self.players.values():
             p.rank = None
 
 
     def normalize_kana(self, char: str) -> str:
-        # 1. Katakana to Hiragana
-        if 'ァ' <= char <= 'ン':
-            char = chr(ord(char) - 0x60)
-        elif char == 'ヵ': char = 'か'
-        elif char == 'ヶ': char = 'け'
-        elif char == 'ヴ': char = 'う'
-
-        # 2. Remove Dakuten/Handakuten and normalize small kana
-        mapping = {
-            'が': 'か', 'ぎ': 'き', 'ぐ': 'く', 'げ': 'け', 'ご': 'こ',
-            'ざ': 'さ', 'じ': 'し', 'ず': 'す', 'ぜ': 'せ', 'ぞ': 'そ',
-            'だ': 'た', 'ぢ': 'ち', 'づ': 'つ', 'で': 'て', 'ど': 'と',
-            'ば': 'は', 'び': 'ひ', 'ぶ': 'ふ', 'べ': 'へ', 'ぼ': 'ほ',
-            'ぱ': 'は', 'ぴ': 'ひ', 'ぷ': 'ふ', 'ぺ': 'へ', 'ぽ': 'ほ',
-            'ゃ': 'や', 'ゅ': 'ゆ', 'ょ': 'よ',
-            'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
-            'っ': 'つ', 'ゎ': 'わ',
-        }
-        return mapping.get(char, char)
+        return kana.normalize_char(char)
 
     def get_vowel(self, char: str) -> str:
         """Get the vowel sound of a hiragana character."""
-        # Vowel mapping: hiragana -> vowel hiragana
-        vowel_map = {
-            # あ行
-            'あ': 'あ', 'い': 'い', 'う': 'う', 'え': 'え', 'お': 'お',
-            # か行
-            'か': 'あ', 'き': 'い', 'く': 'う', 'け': 'え', 'こ': 'お',
-            'が': 'あ', 'ぎ': 'い', 'ぐ': 'う', 'げ': 'え', 'ご': 'お',
-            # さ行
-            'さ': 'あ', 'し': 'い', 'す': 'う', 'せ': 'え', 'そ': 'お',
-            'ざ': 'あ', 'じ': 'い', 'ず': 'う', 'ぜ': 'え', 'ぞ': 'お',
-            # た行
-            'た': 'あ', 'ち': 'い', 'つ': 'う', 'て': 'え', 'と': 'お',
-            'だ': 'あ', 'ぢ': 'い', 'づ': 'う', 'で': 'え', 'ど': 'お',
-            # な行
-            'な': 'あ', 'に': 'い', 'ぬ': 'う', 'ね': 'え', 'の': 'お',
-            # は行
-            'は': 'あ', 'ひ': 'い', 'ふ': 'う', 'へ': 'え', 'ほ': 'お',
-            'ば': 'あ', 'び': 'い', 'ぶ': 'う', 'べ': 'え', 'ぼ': 'お',
-            'ぱ': 'あ', 'ぴ': 'い', 'ぷ': 'う', 'ぺ': 'え', 'ぽ': 'お',
-            # ま行
-            'ま': 'あ', 'み': 'い', 'む': 'う', 'め': 'え', 'も': 'お',
-            # や行
-            'や': 'あ', 'ゆ': 'う', 'よ': 'お',
-            # ら行
-            'ら': 'あ', 'り': 'い', 'る': 'う', 'れ': 'え', 'ろ': 'お',
-            # わ行
-            'わ': 'あ', 'を': 'お',
-            # ん
-            'ん': 'ん',
-            # Small kana
-            'ゃ': 'あ', 'ゅ': 'う', 'ょ': 'お',
-            'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
-        }
-        return vowel_map.get(char, char)
+        return kana.vowel(char)
 
     def get_target_char(self):
         """Get the target character for display (normalized: no dakuten, katakana->hiragana)."""
-        if not self.current_word:
-            return ""
-        
-        last_char = self.current_word[-1]
-        if last_char == "ー" and len(self.current_word) > 1:
-            # Get the character before the long vowel mark
-            prev_char = self.current_word[-2]
-            # Return the vowel of that character (normalized)
-            vowel = self.get_vowel(prev_char)
-            return self.normalize_kana(vowel)
-        
-        # Normalize for display: remove dakuten/handakuten, convert katakana to hiragana
-        return self.normalize_kana(last_char)
+        return kana.target_char(self.current_word)
 
 
+    @journaled
     def check_move(self, player_id: str, word: str, card_index: int) -> dict:
         if self.status != "playing":
             return {"valid": False, "message": "ゲームは開始されていません"}
@@ -348,54 +389,46 @@ class WordBasketGame:
              return {"valid": False, "message": "単語を入力してください"}
 
         start_char = word[0]
-        if self.normalize_kana(start_char) != self.normalize_kana(target_char):
+        if kana.normalize_char(start_char) != target_char:
              return {"valid": False, "message": f"「{target_char}」から始まる単語ではありません"}
             
         if word.endswith("ん"):
             return {"valid": False, "message": "「ん」で終わる単語は使えません"}
 
-        # 特殊カードによる最小文字数の調整（デュアルワード）
-        has_dual_word = player.pending_special_card and player.pending_special_card.card_type == "dual_word"
-        min_length = 4 if len(player.hand) == 1 else 3
-        if has_dual_word:
-            min_length = 2  # デュアルワードカードがあれば2文字でOK
-        
+        min_length = self.get_min_word_length(player)
         if len(word) < min_length:
             return {"valid": False, "message": f"{min_length}文字以上の単語にしてください"}
 
         valid_card = False
-        effective_end = word[-1]
-        if word.endswith("ー") and len(word) > 1:
-            # Get the character before the long vowel mark
-            prev_char = word[-2]
-            # Get the vowel of that character
-            effective_end = self.get_vowel(prev_char)
+        end_key = kana.end_key(word)
         
         if card.type == "char":
-            if self.normalize_kana(effective_end) == self.normalize_kana(card.value):
+            if end_key == kana.normalize_char(card.value):
                 valid_card = True
             else:
                 return {"valid": False, "message": f"最後が「{card.value}」で終わる単語ではありません"}
         
         elif card.type == "row":
-            if self.normalize_kana(effective_end) in card.value:
+            if end_key in card.value:
                 valid_card = True
             else:
                 return {"valid": False, "message": f"最後が{card.display}で終わる単語ではありません"}
         
         elif card.type == "length":
             req_len = int(card.value)
-            if req_len == 7:
-                if len(word) >= 7:
+            if req_len == MAX_LENGTH_BUCKET:
+                if len(word) >= MAX_LENGTH_BUCKET:
                     valid_card = True
                 else:
-                    return {"valid": False, "message": "7文字以上の単語ではありません"}
+                    return {"valid": False, "message": f"{MAX_LENGTH_BUCKET}文字以上の単語ではありません"}
             else:
                 if len(word) == req_len:
                     valid_card = True
                 else:
                     return {"valid": False, "message": f"{req_len}文字の単語ではありません"}
 
+        if valid_card and self.game_settings.get("strict_dictionary") and not self.dictionary.contains_reading(word):
+            return {"valid": False, "message": f"「{word}」は辞書にありません"}
 
         if valid_card:
             # Clear any previous opposition votes when a new move is made
@@ -448,13 +481,10 @@ class WordBasketGame:
                     sc.is_pending = False
                     player.pending_special_card = None
             
-            # Store revert state
-            self.pending_revert_state = {
-                "player_id": player_id,
-                "previous_word": previous_word,
-                "played_card": played_card,
-                "was_finishing": len(player.hand) == 0 # After popping
-            }
+            # Record the move for potential revert
+            move = self.history.record(player_id, played_card.id, card_index, previous_word,
+                                       len(player.hand) == 0)  # After popping
+            self.opposition_votes = self.history.votes(move.move_id)
             
             message = "OK"
             game_over = False
@@ -493,61 +523,97 @@ class WordBasketGame:
         
         return {"valid": False, "message": "不明なエラー"}
 
-    def oppose_move(self, voter_id: str) -> dict:
+    @property
+    def last_move(self) -> Optional[Move]:
+        return self.history.latest
+
+    @journaled
+    def oppose_move(self, voter_id: str, move_id: Optional[int] = None) -> dict:
+        """
+        Vote against a move (the latest one by default). A late vote names the move the voter saw:
+        if that move gets a majority, it is undone together with every move made after it.
+        """
         # Can oppose at any time during "playing" or "finishing_check"
         if self.status not in ["playing", "finishing_check"]:
             return {"success": False, "message": "拒否投票できるタイミングではありません"}
         
-        if not self.pending_revert_state:
-            return {"success": False, "message": "拒否できる手がありません"}
+        move = self.history.latest if move_id is None else self.history.get(move_id)
+        if move is None:
+            if move_id is None:
+                return {"success": False, "message": "拒否できる手がありません"}
+            return {"success": False, "message": "その手はもう取り消せません"}
         
         # Prevent finishing player from voting during finishing_check
         if self.status == "finishing_check":
-            finishing_player_id = self.pending_revert_state.get("player_id")
+            finishing_player_id = self.history.latest.player_id
             if voter_id == finishing_player_id:
                 return {"success": False, "message": "上がったプレイヤーは投票できません"}
         
-        if voter_id in self.opposition_votes:
+        votes = self.history.votes(move.move_id)
+        if voter_id in votes:
             return {"success": False, "message": "既に投票済みです"}
             
-        self.opposition_votes.add(voter_id)
+        votes.add(voter_id)
         
         # Check majority (>= 50%)
         active_player_count = len(self.players)
-        if len(self.opposition_votes) >= active_player_count / 2:
-            was_finishing = self.pending_revert_state.get("was_finishing", False)
-            self.revert_last_move()
-            return {"success": True, "reverted": True, "message": "拒否多数により却下されました！"}
+        if len(votes) >= active_player_count / 2:
+            undone = self.undo_to(move.move_id)
+            return {"success": True, "reverted": True, "undone": undone, "message": "拒否多数により却下されました！"}
             
         return {"success": True, "reverted": False, "message": "拒否票を受け付けました"}
 
-    def revert_last_move(self):
-        if not self.pending_revert_state:
-            return
-
-        state = self.pending_revert_state
-        player = self.players.get(state["player_id"])
+    def _undo(self, move: Move):
+        player = self.players.get(move.player_id)
         
         if player:
-            player.hand.append(state["played_card"])
+            card = Card.from_id(move.card_id)
+            # Take the card back from the discard pile (or the deck, if the pile was reshuffled since);
+            # a card that is in neither was dealt out again and can't be returned
+            if self.discard_pile.remove_topmost(card) or self.deck.remove_topmost(card):
+                player.hand.insert(min(move.hand_index, len(player.hand)), card)
             
-        self.current_word = state["previous_word"]
+        self.current_word = move.previous_word
         
         # If it was a finishing move, restore status to playing
-        if state.get("was_finishing"):
+        if move.was_finishing:
             self.status = "playing"
-        
-        self.pending_revert_state = None
-        self.opposition_votes = set()
+
+    @journaled
+    def undo_to(self, move_id: int) -> int:
+        """Undo moves newest first, down to and including move_id (O(1) each). Returns how many were undone."""
+        if self.history.get(move_id) is None:
+            return 0
+        undone = 0
+        while self.history.latest.move_id >= move_id:
+            self._undo(self.history.pop())
+            undone += 1
+            if not len(self.history):
+                break
+        # The previous move can be opposed again, with the votes it already had
+        self.opposition_votes = self.history.votes(self.history.latest.move_id) if self.history.latest else set()
         self.approval_votes = set()
+        return undone
+
+    def _forget_moves(self):
+        """Hands were exchanged or swapped: undoing an earlier move would hand back the wrong cards."""
+        self.history.clear()
+        self.opposition_votes = set()
 
+    @journaled
+    def revert_last_move(self):
+        if self.history.latest is None:
+            return
+        self.undo_to(self.history.latest.move_id)
+
+    @journaled
     def approve_finish(self, voter_id: str) -> dict:
         """Approve the finishing move."""
         if self.status != "finishing_check":
             return {"success": False, "message": "承諾できるタイミングではありません"}
         
         # Prevent finishing player from voting
-        finishing_player_id = self.pending_revert_state.get("player_id") if self.pending_revert_state else None
+        finishing_player_id = self.last_move.player_id if self.last_move else None
         if voter_id == finishing_player_id:
             return {"success": False, "message": "上がったプレイヤーは投票できません"}
         
@@ -561,7 +627,6 @@ class WordBasketGame:
         self.approval_votes.add(voter_id)
         
         # Check if all active players (excluding the finishing player and finished players) have voted
-        finishing_player_id = self.pending_revert_state.get("player_id") if self.pending_revert_state else None
         active_players = [pid for pid in self.players.keys() 
                          if pid != finishing_player_id and self.players[pid].rank is None]
         total_votes = len(self.approval_votes) + len(self.opposition_votes)
@@ -578,12 +643,12 @@ class WordBasketGame:
         
         return {"success": True, "all_voted": False, "message": "承諾票を受け付けました"}
 
+    @journaled
     def confirm_finish(self):
-        if self.status != "finishing_check" or not self.pending_revert_state:
+        if self.status != "finishing_check" or not self.last_move:
             return None
 
-        state = self.pending_revert_state
-        player = self.players.get(state["player_id"])
+        player = self.players.get(self.last_move.player_id)
         
         if player:
             player.rank = len(self.finished_players) + 1
@@ -605,7 +670,8 @@ class WordBasketGame:
             else:
                 self.status = "playing" # Continue game for others
             
-            self.pending_revert_state = None
+            # A confirmed finish can't be undone: neither can anything before it
+            self.history.clear()
             self.opposition_votes = set()
             
             return {
@@ -617,113 +683,6 @@ class WordBasketGame:
             }
         return None
 
-    def exchange_hand(self, player_id: str, card_index: int) -> dict:
-        if self.status != "playing":
-            return {"success": False, "message": "ゲーム中ではありません"}
-
-        player = self.players.get(player_id)
-        if not player:
-            return {"success": False, "message": "プレイヤーが見つかりません"}
-
-        if not (0 <= card_index < len(player.hand)):
-            return {"success": False, "message": "無効なカードです"}
-
-        # Logic:
-        # 1. Selected card becomes new target (current_word = card.value)
-        # 2. Return remaining hand to deck
-        # 3. Draw old_hand_size + 1
-        
-        selected_card = player.hand.pop(card_index)
-        
-        # Use the card's value as the new "word" to determine next target
-        # But wait, current_word usually is a full word. 
-        # If I set current_word = "あ", then next target is "あ".
-        # If card is "length", value is "3". 
-        # "文字数と開始文字、終了文字さえ合っていればどんな文字列でも受け付けていたが..."
-        # The user example: "Current word 'program', hand 'wa, shi, nu'. Select 'shi'. Next word starts with 'shi'."
-        # So effectively, we simulate playing 'shi' but without forming a word?
-        # Or we just force the next target char to be 'shi'.
-        # Setting current_word = "Exchange_" + char seems appropriate to set the target.
-        
-        new_target_char = ""
-        if selected_card.type == "char":
-            new_target_char = selected_card.value
-        elif selected_card.type == "row":
-            # For row card, maybe pick random or allow any?
-            # Usually row card means "ends with something in this row".
-            # If we use it to SET the start, maybe we pick the first char or random?
-            # User said "Select 'shi' (from hand)... Next word starts with 'shi'".
-            # If I select 'ka-row', maybe next word must start with something from 'ka-row'?
-            # Or just pick one? Let's pick a random one from the row to be safe/simple, or just set it as the constraint.
-            # But get_target_char relies on current_word.
-            # Let's set current_word to something that ends with the desired char.
-            # But for row card, it's a set of chars.
-            # Let's assume we just pick one for simplicity or if the user meant specific card.
-            # "Select 'shi'". 'shi' is a char card.
-            # If it's a row card, let's say 'ka-row', does it mean next word starts with 'ka', 'ki', etc?
-            # Standard Word Basket rules for "Reset": usually you play a card to change the leading character.
-            # If I play "ka-row", usually I'd have to play a word ending in ka-row.
-            # But here we are FORCING the change.
-            # Let's just pick the first char of the row or random.
-            # Or better, let's make a special "Exchange" word.
-            if len(selected_card.value) > 1:
-                 # It's a row card or similar. 
-                 # Let's pick random from it to be the new start char.
-                 new_target_char = random.choice(selected_card.value)
-            else:
-                 new_target_char = selected_card.value
-        elif selected_card.type == "length":
-            # Length card doesn't have a char.
-            # If used for exchange, what happens?
-            # Maybe it doesn't change the character? Or random?
-            # User example only mentioned char card.
-            # Let's assume length card cannot be used for this, or just changes nothing but hand?
-            # "Hand is returned... +1 card".
-            # If I use length card, maybe I just want to refresh hand.
-            # Let's keep current target if length card is used?
-            # Or maybe disallow length card?
-            # Let's allow it but keep current target.
-            new_target_char = self.get_target_char()
-
-        self.current_word = "リロード_" + new_target_char
-
-        # Return remaining hand to deck
-        self.deck.extend(player.hand)
-        player.hand = []
-        random.shuffle(self.deck)
-        
-        # Draw new hand (original size (which was len+1 before pop) + 1)
-        # Wait, "Original hand size + 1".
-        # If I had 3 cards. Selected 1. Remaining 2.
-        # Original size 3. New size 4.
-        # So I draw 4.
-        
-        old_hand_size = len(self.deck) - len(self.deck) + len(player.hand) + 1 # logic math is weird here because I already extended deck
-        # Actually:
-        # I popped 1. current player.hand is empty (I put them in deck).
-        # I want to draw (old_size + 1).
-        # old_size was (count of cards returned + 1 (the popped one)).
-        # So if I returned 2 cards, old size was 3. I want 4.
-        # So draw (returned_count + 2).
-        
-        cards_to_draw = len(self.deck) - len(self.deck) # 0? no.
-        # Let's track count before extending.
-        # actually I already extended.
-        # Let's just pass the number.
-        # I need to know how many cards were in hand BEFORE pop.
-        # It was `len(player.hand)` (before extend) + 1 (the popped one).
-        # Wait, I popped `selected_card` first.
-        # So `len(player.hand)` is now `original - 1`.
-        # I extended deck with `player.hand`.
-        # So I need to draw `(original - 1) + 2` = `original + 1`.
-        # So `len(cards_returned) + 2`.
-        
-        num_to_draw = 0 
-        # Wait, I can't easily know how many I extended since I didn't count.
-        # Let's rewrite slightly.
-        
-        pass # Placeholder to be overwritten by below logic
-
     def auto_select_card(self, player_id: str, word: str) -> Optional[int]:
         player = self.players.get(player_id)
         if not player:
@@ -733,26 +692,21 @@ class WordBasketGame:
         if not word:
             return None
         
-        effective_end = word[-1]
-        if word.endswith("ー") and len(word) > 1:
-            # Get the character before the long vowel mark
-            prev_char = word[-2]
-            # Get the vowel of that character
-            effective_end = self.get_vowel(prev_char)
+        end_key = kana.end_key(word)
         
         card_indices_by_type = {'char': [], 'row': [], 'length': []}
         
         for idx, card in enumerate(player.hand):
             if card.type == 'char':
-                if self.normalize_kana(effective_end) == self.normalize_kana(card.value):
+                if end_key == kana.normalize_char(card.value):
                     card_indices_by_type['char'].append(idx)
             elif card.type == 'row':
-                if self.normalize_kana(effective_end) in card.value:
+                if end_key in card.value:
                     card_indices_by_type['row'].append(idx)
             elif card.type == 'length':
                 req_len = int(card.value)
-                if req_len == 7:
-                    if len(word) >= 7:
+                if req_len == MAX_LENGTH_BUCKET:
+                    if len(word) >= MAX_LENGTH_BUCKET:
                         card_indices_by_type['length'].append(idx)
                 else:
                     if len(word) == req_len:
@@ -764,11 +718,59 @@ class WordBasketGame:
         
         return None
 
+    def get_min_word_length(self, player: Player) -> int:
+        # 特殊カードによる最小文字数の調整（デュアルワード）
+        if player.pending_special_card and player.pending_special_card.card_type == "dual_word":
+            return 2  # デュアルワードカードがあれば2文字でOK
+        return 4 if len(player.hand) == 1 else 3
+
+    def get_playable_cards(self, player_id: str) -> List[int]:
+        """辞書に出せる単語が存在する手札のカードのインデックス"""
+        player = self.players.get(player_id)
+        if not player or not player.hand:
+            return []
+        return self.dictionary.oracle.playable_cards(self.get_target_char(), player.hand, self.get_min_word_length(player))
+
+    def get_hints(self, player_id: str) -> dict:
+        """手札のカードごとに、今出せる辞書内の単語をいくつか返す（辞書のHintCacheでキャッシュ）"""
+        if self.status != "playing":
+            return {"success": False, "message": "ゲーム中ではありません"}
+        player = self.players.get(player_id)
+        if not player:
+            return {"success": False, "message": "プレイヤーが見つかりません"}
+        if player.rank is not None or not player.hand:
+            return {"success": False, "message": "ヒントを出せる手札がありません"}
+
+        target_char = self.get_target_char()
+        min_length = self.get_min_word_length(player)
+        words_by_card = self.dictionary.hints.lookup(target_char, player.hand, min_length)
+        hints = []
+        for idx, card in enumerate(player.hand):
+            words = words_by_card.get(card.id)
+            if words and self.current_word in words:
+                words = tuple(w for w in words if w != self.current_word)
+            if words:
+                hints.append({"card_index": idx, "card": card.to_dict(), "words": list(words[:HINT_WORDS_PER_CARD])})
+        return {"success": True, "target_char": target_char, "min_length": min_length, "hints": hints}
+
+    def is_stuck(self, player_id: str) -> bool:
+        """辞書上、どのカードでも出せる単語がない（手札交換を提案すべき）状態か"""
+        player = self.players.get(player_id)
+        if self.status != "playing" or not player or player.rank is not None or not player.hand:
+            return False
+        return not self.dictionary.oracle.can_move(self.get_target_char(), player.hand, self.get_min_word_length(player))
+
+    def count_words_for_card(self, card: Card, min_length: int = 3) -> int:
+        """現在の開始文字から始まり、そのカードで出せる辞書内の単語数"""
+        return self.dictionary.index.count_for_card(self.get_target_char(), card, min_length)
+
+    @journaled
     def set_card_priority(self, player_id: str, priority: List[str]):
         player = self.players.get(player_id)
         if player and set(priority) == {'char', 'row', 'length'} and len(priority) == 3:
             player.card_priority = priority
 
+    @journaled
     def exchange_hand(self, player_id: str, card_index: int) -> dict:
         if self.status != "playing":
             return {"success": False, "message": "ゲーム中ではありません"}
@@ -789,7 +791,7 @@ class WordBasketGame:
         if selected_card.type == "char":
             new_target_char = selected_card.value
         elif selected_card.type == "row":
-            new_target_char = random.choice(selected_card.value)
+            new_target_char = self.rng.choice(selected_card.value)
         elif selected_card.type == "length":
             new_target_char = self.get_target_char()
 
@@ -819,7 +821,8 @@ class WordBasketGame:
         if len(self.deck) < num_to_draw:
              num_to_draw = len(self.deck)
         
-        player.hand = [self.deck.pop() for _ in range(num_to_draw)]
+        player.hand = self.deck.draw_many(num_to_draw)
+        self._forget_moves()
         
         penalty_message = "" if has_no_penalty else f"（+1枚ペナルティ）"
         return {"success": True, "message": f"手札を交換しました（{num_to_draw}枚{penalty_message}）"}
@@ -827,16 +830,9 @@ class WordBasketGame:
     def _reshuffle_if_needed(self):
         """場の札をシャッフルして山札に追加（一番上のカードは残す）"""
         if len(self.discard_pile) > 1:
-            # Keep the most recent card (top of discard pile)
-            most_recent = self.discard_pile[-1]
-            
-            # Shuffle all other cards into deck
-            cards_to_shuffle = self.discard_pile[:-1]
-            self.deck.extend(cards_to_shuffle)
-            random.shuffle(self.deck)
-            
-            # Keep only the most recent card in discard pile
-            self.discard_pile = [most_recent]
+            # Keep the most recent card (top of discard pile) and merge the rest into the deck
+            # at random positions: O(cards moved), the deck itself is not reshuffled
+            self.discard_pile.shuffle_into(self.deck, keep_top=True)
     
     def get_opponent_hand(self, viewer_id: str, target_id: str) -> dict:
         """上がったプレイヤーが他のプレイヤーの手札を見る"""
@@ -852,7 +848,7 @@ class WordBasketGame:
         if not target:
             return {"success": False, "message": "対象プレイヤーが見つかりません"}
         
-        hand_data = [{"type": card.type, "value": card.value, "display": card.display} for card in target.hand]
+        hand_data = [card.to_dict() for card in target.hand]
         
         return {
             "success": True,
@@ -860,6 +856,7 @@ class WordBasketGame:
             "hand": hand_data
         }
 
+    @journaled
     def request_rematch(self, player_id: str) -> dict:
         """Request a rematch"""
         if self.status != "finished":
@@ -878,6 +875,7 @@ class WordBasketGame:
         
         return {"success": True, "all_voted": False, "message": f"リマッチ投票: {len(self.rematch_votes)}/{len(self.players)}"}
     
+    @journaled
     def reset_game(self):
         """Reset game for rematch"""
         # Reset all players
@@ -886,18 +884,19 @@ class WordBasketGame:
             player.rank = None
         
         # Reset game state
-        self.deck = []
-        self.discard_pile = []
+        self.deck = CardPile(Card._by_id, rng=self.rng)
+        self.discard_pile = CardPile(Card._by_id, rng=self.rng)
         self.current_word = ""
         self.status = "waiting"
         self.finished_players = []
         self.opposition_votes = set()
         self.approval_votes = set()
-        self.pending_revert_state = None
+        self.history.clear()
         self.rematch_votes = set()
     
     # === 特殊カード関連メソッド ===
     
+    @journaled
     def set_special_card_pending(self, player_id: str, card_index: int) -> dict:
         """特殊カードを待機状態にする（即時発動のカードはその場で発動）"""
         if self.status not in ["playing", "finishing_check"]:
@@ -935,6 +934,7 @@ class WordBasketGame:
             "immediate": False
         }
     
+    @journaled
     def cancel_pending_special_card(self, player_id: str) -> dict:
         """待機中の特殊カードをキャンセル"""
         player = self.players.get(player_id)
@@ -961,16 +961,11 @@ class WordBasketGame:
         affected_players = []
         for pid, p in self.players.items():
             if pid != player_id and p.rank is None:  # 自分以外の現役プレイヤー
-                cards_drawn = 0
-                for _ in range(num_cards):
-                    if self.deck:
-                        p.hand.append(self.deck.pop())
-                        cards_drawn += 1
-                    elif len(self.discard_pile) > 1:
-                        self._reshuffle_if_needed()
-                        if self.deck:
-                            p.hand.append(self.deck.pop())
-                            cards_drawn += 1
+                if len(self.deck) < num_cards:
+                    self._reshuffle_if_needed()
+                drawn = self.deck.draw_many(num_cards)
+                p.hand.extend(drawn)
+                cards_drawn = len(drawn)
                 
                 if cards_drawn > 0:
                     affected_players.append({"player_id": pid, "name": p.name, "cards_drawn": cards_drawn})
@@ -996,6 +991,7 @@ class WordBasketGame:
         # 手札を割り当て直す
         for i, pid in enumerate(player_ids):
             self.players[pid].hand = rotated_hands[i]
+        self._forget_moves()
         
         return {
             "success": True,
@@ -1003,6 +999,7 @@ class WordBasketGame:
             "immediate": True
         }
     
+    @journaled
     def execute_select_swap(self, player_id: str, target_player_id: str) -> dict:
         """セレクトスワップの効果（特定のプレイヤーと手札を交換）"""
         player = self.players.get(player_id)
@@ -1019,6 +1016,7 @@ class WordBasketGame:
         
         # 手札を交換
         player.hand, target.hand = target.hand, player.hand
+        self._forget_moves()
         
         # 使用済みの特殊カードを削除
         if player.pending_special_card and player.pending_special_card.card_type == "select_swap":
@@ -1034,15 +1032,37 @@ class WordBasketGame:
 
 
 class GameManager:
-    def __init__(self):
-        self.games: Dict[str, WordBasketGame] = {}
+    def __init__(self, code_allocator: RoomCodeAllocator = None, store: RoomStore = None, event_log=None):
+        self.code_allocator = code_allocator or RoomCodeAllocator()
+        # Rooms live in the store: in this process by default, or shared between workers
+        self.store = store if store is not None else InMemoryRoomStore()
+        # Optional RoomLog (room_log.py): journals every room to disk so it survives a restart
+        self.event_log = event_log
+        self.evicted_count = 0
+
+    @property
+    def games(self) -> Dict[str, WordBasketGame]:
+        """Live rooms of an in-memory store (empty for shared stores)."""
+        return getattr(self.store, "games", {})
 
     def _generate_room_code(self) -> str:
-        """Generate a unique 4-digit room code."""
-        room_code = str(random.randint(1000, 9999))
-        while room_code in self.games:
-            room_code = str(random.randint(1000, 9999))
-        return room_code
+        """Allocate a unique room code."""
+        return self.code_allocator.allocate()
+
+    def _new_game(self, room_code: str, seed: int, custom_settings: Optional[dict]) -> WordBasketGame:
+        game = WordBasketGame(room_code, seed=seed)
+        
+        # Apply custom settings if provided
+        if custom_settings:
+            if "initial_hand_size" in custom_settings:
+                game.game_settings["initial_hand_size"] = custom_settings["initial_hand_size"]
+            if "strict_dictionary" in custom_settings:
+                game.game_settings["strict_dictionary"] = bool(custom_settings["strict_dictionary"])
+            if "num_special_cards_per_player" in custom_settings:
+                game.game_settings["num_special_cards_per_player"] = custom_settings["num_special_cards_per_player"]
+            if "special_cards_enabled" in custom_settings:
+                game.game_settings["special_cards_enabled"] = custom_settings["special_cards_enabled"]
+        return game
 
     def create_room(self, custom_settings: dict = None) -> str:
         """
@@ -1050,6 +1070,7 @@ class GameManager:
         custom_settings format:
         {
             "initial_hand_size": 7,
+            "strict_dictionary": False,
             "num_special_cards_per_player": 2,
             "special_cards_enabled": {
                 "draw2": 3,
@@ -1059,19 +1080,100 @@ class GameManager:
         }
         """
         room_code = self._generate_room_code()
-        game = WordBasketGame(room_code)
-        
-        # Apply custom settings if provided
-        if custom_settings:
-            if "initial_hand_size" in custom_settings:
-                game.game_settings["initial_hand_size"] = custom_settings["initial_hand_size"]
-            if "num_special_cards_per_player" in custom_settings:
-                game.game_settings["num_special_cards_per_player"] = custom_settings["num_special_cards_per_player"]
-            if "special_cards_enabled" in custom_settings:
-                game.game_settings["special_cards_enabled"] = custom_settings["special_cards_enabled"]
-        
-        self.games[room_code] = game
+        # The seed is journaled so a replayed room deals exactly the same cards
+        seed = random.getrandbits(64)
+        game = self._new_game(room_code, seed, custom_settings)
+        
+        # Another worker may hold the same code in a shared store: take the next one. The taken code is
+        # not freed (it isn't this worker's to reuse), and every code is tried at most once
+        for _ in range(self.code_allocator.capacity):
+            if self.store.add(room_code, game):
+                break
+            room_code = self._generate_room_code()
+            game.room_code = room_code
+        else:
+            raise RuntimeError("No room codes available")
+        self.touch(room_code)
+        if self.event_log is not None:
+            self.event_log.create(room_code, seed, custom_settings)
+            self.event_log.attach(game)
         return room_code
 
+    def recover_rooms(self) -> List[str]:
+        """Rebuild the rooms journaled by event_log (latest snapshot + replayed tail) after a restart."""
+        recovered = []
+        accept = self.code_allocator.accept
+        for history in self.event_log.load():
+            if accept is not None and not accept(history.room_code):
+                # Another shard's room (a journal directory shared by mistake): it is recovered there
+                continue
+            game, records = history.snapshot, history.records
+            if game is None:
+                if not records or records[0]["op"] != "create":
+                    continue
+                game = self._new_game(history.room_code, records[0]["seed"], records[0]["settings"])
+                records = records[1:]
+            for record in records:
+                if record["op"] not in JOURNALED_METHODS:
+                    continue
+                try:
+                    getattr(game, record["op"])(*record["args"])
+                except Exception as e:
+                    # The original call raised too (records are written before the call runs)
+                    print(f"[WARN] room {history.room_code} replay of {record['op']} raised {e!r}")
+            if self.store.add(history.room_code, game):
+                # The code is taken again: the allocator must not hand it to a new room
+                self.code_allocator.reserve(history.room_code)
+                self.touch(history.room_code)
+                self.event_log.attach(game)
+                recovered.append(history.room_code)
+        return recovered
+
     def get_room(self, room_code: str) -> Optional[WordBasketGame]:
-        return self.games.get(room_code)
\ No newline at end of file
+        """Current state of a room (a private copy when the store is shared: use mutate() to change it)."""
+        return self.store.get(self.code_allocator.normalize(room_code))
+
+    def mutate(self, room_code: str):
+        """Context manager yielding the room's game for modification (None if it doesn't exist)."""
+        return self.store.mutate(self.code_allocator.normalize(room_code))
+
+    def touch(self, room_code: str, now: float = None):
+        self.store.touch(room_code, now)
+
+    def mark_abandoned(self, room_code: str):
+        self.store.mark_abandoned(room_code)
+
+    def delete_room(self, room_code: str) -> bool:
+        if not self.store.delete(room_code):
+            return False
+        if self.event_log is not None:
+            self.event_log.delete(room_code)
+        self.code_allocator.free(room_code)
+        return True
+
+    def sweep(self, idle_ttl: float, finished_ttl: float, is_connected: Callable[[str], bool], now: float = None) -> List[str]:
+        """
+        Evict rooms that nobody will come back to:
+        - abandoned rooms
+        - rooms with no connected players and no activity for idle_ttl seconds
+        - finished games with no activity for finished_ttl seconds
+        Returns the evicted room codes.
+        """
+        if now is None:
+            now = self.store.clock()
+        evicted = []
+        for room in self.store.summaries():
+            idle_for = now - room.last_activity
+            if (room.abandoned
+                    or (idle_for > idle_ttl and not is_connected(room.room_code))
+                    or (room.status == "finished" and idle_for > finished_ttl)):
+                # Another worker sharing the store may have deleted it first
+                if self.delete_room(room.room_code):
+                    evicted.append(room.room_code)
+        self.evicted_count += len(evicted)
+        return evicted
+
+    def room_stats(self, is_connected: Callable[[str], bool]) -> dict:
+        rooms = self.store.summaries()
+        idle = sum(1 for room in rooms if not is_connected(room.room_code))
+        return {"live": len(rooms), "idle": idle, "evicted": self.evicted_count}
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Routing gateway for the room-sharded deployment.
+
+    python gateway.py --shards 4 [--host 0.0.0.0] [--port 8000] [--engine-port 9100]
+
+Starts one engine process per shard (main:app on 127.0.0.1:<engine-port + i>) and serves the
+gateway in this process. Shard i owns the room codes with shard_for(code, N) == i, so a room's
+game state only ever lives in one engine; the gateway just relays WebSocket frames to it and
+places new rooms on the least-loaded shard.
+
+To run the engines yourself, start each with SHARD_INDEX=i SHARD_COUNT=N (and its own ROOM_LOG_DIR
+when journaling) and point the gateway at them with GATEWAY_SHARDS=http://host:port,... (in shard order).
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import List, Optional, Tuple
+
+import websockets
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import FileResponse, Response
+
+from room_codes import shard_for
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+SHARD_POLL_INTERVAL = float(os.environ.get("SHARD_POLL_INTERVAL", 1.0))
+ENGINE_HTTP_TIMEOUT = 5.0
+
+
+class Shard:
+    """One engine process and the gateway's view of its load."""
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url.rstrip("/")
+        self.ws_url = "ws" + self.url[len("http"):]
+        # Rooms last reported by the engine, plus the ones placed on it since
+        self.rooms = 0
+        # WebSockets this gateway is relaying to it
+        self.connections = 0
+        self.healthy = True
+
+    @property
+    def load(self) -> Tuple[int, int]:
+        return (self.rooms, self.connections)
+
+    def to_dict(self) -> dict:
+        return {"shard": self.index, "url": self.url, "rooms": self.rooms,
+                "connections": self.connections, "healthy": self.healthy}
+
+
+def shards_from_env() -> List[Shard]:
+    urls = os.environ.get("GATEWAY_SHARDS", "http://127.0.0.1:9100")
+    return [Shard(i, url) for i, url in enumerate(u for u in urls.split(",") if u.strip())]
+
+
+shards: List[Shard] = shards_from_env()
+
+
+def owner(room_code: str) -> Shard:
+    return shards[shard_for(room_code, len(shards))]
+
+
+def least_loaded() -> List[Shard]:
+    """Shards in placement order: healthy ones first, then by (rooms, connections)."""
+    return sorted(shards, key=lambda shard: (not shard.healthy, shard.load, shard.index))
+
+
+def _engine_request(method: str, url: str, body: bytes = None, content_type: str = None) -> Tuple[int, str, bytes]:
+    headers = {"Content-Type": content_type} if content_type else {}
+    request = urllib.request.Request(url, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=ENGINE_HTTP_TIMEOUT) as response:
+            return response.status, response.headers.get("Content-Type", "application/json"), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("Content-Type", "application/json"), e.read()
+
+
+async def engine_request(shard: Shard, method: str, path: str, body: bytes = None, content_type: str = None) -> Response:
+    # Room creation and REST lookups are rare next to WebSocket traffic: a blocking client in a thread is enough
+    try:
+        status, media_type, content = await asyncio.to_thread(
+            _engine_request, method, shard.url + path, body, content_type)
+    except (urllib.error.URLError, OSError):
+        shard.healthy = False
+        raise HTTPException(status_code=502, detail=f"Shard {shard.index} is unavailable")
+    return Response(content=content, status_code=status, media_type=media_type)
+
+
+async def poll_shards():
+    while True:
+        for shard in shards:
+            try:
+                status, _, content = await asyncio.to_thread(_engine_request, "GET", shard.url + "/api/shard")
+                report = json.loads(content) if status == 200 else None
+            except (urllib.error.URLError, OSError, ValueError):
+                report = None
+            shard.healthy = report is not None
+            if report is not None:
+                shard.rooms = report["rooms"]
+        await asyncio.sleep(SHARD_POLL_INTERVAL)
+
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.on_event("startup")
+async def start_shard_poller():
+    asyncio.create_task(poll_shards())
+
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/")
+async def read_root():
+    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+
+
+@app.get("/game")
+async def read_game():
+    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+
+
+@app.get("/api/shards")
+def shard_stats():
+    return {"shards": [shard.to_dict() for shard in shards]}
+
+
+@app.post("/api/rooms")
+async def create_room(request: Request):
+    """Create the room on the least-loaded shard (the next one if a shard has no codes left)."""
+    body = await request.body()
+    response = None
+    for shard in least_loaded():
+        response = await engine_request(shard, "POST", "/api/rooms", body or b"{}", "application/json")
+        if response.status_code == 200:
+            shard.rooms += 1
+            return response
+        if response.status_code != 503:
+            return response
+    return response
+
+
+@app.api_route("/api/rooms/{room_code}/{path:path}", methods=["GET", "POST"])
+async def room_request(room_code: str, path: str, request: Request):
+    target = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+    body = await request.body() if request.method == "POST" else None
+    return await engine_request(owner(room_code), request.method, target, body,
+                                request.headers.get("content-type"))
+
+
+@app.websocket("/ws/{room_code}/{player_name}")
+async def relay_websocket(websocket: WebSocket, room_code: str, player_name: str):
+    shard = owner(room_code)
+    url = shard.ws_url + urllib.parse.quote(websocket.url.path)
+    query = websocket.scope.get("query_string", b"").decode()
+    if query:
+        url += "?" + query
+    # The engine negotiates the wire format: offer it exactly what the browser offered
+    requested = websocket.scope.get("subprotocols") or None
+    try:
+        upstream = await websockets.connect(url, subprotocols=requested, compression=None, max_size=None)
+    except (OSError, websockets.exceptions.InvalidHandshake):
+        # The engine refuses the handshake for unknown rooms
+        await websocket.close(code=4000, reason="Room not found")
+        return
+    await websocket.accept(subprotocol=upstream.subprotocol)
+    shard.connections += 1
+
+    async def client_to_engine():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            await upstream.send(message["text"] if message.get("text") is not None else message["bytes"])
+
+    async def engine_to_client():
+        try:
+            async for frame in upstream:
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        # Pass the engine's close code on (4001 replaced by a reconnect, 4008 slow consumer, ...)
+        try:
+            await websocket.close(code=upstream.close_code or 1000, reason=upstream.close_reason or "")
+        except Exception:
+            pass
+
+    tasks = [asyncio.create_task(client_to_engine()), asyncio.create_task(engine_to_client())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        shard.connections -= 1
+        await upstream.close()
+
+
+app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
+
+
+def start_engines(count: int, base_port: int) -> List[subprocess.Popen]:
+    processes = []
+    for index in range(count):
+        # Each engine owns its shard exclusively: rooms stay in process memory
+        env = dict(os.environ, SHARD_INDEX=str(index), SHARD_COUNT=str(count), ROOM_STORE="memory")
+        if os.environ.get("ROOM_LOG_DIR"):
+            # ...and journals its rooms to a directory of its own, which only it recovers from
+            env["ROOM_LOG_DIR"] = os.path.join(os.environ["ROOM_LOG_DIR"], f"shard-{index}")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(base_port + index), "--log-level", "warning"],
+            cwd=BASE_DIR, env=env))
+    return processes
+
+
+def wait_for_engines(timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    for shard in shards:
+        while True:
+            try:
+                _engine_request("GET", shard.url + "/health")
+                break
+            except (urllib.error.URLError, OSError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Shard {shard.index} did not start at {shard.url}")
+                time.sleep(0.1)
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Word Basket gateway with room-sharded engine processes")
+    parser.add_argument("--shards", type=int, default=int(os.environ.get("SHARD_COUNT", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--engine-port", type=int, default=9100, help="port of shard 0 (shard i uses engine-port + i)")
+    args = parser.parse_args(argv)
+
+    global shards
+    shards = [Shard(i, f"http://127.0.0.1:{args.engine_port + i}") for i in range(args.shards)]
+    engines = start_engines(args.shards, args.engine_port)
+    # uvicorn re-raises SIGTERM once it has shut down: exit through the finally block so the engines stop too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        wait_for_engines()
+        print(f"Gateway on port {args.port} routing to {args.shards} shard(s)")
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    finally:
+        for engine in engines:
+            engine.terminate()
+        for engine in engines:
+            engine.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from typing import Dict
+
+# Dakuten/Handakuten removal and small kana normalization (hiragana)
+_BASE_KANA = {
+    'が': 'か', 'ぎ': 'き', 'ぐ': 'く', 'げ': 'け', 'ご': 'こ',
+    'ざ': 'さ', 'じ': 'し', 'ず': 'す', 'ぜ': 'せ', 'ぞ': 'そ',
+    'だ': 'た', 'ぢ': 'ち', 'づ': 'つ', 'で': 'て', 'ど': 'と',
+    'ば': 'は', 'び': 'ひ', 'ぶ': 'ふ', 'べ': 'へ', 'ぼ': 'ほ',
+    'ぱ': 'は', 'ぴ': 'ひ', 'ぷ': 'ふ', 'ぺ': 'へ', 'ぽ': 'ほ',
+    'ゃ': 'や', 'ゅ': 'ゆ', 'ょ': 'よ',
+    'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
+    'っ': 'つ', 'ゎ': 'わ',
+}
+
+# Vowel mapping: hiragana -> vowel hiragana
+_VOWELS = {
+    # あ行
+    'あ': 'あ', 'い': 'い', 'う': 'う', 'え': 'え', 'お': 'お',
+    # か行
+    'か': 'あ', 'き': 'い', 'く': 'う', 'け': 'え', 'こ': 'お',
+    'が': 'あ', 'ぎ': 'い', 'ぐ': 'う', 'げ': 'え', 'ご': 'お',
+    # さ行
+    'さ': 'あ', 'し': 'い', 'す': 'う', 'せ': 'え', 'そ': 'お',
+    'ざ': 'あ', 'じ': 'い', 'ず': 'う', 'ぜ': 'え', 'ぞ': 'お',
+    # た行
+    'た': 'あ', 'ち': 'い', 'つ': 'う', 'て': 'え', 'と': 'お',
+    'だ': 'あ', 'ぢ': 'い', 'づ': 'う', 'で': 'え', 'ど': 'お',
+    # な行
+    'な': 'あ', 'に': 'い', 'ぬ': 'う', 'ね': 'え', 'の': 'お',
+    # は行
+    'は': 'あ', 'ひ': 'い', 'ふ': 'う', 'へ': 'え', 'ほ': 'お',
+    'ば': 'あ', 'び': 'い', 'ぶ': 'う', 'べ': 'え', 'ぼ': 'お',
+    'ぱ': 'あ', 'ぴ': 'い', 'ぷ': 'う', 'ぺ': 'え', 'ぽ': 'お',
+    # ま行
+    'ま': 'あ', 'み': 'い', 'む': 'う', 'め': 'え', 'も': 'お',
+    # や行
+    'や': 'あ', 'ゆ': 'う', 'よ': 'お',
+    # ら行
+    'ら': 'あ', 'り': 'い', 'る': 'う', 'れ': 'え', 'ろ': 'お',
+    # わ行
+    'わ': 'あ', 'を': 'お',
+    # ん
+    'ん': 'ん',
+    # Small kana
+    'ゃ': 'あ', 'ゅ': 'う', 'ょ': 'お',
+    'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
+}
+
+
+class KanaNormalizer:
+    """
+    Kana normalization with every mapping precomputed once.
+    normalize: katakana -> hiragana, dakuten/handakuten removed, small kana -> full size.
+    """
+
+    def __init__(self):
+        # Katakana (ァ-ヶ) -> Hiragana; ー is kept as is
+        self._hiragana_table = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+        normalized: Dict[str, str] = dict(_BASE_KANA)
+        for code in range(ord('ァ'), ord('ン') + 1):
+            hiragana = chr(code - 0x60)
+            normalized[chr(code)] = _BASE_KANA.get(hiragana, hiragana)
+        normalized['ヵ'] = 'か'
+        normalized['ヶ'] = 'け'
+        normalized['ヴ'] = 'う'
+        # Drop identity entries so lookups fall through to the default
+        self._normalized_chars = {k: v for k, v in normalized.items() if k != v}
+        self._normalize_table = str.maketrans(self._normalized_chars)
+        self._vowels = dict(_VOWELS)
+
+    def normalize_char(self, char: str) -> str:
+        return self._normalized_chars.get(char, char)
+
+    def normalize(self, word: str) -> str:
+        """Normalize every character of a word in a single pass."""
+        return word.translate(self._normalize_table)
+
+    def to_hiragana(self, word: str) -> str:
+        return word.translate(self._hiragana_table)
+
+    def vowel(self, char: str) -> str:
+        """Get the vowel sound of a hiragana character."""
+        return self._vowels.get(char, char)
+
+    def effective_end(self, word: str) -> str:
+        """Last character of a word, with a trailing 'ー' replaced by the vowel of the character before it."""
+        if word.endswith("ー") and len(word) > 1:
+            return self._vowels.get(word[-2], word[-2])
+        return word[-1]
+
+    def end_key(self, word: str) -> str:
+        """Normalized effective end (what end cards are matched against)."""
+        char = self.effective_end(word)
+        return self._normalized_chars.get(char, char)
+
+    def target_char(self, current_word: str) -> str:
+        """Character the next word must start with (normalized: no dakuten, katakana->hiragana)."""
+        if not current_word:
+            return ""
+        return self.end_key(current_word)
+
+
+kana = KanaNormalizer()
+
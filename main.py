@@ -1,14 +1,28 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
 from game import WordBasketGame, GameManager
+from room_codes import RoomCodeAllocator, shard_filter
+from room_store import RoomBusy, store_from_env
+from room_log import room_log_from_env
+from dictionary import dictionary_registry
+from state_sync import RoomStateSync
+from metrics import registry as metrics
+from wire import negotiate, BroadcastFrames, JsonCodec
+from timers import TimerWheel, TimerHandle
+from bot import BotPlayer, BOT_THINK_TIME, MAX_BOTS_PER_ROOM, bot_count, bot_name, is_bot, new_bot_id
+import tracing
+from tracing import RoomTracer, SamplingProfiler, room_tracers
 import os
 import json
+import time
 import uuid
 import asyncio
-from typing import Dict, List
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional
 
 app = FastAPI()
 
@@ -21,41 +35,261 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Game Manager instance
-game_manager = GameManager()
+# Game Manager instance (room code format from ROOM_CODE_LENGTH / ROOM_CODE_ALPHABET,
+# room storage from ROOM_STORE: "memory" for a single worker, "sqlite" to share rooms between workers)
+# Behind gateway.py this process is one shard and only allocates the codes routed to it
+SHARD_INDEX = int(os.environ.get("SHARD_INDEX", 0))
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", 1))
+store = store_from_env()
+# ROOM_LOG_DIR journals every room to local disk so a restarted process resumes them (single-process stores only)
+game_manager = GameManager(RoomCodeAllocator.from_env(accept=shard_filter(SHARD_INDEX, SHARD_COUNT)), store,
+                           None if store.shared else room_log_from_env())
+# Identifies this worker process in the shared store (presence rows, relayed events)
+WORKER_ID = uuid.uuid4().hex
+ROOM_EVENT_POLL_INTERVAL = float(os.environ.get("ROOM_EVENT_POLL_INTERVAL", 0.05))
+
+# Room garbage collection (seconds)
+ROOM_IDLE_TTL = float(os.environ.get("ROOM_IDLE_TTL", 600))
+ROOM_FINISHED_TTL = float(os.environ.get("ROOM_FINISHED_TTL", 1800))
+ROOM_SWEEP_INTERVAL = float(os.environ.get("ROOM_SWEEP_INTERVAL", 30))
+
+@app.on_event("startup")
+async def preload_dictionary():
+    # Parse words.json once; every room shares the same frozen dictionary
+    dictionary = dictionary_registry.preload()
+    print(f"Dictionary loaded: {len(dictionary)} words")
+
+@app.on_event("startup")
+async def recover_rooms():
+    if game_manager.event_log is None:
+        return
+    recovered = game_manager.recover_rooms()
+    print(f"Rooms recovered from {game_manager.event_log.directory}: {len(recovered)}")
+    for room_code in recovered:
+        # The vote timer died with the old process
+        game = game_manager.get_room(room_code)
+        if game.status == "finishing_check":
+            get_room_actor(room_code).schedule_voting_timeout(game)
+
+@app.on_event("shutdown")
+async def snapshot_rooms():
+    # A clean shutdown leaves one snapshot per room and nothing to replay
+    if game_manager.event_log is None:
+        return
+    for game in game_manager.games.values():
+        game_manager.event_log.snapshot(game)
+    game_manager.event_log.close()
+
+@app.on_event("startup")
+async def start_timer_wheel():
+    asyncio.create_task(timer_wheel.run())
+
+@app.on_event("startup")
+async def start_room_sweeper():
+    asyncio.create_task(room_sweeper())
+
+@app.on_event("startup")
+async def start_room_event_relay():
+    if game_manager.store.shared:
+        asyncio.create_task(relay_room_events())
+
+# Outbound queue per connection; a client whose queue stays full this long is disconnected
+SEND_QUEUE_SIZE = int(os.environ.get("SEND_QUEUE_SIZE", 64))
+SLOW_CONSUMER_TIMEOUT = float(os.environ.get("SLOW_CONSUMER_TIMEOUT", 5.0))
+
+messages_dropped = metrics.counter("ws_messages_dropped_total", "Messages dropped because a send queue was full")
+slow_consumers_evicted = metrics.counter("ws_slow_consumers_evicted_total", "Connections closed because their send queue stayed full")
+# Exceptions that are caught and swallowed, by exception type
+send_errors = metrics.family("counter", "ws_send_errors_total", "Exceptions raised while sending to a WebSocket", "error")
+close_errors = metrics.family("counter", "ws_close_errors_total", "Exceptions raised while closing a WebSocket", "error")
+
+class ClientConnection:
+    """A WebSocket with a bounded outbound queue drained by its own writer task."""
+
+    def __init__(self, websocket: WebSocket, room_code: str, player_id: str, max_queue: int = SEND_QUEUE_SIZE, codec=None):
+        self.websocket = websocket
+        self.room_code = room_code
+        self.player_id = player_id
+        # Wire format negotiated at connect time (JSON or MessagePack)
+        self.codec = codec or JsonCodec()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.full_since: Optional[float] = None
+        self.closed = False
+        handshake = self.codec.encode_handshake()
+        if handshake is not None:
+            self.queue.put_nowait(handshake)
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def send(self, message: dict) -> bool:
+        """Enqueue a message without waiting. Returns False if it was dropped."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            self.full_since = None
+            return True
+        except asyncio.QueueFull:
+            messages_dropped.inc()
+            now = time.monotonic()
+            if self.full_since is None:
+                self.full_since = now
+                # Checked by a timer as well: the queue may fill on the last broadcast before a quiet period
+                timer_wheel.schedule(SLOW_CONSUMER_TIMEOUT, self._check_stalled, now)
+            elif now - self.full_since > SLOW_CONSUMER_TIMEOUT:
+                self._evict(now)
+            return False
+
+    def _check_stalled(self, full_since: float):
+        # Still the same stall (no enqueue succeeded since) and the writer hasn't freed any room
+        if self.full_since == full_since and self.queue.full():
+            self._evict(time.monotonic())
+
+    def _evict(self, now: float):
+        if self.closed:
+            return
+        slow_consumers_evicted.inc()
+        print(f"[WARN] Evicting slow client {self.player_id} in room {self.room_code} (queue full for {now - self.full_since:.1f}s)")
+        self.close(code=4008, reason="Slow consumer")
+
+    async def _write_loop(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                # Already-encoded frames (bytes/str) are sent as is
+                payload = message if isinstance(message, (bytes, str)) else self.codec.encode(message)
+                tracer = room_tracers.get(self.room_code)
+                started = time.perf_counter()
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+                if tracer is not None:
+                    tracer.add("socket_send", started, lane=self.player_id, args={"chars": len(payload)})
+            except Exception as e:
+                # Handle potential broken pipe
+                send_errors.get(type(e).__name__).inc()
+                self.close()
+                return
+
+    def close(self, code: int = 1000, reason: str = ""):
+        if self.closed:
+            return
+        self.closed = True
+        self.writer.cancel()
+        asyncio.create_task(self._close_websocket(code, reason))
+
+    async def _close_websocket(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception as e:
+            close_errors.get(type(e).__name__).inc()
 
 class ConnectionManager:
     def __init__(self):
-        # room_code -> {player_id -> WebSocket}
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        # room_code -> {player_id -> ClientConnection}
+        self.active_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        # room_code -> versioned game_state delta tracker
+        self.state_syncs: Dict[str, RoomStateSync] = {}
+        # (connection, message, on_drop) sent while a room is checked out, delivered once it is saved
+        self._held: Optional[list] = None
 
-    async def connect(self, websocket: WebSocket, room_code: str, player_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, room_code: str, player_id: str) -> ClientConnection:
+        codec = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=codec.subprotocol)
         if room_code not in self.active_connections:
             self.active_connections[room_code] = {}
-        self.active_connections[room_code][player_id] = websocket
+        previous = self.active_connections[room_code].get(player_id)
+        if previous:
+            previous.close(code=4001, reason="Replaced by a new connection")
+        connection = ClientConnection(websocket, room_code, player_id, codec=codec)
+        self.active_connections[room_code][player_id] = connection
+        game_manager.store.set_connected(room_code, player_id, WORKER_ID, True)
+        # A (re)connected client always starts from a full snapshot
+        self.get_state_sync(room_code).forget(player_id)
+        return connection
 
-    def disconnect(self, room_code: str, player_id: str):
-        if room_code in self.active_connections:
-            if player_id in self.active_connections[room_code]:
-                del self.active_connections[room_code][player_id]
-            if not self.active_connections[room_code]:
-                del self.active_connections[room_code]
+    def disconnect(self, room_code: str, player_id: str, connection: ClientConnection = None):
+        connections = self.active_connections.get(room_code)
+        if connections is None:
+            return
+        current = connections.get(player_id)
+        # Ignore a stale handler whose connection was already replaced by a reconnect
+        if current is None or (connection is not None and current is not connection):
+            return
+        current.close()
+        del connections[player_id]
+        game_manager.store.set_connected(room_code, player_id, WORKER_ID, False)
+        if not connections:
+            del self.active_connections[room_code]
+        if room_code in self.state_syncs:
+            self.state_syncs[room_code].forget(player_id)
+
+    def get_state_sync(self, room_code: str) -> RoomStateSync:
+        if room_code not in self.state_syncs:
+            self.state_syncs[room_code] = RoomStateSync()
+        return self.state_syncs[room_code]
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
+    def queue_depths(self) -> List[int]:
+        return [c.queue.qsize() for conns in self.active_connections.values() for c in conns.values()]
 
-    async def broadcast(self, message: dict, room_code: str):
+    def send(self, connection: ClientConnection, message, on_drop: Callable[[], None] = None) -> bool:
+        """
+        Send a message, or hold it until the room being changed is saved (see holding()).
+        Returns False if it was dropped (on_drop runs then, also for held messages that are never sent).
+        """
+        if self._held is not None:
+            self._held.append((connection, message, on_drop))
+            return True
+        if connection.send(message):
+            return True
+        if on_drop is not None:
+            on_drop()
+        return False
+
+    @contextmanager
+    def holding(self):
+        """Hold every message sent in the block: deliver them after a clean exit, drop them on an error."""
+        held = self._held = []
+        try:
+            yield
+        except BaseException:
+            for _, _, on_drop in held:
+                if on_drop is not None:
+                    on_drop()
+            raise
+        finally:
+            self._held = None
+        for connection, message, on_drop in held:
+            if not connection.send(message) and on_drop is not None:
+                on_drop()
+
+    async def send_personal_message(self, message: dict, connection: Optional[ClientConnection]):
+        # Bots act without a connection: their errors go nowhere
+        if connection is not None:
+            self.send(connection, message)
+
+    async def broadcast(self, message: dict, room_code: str, publish: bool = True):
         if room_code in self.active_connections:
             for connection in self.active_connections[room_code].values():
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    # Handle potential broken pipe
-                    pass
+                self.send(connection, message)
+        if publish:
+            publish_room_event(room_code, {"kind": "message", "message": message})
 
 manager = ConnectionManager()
 
+metrics.gauge("ws_send_queue_depth", "Messages waiting in all send queues", fn=lambda: sum(manager.queue_depths()))
+metrics.gauge("ws_send_queue_max_depth", "Deepest single send queue", fn=lambda: max(manager.queue_depths(), default=0))
+metrics.gauge("ws_connections", "Open WebSocket connections", fn=lambda: len(manager.queue_depths()))
+metrics.gauge("ws_rooms_connected", "Rooms with at least one open WebSocket on this worker", fn=lambda: len(manager.active_connections))
+
+# Fan-out of each game_state broadcast (one frame per connection in the room)
+BROADCAST_MESSAGE_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 12, 16)
+BROADCAST_BYTE_BUCKETS = (512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+broadcast_messages = metrics.histogram("broadcast_messages", "Frames sent by one game_state broadcast", buckets=BROADCAST_MESSAGE_BUCKETS)
+broadcast_bytes = metrics.histogram("broadcast_bytes", "Bytes sent by one game_state broadcast", buckets=BROADCAST_BYTE_BUCKETS)
+broadcast_messages_total = metrics.counter("broadcast_messages_total", "Frames sent by game_state broadcasts")
+broadcast_bytes_total = metrics.counter("broadcast_bytes_total", "Bytes sent by game_state broadcasts")
+
 # API Models
 class CreateRoomResponse(BaseModel):
     room_code: str
@@ -75,6 +309,119 @@ async def read_root():
 async def read_game():
     return FileResponse("static/index.html")
 
+@app.get("/api/stats")
+async def stats():
+    # async, like /metrics: the gauges walk structures only the event loop thread may touch
+    return metrics.snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    # async: rendered on the event loop thread, which is the only one that updates metrics
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Admin endpoints (tracing / profiling) are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token.
+# Traces and profiles are per process: with several workers or shards, call the one that holds the room.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+MAX_TRACE_SECONDS = 600
+# room_code -> most recent tracer (active or finished), kept for download
+room_traces: Dict[str, RoomTracer] = {}
+MAX_KEPT_TRACES = 16
+profiler: Optional[SamplingProfiler] = None
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def stop_trace(room_code: str, tracer: RoomTracer):
+    # A newer trace of the same room may have replaced this one
+    if room_tracers.get(room_code) is tracer:
+        del room_tracers[room_code]
+
+@app.post("/admin/rooms/{room_code}/trace")
+async def start_room_trace(room_code: str, seconds: float = 60, max_spans: int = 20000,
+                           x_admin_token: Optional[str] = Header(None)):
+    """Trace one room for `seconds` (receive -> queue -> command -> game methods -> broadcast -> socket sends)."""
+    require_admin(x_admin_token)
+    room_code = game_manager.code_allocator.normalize(room_code)
+    if game_manager.get_room(room_code) is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    seconds = min(max(seconds, 0.1), MAX_TRACE_SECONDS)
+    tracer = RoomTracer(room_code, max_spans=max(1, min(max_spans, 200000)))
+    room_tracers[room_code] = tracer
+    room_traces.pop(room_code, None)
+    room_traces[room_code] = tracer
+    # Forget the oldest finished traces
+    finished = [code for code in room_traces if code not in room_tracers]
+    for code in finished[:max(0, len(room_traces) - MAX_KEPT_TRACES)]:
+        del room_traces[code]
+    timer_wheel.schedule(seconds, stop_trace, room_code, tracer)
+    return {"room_code": room_code, "tracing": True, "seconds": seconds}
+
+@app.get("/admin/rooms/{room_code}/trace")
+async def get_room_trace(room_code: str, x_admin_token: Optional[str] = Header(None)):
+    """The room's latest trace in the Chrome trace event format (open in ui.perfetto.dev)."""
+    require_admin(x_admin_token)
+    tracer = room_traces.get(game_manager.code_allocator.normalize(room_code))
+    if tracer is None:
+        raise HTTPException(status_code=404, detail="No trace for this room")
+    trace = tracer.export()
+    trace["otherData"]["active"] = room_tracers.get(tracer.room_code) is tracer
+    return trace
+
+@app.delete("/admin/rooms/{room_code}/trace")
+async def stop_room_trace(room_code: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    room_code = game_manager.code_allocator.normalize(room_code)
+    tracer = room_tracers.pop(room_code, None)
+    if tracer is None:
+        raise HTTPException(status_code=404, detail="This room is not being traced")
+    return tracer.export()
+
+@app.post("/admin/profile")
+async def start_profile(room_code: Optional[str] = None, seconds: float = 30, interval: float = 0.005,
+                        x_admin_token: Optional[str] = Header(None)):
+    """
+    Sample the engine's stacks while room commands run (one room's, or every room's), for `seconds`.
+    GET /admin/profile returns the folded stacks, ready for flamegraph.pl, speedscope or inferno.
+    """
+    global profiler
+    require_admin(x_admin_token)
+    if profiler is not None and profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    if room_code is not None:
+        room_code = game_manager.code_allocator.normalize(room_code)
+    # Sample the thread running this handler: the event loop's
+    profiler = SamplingProfiler(RoomActor._run, room_code, interval=max(interval, 0.001),
+                                thread_id=threading.get_ident()).start()
+    timer_wheel.schedule(min(max(seconds, 0.1), MAX_TRACE_SECONDS), profiler.stop)
+    return {"room_code": room_code, "profiling": True, "seconds": seconds, "interval": profiler.interval}
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def get_profile(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="No profile")
+    return PlainTextResponse(profiler.folded(), headers={
+        "X-Profile-Samples": str(profiler.samples), "X-Profile-Ticks": str(profiler.ticks),
+        "X-Profile-Running": str(profiler.running).lower()})
+
+@app.delete("/admin/profile", response_class=PlainTextResponse)
+async def stop_profile(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="No profile")
+    profiler.stop()
+    return await get_profile(x_admin_token)
+
+@app.get("/api/shard")
+async def shard_load():
+    """Load report polled by the gateway to place new rooms (async: read on the event loop thread)."""
+    return {"shard": SHARD_INDEX, "shard_count": SHARD_COUNT, "rooms": len(game_manager.store),
+            "connections": len(manager.queue_depths())}
+
 @app.get("/api")
 def api_root():
     return {"message": "Word Basket API is running"}
@@ -87,6 +434,7 @@ async def create_room(request: dict = None):
     {
         "settings": {
             "initial_hand_size": 7,
+            "strict_dictionary": false,
             "num_special_cards_per_player": 2,
             "special_cards_enabled": {...}
         }
@@ -96,253 +444,613 @@ async def create_room(request: dict = None):
     if request and "settings" in request:
         settings = request["settings"]
     
-    room_code = game_manager.create_room(settings)
+    try:
+        room_code = game_manager.create_room(settings)
+    except RuntimeError:
+        raise HTTPException(status_code=503, detail="No room codes available")
     return {"room_code": room_code}
 
-@app.websocket("/ws/{room_code}/{player_name}")
-async def websocket_endpoint(websocket: WebSocket, room_code: str, player_name: str, player_id: str = None):
-    # Check if room exists
+@app.post("/api/rooms/{room_code}/bots")
+async def add_room_bots(room_code: str, request: dict = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Add server-side bots to a room that hasn't started (load tests; an admin endpoint, see ADMIN_TOKEN).
+    Players add bots to their own room with the host-only add_bot WebSocket action.
+    Request body (optional): {"count": 1, "think_time": 1.5}
+    A room created through this endpoint alone is hosted by its first bot, which starts the game.
+    """
+    require_admin(x_admin_token)
+    request = request or {}
+    count = request.get("count", 1)
+    if not isinstance(count, int) or not 1 <= count <= MAX_BOTS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_BOTS_PER_REQUEST}")
+    room_code = game_manager.code_allocator.normalize(room_code)
     game = game_manager.get_room(room_code)
-    if not game:
-        await websocket.close(code=4000, reason="Room not found")
-        return
+    if game is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if game.status != "waiting":
+        raise HTTPException(status_code=409, detail="Game already started")
+    if bot_count(game) + count > MAX_BOTS_PER_ROOM:
+        raise HTTPException(status_code=409, detail=f"A room holds at most {MAX_BOTS_PER_ROOM} bots")
+    # Added by the room's actor, in order with its other commands
+    actor = get_room_actor(room_code)
+    bot_ids = [new_bot_id() for _ in range(count)]
+    for player_id in bot_ids:
+        actor.submit("add_bot", data={"player_id": player_id, "think_time": request.get("think_time")})
+    return {"room_code": room_code, "bot_ids": bot_ids}
 
+@app.websocket("/ws/{room_code}/{player_name}")
+async def websocket_endpoint(websocket: WebSocket, room_code: str, player_name: str, player_id: str = None):
+    room_code = game_manager.code_allocator.normalize(room_code)
     # Handle player_id logic
-    is_reconnect = False
-    if player_id and player_id in game.players:
-        # Reconnection
-        player = game.players[player_id]
-        is_reconnect = True
-    else:
+    def check_in(game: Optional[WordBasketGame]):
+        if game is None:
+            return None
+        if player_id and player_id in game.players:
+            # Reconnection
+            return player_id, True
         # New player
-        player_id = str(uuid.uuid4())
-        player = game.add_player(player_id, player_name)
+        new_player_id = str(uuid.uuid4())
+        game.add_player(new_player_id, player_name)
+        return new_player_id, False
+
+    checked_in = await run_in_room(room_code, check_in)
+    if checked_in is None:
+        await websocket.close(code=4000, reason="Room not found")
+        return
+    player_id, is_reconnect = checked_in
     
     # Join room (ConnectionManager handles overwriting existing connection if any)
-    await manager.connect(websocket, room_code, player_id)
+    connection = await manager.connect(websocket, room_code, player_id)
+    # All game mutations for this room go through its actor, in order
+    actor = get_room_actor(room_code)
+    actor.submit("join", player_id, {"is_reconnect": is_reconnect}, connection)
     
     try:
-        # Broadcast room update
-        msg = f"{player.name}さんが再接続しました" if is_reconnect else f"{player.name}さんが参加しました"
-        
-        # If game is finished, send game_over and ranks
-        if game.status == "finished":
-            await broadcast_game_state(
-                game, 
-                room_code, 
-                message=msg, 
-                game_over=True, 
-                winner=game.finished_players[0].name if game.finished_players else None,
-                ranks=[p.to_dict() for p in game.finished_players]
-            )
-        else:
-            await broadcast_game_state(game, room_code, message=msg)
-        
         while True:
             data = await websocket.receive_json()
-            action = data.get("action")
-            
-            if action == "start_game":
-                if player.is_host:
-                    game.start_game()
-                    await broadcast_game_state(game, room_code, message=f"{player.name}さんがゲームを開始しました！")
-                else:
-                    await manager.send_personal_message({"type": "error", "message": "ホストのみがゲームを開始できます"}, websocket)
+            tracer = room_tracers.get(room_code)
+            if tracer is not None:
+                now = time.perf_counter()
+                tracer.add("receive", now, now, lane=player_id, args={"action": str(data.get("action"))})
+            actor.submit("action", player_id, data, connection)
+    except WebSocketDisconnect:
+        manager.disconnect(room_code, player_id, connection)
+        actor.submit("leave", player_id, connection=connection)
+
+class RoomCommand(NamedTuple):
+    kind: str  # "join", "action", "leave", "voting_timeout", "add_bot", "bot_turn"
+    player_id: Optional[str]
+    data: dict
+    connection: Optional[ClientConnection]
+    enqueued_at: float
+
+command_latency = metrics.histogram("room_command_seconds", "Time from enqueue to completion of a room command")
+command_wait = metrics.histogram("room_command_wait_seconds", "Time a room command waited in its actor queue")
+command_errors = metrics.counter("room_command_errors_total", "Room commands that raised an exception")
+
+# Per-action latency (enqueue to completion, including the broadcast). Unknown actions share one label
+# so clients cannot create unbounded label values.
+ACTIONS = frozenset({
+    "start_game", "play_word", "approve", "reroll", "rematch", "oppose", "resync", "set_priority",
+    "get_hand", "set_special_card_pending", "cancel_pending_special_card", "execute_select_swap",
+    "add_bot", "remove_bot", "get_hint",
+})
+action_latency = metrics.family("histogram", "ws_action_seconds", "Time from receiving a WebSocket action to finishing it", "action")
+
+# Room timers (voting timeouts, ...): one hierarchical timer wheel for the whole process
+VOTING_TIMEOUT = float(os.environ.get("VOTING_TIMEOUT", 10))
+timer_lag = metrics.histogram("timer_lag_seconds", "How late timers fired after their deadline")
+timer_wheel = TimerWheel(tick=float(os.environ.get("TIMER_TICK", 0.05)), lag_histogram=timer_lag)
+metrics.gauge("timers_pending", "Timers waiting in the timer wheel", fn=lambda: timer_wheel.pending)
+
+# Server-side bots (bot.py): each one's turn is a timer that submits a "bot_turn" command to its room
+bot_actions = metrics.family("counter", "bot_actions_total", "Actions taken by server-side bots", "action")
+bot_decision = metrics.histogram("bot_decision_seconds", "Time a bot took to choose its action",
+                                 buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005))
+MAX_BOTS_PER_REQUEST = 8
+
+# A room checked out from a shared store that another worker holds is retried this often (doubling up to the max)
+ROOM_BUSY_RETRY_DELAY = 0.005
+ROOM_BUSY_MAX_DELAY = 0.2
+room_busy_retries = metrics.counter("room_store_busy_retries_total", "Room checkouts retried because another worker held the store")
+
+def run_now(coroutine):
+    """Run a handler coroutine to completion without yielding to the event loop (a room is checked out)."""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("handler suspended while its room was checked out")
+
+async def run_in_room(room_code: str, critical: Callable[[Optional[WordBasketGame]], object]):
+    """
+    Check the room out, call critical(game) and save it, all synchronously: nothing else runs on this
+    worker meanwhile, so a shared store's transaction lasts only as long as the command itself.
+    Messages sent meanwhile go out once the room is saved. While another worker holds the store,
+    wait on the event loop (not in SQLite) and try again.
+    """
+    delay = ROOM_BUSY_RETRY_DELAY
+    while True:
+        try:
+            with manager.holding():
+                with game_manager.mutate(room_code) as game:
+                    return critical(game)
+        except RoomBusy:
+            room_busy_retries.inc()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ROOM_BUSY_MAX_DELAY)
+
+class RoomActor:
+    """Consumes one room's command queue so game mutations never interleave."""
+
+    def __init__(self, room_code: str):
+        self.room_code = room_code
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.processed = 0
+        self.max_queue_length = 0
+        # name -> pending timer owned by this room (at most one per name)
+        self.timers: Dict[str, TimerHandle] = {}
+        # player_id -> BotPlayer for the room's bots that this worker runs. With a shared store only the
+        # worker that added a bot runs it; otherwise every bot is ours (recreated with default settings after a recovery)
+        self.bots: Dict[str, BotPlayer] = {}
+        self.task = asyncio.create_task(self._run())
+
+    def submit(self, kind: str, player_id: str = None, data: dict = None, connection: ClientConnection = None):
+        self.queue.put_nowait(RoomCommand(kind, player_id, data or {}, connection, time.perf_counter()))
+        self.max_queue_length = max(self.max_queue_length, self.queue.qsize())
+
+    async def _run(self):
+        while True:
+            command = await self.queue.get()
+            try:
+                await run_in_room(self.room_code, lambda game: self._handle(game, command))
+            except Exception as e:
+                command_errors.inc()
+                print(f"[ERROR] room {self.room_code} {command.kind} failed: {e!r}")
+            elapsed = time.perf_counter() - command.enqueued_at
+            command_latency.observe(elapsed)
+            if command.kind == "action":
+                action = command.data.get("action")
+                action_latency.get(action if action in ACTIONS else "unknown").observe(elapsed)
+            self.processed += 1
+
+    def _handle(self, game: Optional[WordBasketGame], command: RoomCommand):
+        """Run one command with the room checked out (synchronously: see run_in_room)."""
+        if game is None:
+            return
+        # Lets the sampling profiler attribute this command's stack samples to the room
+        tracing.current_room = self.room_code
+        tracer = room_tracers.get(self.room_code)
+        try:
+            if command.kind != "bot_turn":
+                # Bots alone don't keep a room alive
+                game_manager.touch(self.room_code)
+            started = time.perf_counter()
+            command_wait.observe(started - command.enqueued_at)
+            if tracer is None:
+                changed = run_now(handle_command(game, self.room_code, command))
+            else:
+                changed = self._traced(tracer, game, command, started)
+            if game.status != "finishing_check":
+                # The vote is over (approved, rejected or undone): its timeout must not fire
+                self.cancel_timer("voting")
+            if changed is not False:
+                self.wake_bots(game)
+        finally:
+            tracing.current_room = None
+
+    def _traced(self, tracer: RoomTracer, game: WordBasketGame, command: RoomCommand, started: float):
+        tracer.add("queue", command.enqueued_at, started)
+        name = command.kind if command.kind != "action" else str(command.data.get("action"))
+        game.tracer = tracer
+        try:
+            return run_now(handle_command(game, self.room_code, command))
+        finally:
+            game.tracer = None
+            tracer.add(f"command.{name}", started, args={"player_id": command.player_id})
+
+    def schedule(self, name: str, delay: float, kind: str, data: dict = None, player_id: str = None):
+        """Submit a command to this room after delay seconds, replacing its pending timer of the same name."""
+        self.cancel_timer(name)
+        self.timers[name] = timer_wheel.schedule(delay, self._fire, name, kind, data, player_id)
+
+    def _fire(self, name: str, kind: str, data: dict, player_id: str = None):
+        self.timers.pop(name, None)
+        self.submit(kind, player_id, data)
+
+    def cancel_timer(self, name: str):
+        handle = self.timers.pop(name, None)
+        if handle:
+            handle.cancel()
+
+    def schedule_voting_timeout(self, game: WordBasketGame):
+        # Tagged with the finishing move: a timeout can only ever decide the vote it was started for
+        self.schedule("voting", VOTING_TIMEOUT, "voting_timeout", {"move_id": game.last_move.move_id})
+
+    def bot(self, player_id: str) -> Optional[BotPlayer]:
+        """The BotPlayer if this worker runs the bot (None: another worker sharing the store does)."""
+        bot = self.bots.get(player_id)
+        if bot is None and not game_manager.store.shared:
+            bot = self.bots[player_id] = BotPlayer(player_id)
+        return bot
+
+    def wake_bots(self, game: WordBasketGame):
+        """Give every bot of ours without a pending turn one, think time from now (the room changed)."""
+        for player_id in list(self.bots):
+            if player_id not in game.players:
+                # Removed (possibly through another worker)
+                del self.bots[player_id]
+                self.cancel_timer("bot:" + player_id)
+        for player_id in game.players:
+            if is_bot(player_id):
+                name = "bot:" + player_id
+                if name not in self.timers:
+                    bot = self.bot(player_id)
+                    if bot is not None:
+                        self.schedule(name, bot.think_delay(), "bot_turn", player_id=player_id)
+
+    def stop(self):
+        for name in list(self.timers):
+            self.cancel_timer(name)
+        self.task.cancel()
+
+# room_code -> RoomActor
+room_actors: Dict[str, RoomActor] = {}
+
+def get_room_actor(room_code: str) -> RoomActor:
+    if room_code not in room_actors:
+        room_actors[room_code] = RoomActor(room_code)
+    return room_actors[room_code]
+
+metrics.gauge("room_command_queue_length", "Commands waiting in all room actor queues", fn=lambda: sum(a.queue.qsize() for a in room_actors.values()))
+metrics.gauge("room_actors", "Running room actors", fn=lambda: len(room_actors))
+
+def room_has_connections(room_code: str) -> bool:
+    # Any worker's connections count
+    return bool(game_manager.store.connected_players(room_code))
+
+def evict_room(room_code: str):
+    """Drop everything held for a room that GameManager has deleted."""
+    actor = room_actors.pop(room_code, None)
+    if actor:
+        actor.stop()
+    for connection in list(manager.active_connections.get(room_code, {}).values()):
+        manager.disconnect(room_code, connection.player_id, connection)
+    manager.state_syncs.pop(room_code, None)
+
+async def room_sweeper():
+    while True:
+        await asyncio.sleep(ROOM_SWEEP_INTERVAL)
+        evicted = game_manager.sweep(ROOM_IDLE_TTL, ROOM_FINISHED_TTL, room_has_connections)
+        for room_code in evicted:
+            evict_room(room_code)
+            publish_room_event(room_code, {"kind": "evicted"})
+        rooms_evicted.inc(len(evicted))
+        if evicted:
+            print(f"Evicted {len(evicted)} rooms: {', '.join(evicted)}")
+
+metrics.gauge("rooms_live", "Rooms held by GameManager", fn=lambda: len(game_manager.store))
+metrics.gauge("players_live", "Players in the rooms held by GameManager", fn=lambda: sum(room.players for room in game_manager.store.summaries()))
+metrics.gauge("rooms_idle", "Rooms with no connected players", fn=lambda: game_manager.room_stats(room_has_connections)["idle"])
+metrics.gauge("hint_cache_entries", "Hint lists held by the dictionaries' LRU caches", fn=lambda: dictionary_registry.hint_stats()["size"])
+metrics.counter("hint_cache_hits_total", "Hint lookups answered from the cache", fn=lambda: dictionary_registry.hint_stats()["hits"])
+metrics.counter("hint_cache_misses_total", "Hint lookups that built a hint list", fn=lambda: dictionary_registry.hint_stats()["misses"])
+metrics.counter("hint_cache_evictions_total", "Hint lists evicted from the caches", fn=lambda: dictionary_registry.hint_stats()["evictions"])
+metrics.gauge("hint_cache_hit_ratio", "Share of hint lookups answered from the cache", fn=lambda: dictionary_registry.hint_stats()["hit_rate"])
+metrics.gauge("room_codes_capacity", "Size of the room code space", fn=lambda: game_manager.code_allocator.capacity)
+metrics.gauge("room_codes_in_use", "Room codes currently allocated", fn=lambda: game_manager.code_allocator.in_use)
+metrics.gauge("room_codes_available", "Room codes that can still be allocated", fn=lambda: game_manager.code_allocator.available)
+rooms_evicted = metrics.counter("rooms_evicted_total", "Rooms removed by the sweeper")
+
+async def handle_command(game: WordBasketGame, room_code: str, command: RoomCommand) -> Optional[bool]:
+    """Returns False when the command left the room as it was (so bots need not look at it again)."""
+    if command.kind == "voting_timeout":
+        await handle_voting_timeout(game, room_code, command.data.get("move_id"))
+        return
+    if command.kind == "add_bot":
+        if game.status != "waiting" or bot_count(game) >= MAX_BOTS_PER_ROOM:
+            return False
+        await add_bot(game, room_code, command.data.get("player_id"), command.data.get("think_time"))
+        return
+
+    player = game.players.get(command.player_id)
+    if not player:
+        return False
+    if command.kind == "bot_turn":
+        return await handle_bot_turn(game, room_code, player)
+    if command.kind == "join":
+        await handle_join(game, room_code, player, command.data.get("is_reconnect", False))
+    elif command.kind == "action":
+        await handle_action(game, room_code, player, command.connection, command.data)
+    elif command.kind == "leave":
+        if command.player_id in manager.active_connections.get(room_code, {}):
+            # Already reconnected
+            return
+        await handle_leave(game, room_code, player)
+
+async def add_bot(game: WordBasketGame, room_code: str, player_id: str = None, think_time=None):
+    player_id = player_id or new_bot_id()
+    if not isinstance(think_time, (int, float)):
+        think_time = BOT_THINK_TIME
+    name = bot_name(game)
+    game.add_player(player_id, name)
+    get_room_actor(room_code).bots[player_id] = BotPlayer(player_id, think_time)
+    await broadcast_game_state(game, room_code, message=f"{name}が参加しました")
+
+async def handle_bot_turn(game: WordBasketGame, room_code: str, player) -> bool:
+    bot = get_room_actor(room_code).bot(player.player_id)
+    if bot is None:
+        return False
+    started = time.perf_counter()
+    data = bot.choose_action(game)
+    bot_decision.observe(time.perf_counter() - started)
+    if data is None:
+        return False
+    bot_actions.get(data["action"]).inc()
+    await handle_action(game, room_code, player, None, data)
+    return True
+
+async def handle_join(game: WordBasketGame, room_code: str, player, is_reconnect: bool):
+    # Broadcast room update
+    msg = f"{player.name}さんが再接続しました" if is_reconnect else f"{player.name}さんが参加しました"
+    
+    # If game is finished, send game_over and ranks
+    if game.status == "finished":
+        await broadcast_game_state(
+            game, 
+            room_code, 
+            message=msg, 
+            game_over=True, 
+            winner=game.finished_players[0].name if game.finished_players else None,
+            ranks=[p.to_dict() for p in game.finished_players]
+        )
+    else:
+        await broadcast_game_state(game, room_code, message=msg)
+
+async def handle_action(game: WordBasketGame, room_code: str, player, connection: ClientConnection, data: dict):
+    player_id = player.player_id
+    action = data.get("action")
+    
+    if action == "start_game":
+        if player.is_host:
+            game.start_game()
+            await broadcast_game_state(game, room_code, message=f"{player.name}さんがゲームを開始しました！")
+        else:
+            await manager.send_personal_message({"type": "error", "message": "ホストのみがゲームを開始できます"}, connection)
+    
+    elif action == "play_word":
+        word = data.get("word")
+        card_index = data.get("card_index")
+        
+        # Auto-select logic if needed (can be implemented on client or server)
+        if card_index == -1:
+            card_index = game.auto_select_card(player_id, word)
+            if card_index is None:
+                await manager.send_personal_message({"type": "error", "message": "この単語に使えるカードがありません"}, connection)
+                return
+
+        result = game.check_move(player_id, word, card_index)
+        
+        if result["valid"]:
+            msg = f"{player.name}さんが「{word}」を出しました！"
             
-            elif action == "play_word":
-                word = data.get("word")
-                card_index = data.get("card_index")
+            if result.get("waiting_for_finish"):
+                # Broadcast "Finishing Check" state - wait for approval/rejection
+                await broadcast_game_state(game, room_code, message=msg)
                 
-                # Auto-select logic if needed (can be implemented on client or server)
-                if card_index == -1:
-                    card_index = game.auto_select_card(player_id, word)
-                    if card_index is None:
-                        await manager.send_personal_message({"type": "error", "message": "この単語に使えるカードがありません"}, websocket)
-                        continue
-
-                result = game.check_move(player_id, word, card_index)
-                
-                if result["valid"]:
-                    msg = f"{player.name}さんが「{word}」を出しました！"
-                    
-                    if result.get("waiting_for_finish"):
-                        # Broadcast "Finishing Check" state - wait for approval/rejection
-                        await broadcast_game_state(game, room_code, message=msg)
+                # Start the voting timeout (replaces any earlier one for this room)
+                get_room_actor(room_code).schedule_voting_timeout(game)
+            elif result.get("game_over"):
+                # Should not happen with new logic, but keep for safety
+                msg = f"{player.name}さんがクリアしました！勝者: {player.name}"
+                await broadcast_game_state(game, room_code, message=msg, game_over=True, winner=player.name, ranks=result.get("ranks", []))
+            else:
+                await broadcast_game_state(game, room_code, message=msg)
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "approve":
+        result = game.approve_finish(player_id)
+        if result["success"]:
+            if result.get("all_voted"):
+                if result.get("approved"):
+                    # All voted and approved - finalize
+                    finish_result = game.confirm_finish()
+                    if finish_result:
+                        msg = f"{finish_result['finished_player']}さんが{finish_result['rank']}位で確定しました！"
                         
-                        # Start 10-second timeout
-                        asyncio.create_task(voting_timeout(game, room_code, 10))
-                    elif result.get("game_over"):
-                        # Should not happen with new logic, but keep for safety
-                        msg = f"{player.name}さんがクリアしました！勝者: {player.name}"
-                        await broadcast_game_state(game, room_code, message=msg, game_over=True, winner=player.name, ranks=result.get("ranks", []))
-                    else:
-                        await broadcast_game_state(game, room_code, message=msg)
-                else:
-                    await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "approve":
-                result = game.approve_finish(player_id)
-                if result["success"]:
-                    if result.get("all_voted"):
-                        if result.get("approved"):
-                            # All voted and approved - finalize
-                            finish_result = game.confirm_finish()
-                            if finish_result:
-                                msg = f"{finish_result['finished_player']}さんが{finish_result['rank']}位で確定しました！"
-                                
-                                # Debug log
-                                print(f"[DEBUG] confirm_finish result: game_over={finish_result['game_over']}, status={game.status}, ranks={finish_result['ranks']}")
-                                
-                                if finish_result['game_over']:
-                                    # Game is over - show results
-                                    msg += f" ゲーム終了！"
-                                    await broadcast_game_state(
-                                        game, 
-                                        room_code, 
-                                        message=msg, 
-                                        game_over=True, 
-                                        winner=finish_result['winner'], 
-                                        ranks=finish_result['ranks']
-                                    )
-                                else:
-                                    # Game continues with remaining players
-                                    msg += " ゲームを続けます。"
-                                    await broadcast_game_state(game, room_code, message=msg)
-                        else:
-                            # Rejected
-                            await broadcast_game_state(game, room_code, message=result["message"])
-                    else:
-                        # Not all voted yet
-                        await broadcast_game_state(game, room_code, message=f"{player.name}さんが承諾しました")
-                else:
-                    await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "reroll":
-                # Now acts as "exchange_hand"
-                card_index = data.get("card_index")
-                if card_index is None or card_index == -1:
-                     # If client didn't send index (old client?), try to use auto-select or fail
-                     # But UI should enforce it.
-                     await manager.send_personal_message({"type": "error", "message": "交換するカードを選択してください"}, websocket)
-                     continue
-
-                result = game.exchange_hand(player_id, card_index)
-                if result["success"]:
-                    await broadcast_game_state(game, room_code, message=f"{player.name}さんが手札を交換しました")
-                else:
-                    await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "rematch":
-                player = game.players.get(player_id)
-                if player:
-                    result = game.request_rematch(player_id)
-                    if result["success"]:
-                        if result["all_voted"]:
-                            # All players voted, start game
-                            game.start_game()
-                            await broadcast_game_state(game, room_code, message=result["message"])
+                        # Debug log
+                        print(f"[DEBUG] confirm_finish result: game_over={finish_result['game_over']}, status={game.status}, ranks={finish_result['ranks']}")
+                        
+                        if finish_result['game_over']:
+                            # Game is over - show results
+                            msg += f" ゲーム終了！"
+                            await broadcast_game_state(
+                                game, 
+                                room_code, 
+                                message=msg, 
+                                game_over=True, 
+                                winner=finish_result['winner'], 
+                                ranks=finish_result['ranks']
+                            )
                         else:
-                            # Waiting for more votes - send message only, don't change screen
-                            for pid, ws in manager.active_connections.get(room_code, {}).items():
-                                await manager.send_personal_message({
-                                    "type": "rematch_vote",
-                                    "message": result["message"],
-                                    "votes": len(game.rematch_votes),
-                                    "total": len(game.players)
-                                }, ws)
-                    else:
-                        await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "oppose":
-                result = game.oppose_move(player_id)
-                if result["success"]:
-                    msg = result["message"]
-                    if result.get("reverted"):
-                        msg = "拒否多数により、前の手が却下されました！"
-                    await broadcast_game_state(game, room_code, message=msg)
+                            # Game continues with remaining players
+                            msg += " ゲームを続けます。"
+                            await broadcast_game_state(game, room_code, message=msg)
                 else:
-                    await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
+                    # Rejected
+                    await broadcast_game_state(game, room_code, message=result["message"])
+            else:
+                # Not all voted yet
+                await broadcast_game_state(game, room_code, message=f"{player.name}さんが承諾しました")
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "reroll":
+        # Now acts as "exchange_hand"
+        card_index = data.get("card_index")
+        if card_index is None or card_index == -1:
+             # If client didn't send index (old client?), try to use auto-select or fail
+             # But UI should enforce it.
+             await manager.send_personal_message({"type": "error", "message": "交換するカードを選択してください"}, connection)
+             return
 
-            elif action == "set_priority":
-                priority = data.get("priority")
-                game.set_card_priority(player_id, priority)
-                # No broadcast needed, just personal update maybe?
-                await broadcast_game_state(game, room_code) # Update to reflect priority if we send it back
-            
-            elif action == "get_hand":
-                target_id = data.get("target_id")
-                if not target_id:
-                    await manager.send_personal_message({"type": "error", "message": "対象プレイヤーが指定されていません"}, websocket)
-                else:
-                    result = game.get_opponent_hand(player_id, target_id)
-                    if result["success"]:
-                        await manager.send_personal_message({
-                            "type": "view_hand",
-                            "target_name": result["target_name"],
-                            "hand": result["hand"]
-                        }, websocket)
-                    else:
-                        await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "set_special_card_pending":
-                card_index = data.get("card_index")
-                if card_index is None:
-                    await manager.send_personal_message({"type": "error", "message": "カードインデックスが指定されていません"}, websocket)
-                else:
-                    result = game.set_special_card_pending(player_id, card_index)
-                    if result["success"]:
-                        if result.get("immediate"):
-                            # 即時発動カード（ローテートスワップなど）
-                            await broadcast_game_state(game, room_code, message=result["message"])
-                        else:
-                            # 待機状態に設定
-                            await broadcast_game_state(game, room_code, message=result["message"])
-                    else:
-                        await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "cancel_pending_special_card":
-                result = game.cancel_pending_special_card(player_id)
-                if result["success"]:
+        result = game.exchange_hand(player_id, card_index)
+        if result["success"]:
+            await broadcast_game_state(game, room_code, message=f"{player.name}さんが手札を交換しました")
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "rematch":
+        player = game.players.get(player_id)
+        if player:
+            result = game.request_rematch(player_id)
+            if result["success"]:
+                if result["all_voted"]:
+                    # All players voted, start game
+                    game.start_game()
                     await broadcast_game_state(game, room_code, message=result["message"])
                 else:
-                    await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
-            
-            elif action == "execute_select_swap":
-                target_player_id = data.get("target_player_id")
-                if not target_player_id:
-                    await manager.send_personal_message({"type": "error", "message": "対象プレイヤーが指定されていません"}, websocket)
+                    # Waiting for more votes - send message only, don't change screen
+                    await manager.broadcast({
+                        "type": "rematch_vote",
+                        "message": result["message"],
+                        "votes": len(game.rematch_votes),
+                        "total": len(game.players)
+                    }, room_code)
+            else:
+                await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "oppose":
+        # move_id: the move the client was looking at (it may no longer be the latest one)
+        move_id = data.get("move_id")
+        result = game.oppose_move(player_id, move_id if isinstance(move_id, int) else None)
+        if result["success"]:
+            msg = result["message"]
+            if result.get("reverted"):
+                msg = "拒否多数により、前の手が却下されました！"
+                if result.get("undone", 1) > 1:
+                    msg = f"拒否多数により、{result['undone']}手前まで取り消されました！"
+            await broadcast_game_state(game, room_code, message=msg)
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+
+    elif action == "resync":
+        # Client missed a patch (version mismatch): send it, and only it, a full snapshot
+        if connection is not None:
+            await send_state_snapshot(game, room_code, player, connection)
+
+    elif action == "set_priority":
+        priority = data.get("priority")
+        game.set_card_priority(player_id, priority)
+        # No broadcast needed, just personal update maybe?
+        await broadcast_game_state(game, room_code) # Update to reflect priority if we send it back
+    
+    elif action == "get_hand":
+        target_id = data.get("target_id")
+        if not target_id:
+            await manager.send_personal_message({"type": "error", "message": "対象プレイヤーが指定されていません"}, connection)
+        else:
+            result = game.get_opponent_hand(player_id, target_id)
+            if result["success"]:
+                await manager.send_personal_message({
+                    "type": "view_hand",
+                    "target_name": result["target_name"],
+                    "hand": result["hand"]
+                }, connection)
+            else:
+                await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "set_special_card_pending":
+        card_index = data.get("card_index")
+        if card_index is None:
+            await manager.send_personal_message({"type": "error", "message": "カードインデックスが指定されていません"}, connection)
+        else:
+            result = game.set_special_card_pending(player_id, card_index)
+            if result["success"]:
+                if result.get("immediate"):
+                    # 即時発動カード（ローテートスワップなど）
+                    await broadcast_game_state(game, room_code, message=result["message"])
                 else:
-                    result = game.execute_select_swap(player_id, target_player_id)
-                    if result["success"]:
-                        await broadcast_game_state(game, room_code, message=result["message"])
-                    else:
-                        await manager.send_personal_message({"type": "error", "message": result["message"]}, websocket)
+                    # 待機状態に設定
+                    await broadcast_game_state(game, room_code, message=result["message"])
+            else:
+                await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "cancel_pending_special_card":
+        result = game.cancel_pending_special_card(player_id)
+        if result["success"]:
+            await broadcast_game_state(game, room_code, message=result["message"])
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+    
+    elif action == "get_hint":
+        result = game.get_hints(player_id)
+        if result["success"]:
+            await manager.send_personal_message({
+                "type": "hint",
+                "target_char": result["target_char"],
+                "min_length": result["min_length"],
+                "hints": result["hints"]
+            }, connection)
+        else:
+            await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
 
-    except WebSocketDisconnect:
-        manager.disconnect(room_code, player_id)
-        
-        # Remove player from game if not started yet
-        if game.status == "waiting":
-            game.remove_player(player_id)
-            await broadcast_game_state(game, room_code, message=f"{player.name}さんが退出しました")
-        elif player.is_host:
-            # Host disconnected during game, end the game for everyone
-            await manager.broadcast({
-                "type": "return_to_title",
-                "message": "ホストが切断しました。タイトルに戻ります。"
-            }, room_code)
+    elif action == "add_bot":
+        if not player.is_host:
+            await manager.send_personal_message({"type": "error", "message": "ホストのみがボットを追加できます"}, connection)
+        elif game.status != "waiting":
+            await manager.send_personal_message({"type": "error", "message": "ゲーム開始前のみボットを追加できます"}, connection)
+        elif bot_count(game) >= MAX_BOTS_PER_ROOM:
+            await manager.send_personal_message({"type": "error", "message": f"ボットは{MAX_BOTS_PER_ROOM}体までです"}, connection)
         else:
-            # Normal player disconnected during game (remain in players list for reconnection)
-            await broadcast_game_state(game, room_code, message=f"{player.name}さんが切断しました")
+            await add_bot(game, room_code, think_time=data.get("think_time"))
 
-async def voting_timeout(game: WordBasketGame, room_code: str, timeout_seconds: int):
-    """Wait for timeout and force voting decision if still in finishing_check."""
-    await asyncio.sleep(timeout_seconds)
-    
-    # Check if still in finishing_check (voting might have already completed)
-    if game.status == "finishing_check":
+    elif action == "remove_bot":
+        target_id = data.get("player_id")
+        target = game.players.get(target_id) if isinstance(target_id, str) else None
+        if not player.is_host or game.status != "waiting" or target is None or not is_bot(target_id):
+            await manager.send_personal_message({"type": "error", "message": "このボットは外せません"}, connection)
+        else:
+            game.remove_player(target_id)
+            get_room_actor(room_code).bots.pop(target_id, None)
+            await broadcast_game_state(game, room_code, message=f"{target.name}が退出しました")
+
+    elif action == "execute_select_swap":
+        target_player_id = data.get("target_player_id")
+        if not target_player_id:
+            await manager.send_personal_message({"type": "error", "message": "対象プレイヤーが指定されていません"}, connection)
+        else:
+            result = game.execute_select_swap(player_id, target_player_id)
+            if result["success"]:
+                await broadcast_game_state(game, room_code, message=result["message"])
+            else:
+                await manager.send_personal_message({"type": "error", "message": result["message"]}, connection)
+
+async def handle_leave(game: WordBasketGame, room_code: str, player):
+    player_id = player.player_id
+    # Remove player from game if not started yet
+    if game.status == "waiting":
+        game.remove_player(player_id)
+        await broadcast_game_state(game, room_code, message=f"{player.name}さんが退出しました")
+    elif player.is_host:
+        # Host disconnected during game, end the game for everyone
+        game_manager.mark_abandoned(room_code)
+        await manager.broadcast({
+            "type": "return_to_title",
+            "message": "ホストが切断しました。タイトルに戻ります。"
+        }, room_code)
+    else:
+        # Normal player disconnected during game (remain in players list for reconnection)
+        await broadcast_game_state(game, room_code, message=f"{player.name}さんが切断しました")
+
+async def handle_voting_timeout(game: WordBasketGame, room_code: str, move_id: int = None):
+    """Force voting decision if still in finishing_check."""
+    # Check if still in finishing_check for the same move (voting might have already completed)
+    if game.status == "finishing_check" and (move_id is None or (game.last_move and game.last_move.move_id == move_id)):
         # Force decision based on current votes
-        finishing_player_id = game.pending_revert_state.get("player_id") if game.pending_revert_state else None
+        finishing_player_id = game.last_move.player_id if game.last_move else None
         active_players = [pid for pid in game.players.keys() if pid != finishing_player_id and game.players[pid].rank is None]
         
         approvals = len(game.approval_votes)
@@ -400,12 +1108,89 @@ async def voting_timeout(game: WordBasketGame, room_code: str, timeout_seconds:
                     msg += " ゲームを続けます。"
                     await broadcast_game_state(game, room_code, message=msg)
 
-async def broadcast_game_state(game: WordBasketGame, room_code: str, message: str = None, game_over: bool = False, winner: str = None, ranks: list = None):
+
+def publish_room_event(room_code: str, event: dict):
+    """Tell the other workers sharing the store (no-op for the in-memory store)."""
+    if game_manager.store.shared:
+        game_manager.store.publish(room_code, WORKER_ID, event)
+
+relay_errors = metrics.counter("room_event_relay_errors_total", "Exceptions caught by the room event relay")
+
+async def relay_room_events():
+    """Replay other workers' broadcasts to this worker's connections."""
+    store = game_manager.store
+    last_id = store.last_event_id()
+    last_housekeeping = time.monotonic()
+    while True:
+        await asyncio.sleep(ROOM_EVENT_POLL_INTERVAL)
+        try:
+            for event_id, room_code, origin, event in store.events_since(last_id):
+                last_id = event_id
+                if origin == WORKER_ID:
+                    continue
+                if event["kind"] == "evicted":
+                    evict_room(room_code)
+                elif event["kind"] == "state":
+                    # The room changed on another worker: show it to our clients and let our bots look at it
+                    actor = room_actors.get(room_code)
+                    runs_bots = actor is not None and actor.bots
+                    if room_code in manager.active_connections or runs_bots:
+                        game = game_manager.get_room(room_code)
+                        if game is not None:
+                            if room_code in manager.active_connections:
+                                await broadcast_game_state(game, room_code, publish=False, **event["state"])
+                            if runs_bots:
+                                actor.wake_bots(game)
+                elif event["kind"] == "message" and room_code in manager.active_connections:
+                    await manager.broadcast(event["message"], room_code, publish=False)
+            if time.monotonic() - last_housekeeping > 30:
+                last_housekeeping = time.monotonic()
+                store.refresh_presence(WORKER_ID)
+                store.prune_events()
+        except Exception as e:
+            relay_errors.inc()
+            print(f"[ERROR] room event relay: {e!r}")
+
+def build_personal_state(game: WordBasketGame, player) -> dict:
+    player_id = player.player_id
+    # Personal state
+    personal_state = {}
+    # Card objects (interned): cheap to diff, encoded from cached fragments
+    personal_state["my_hand"] = list(player.hand)
+    personal_state["my_player_id"] = player_id
+    personal_state["is_host"] = player.is_host
+    personal_state["my_priority"] = player.card_priority
+    personal_state["has_voted"] = player_id in game.approval_votes or player_id in game.opposition_votes
+    # 出せる単語がない場合は手札交換を提案
+    personal_state["playable_cards"] = game.get_playable_cards(player_id)
+    personal_state["suggest_exchange"] = game.is_stuck(player_id)
+    # 特殊カード情報を追加
+    personal_state["my_special_cards"] = [sc.to_dict() for sc in player.special_cards]
+    personal_state["my_pending_special_card"] = player.pending_special_card.to_dict() if player.pending_special_card else None
+    return personal_state
+
+async def send_state_snapshot(game: WordBasketGame, room_code: str, player, connection: ClientConnection):
+    """Full game_state at the room's current version, to one connection only (resync)."""
+    sync = manager.get_state_sync(room_code)
+    personal_state = build_personal_state(game, player)
+    common_state = sync.resend(player.player_id, personal_state)
+    if common_state is None:
+        # Nothing broadcast yet: the first broadcast is a snapshot for everyone anyway
+        await broadcast_game_state(game, room_code)
+        return
+    frame = BroadcastFrames(sync.version, common_state, {}).snapshot(connection.codec, personal_state)
+    manager.send(connection, frame, lambda: sync.forget(player.player_id))
+
+async def broadcast_game_state(game: WordBasketGame, room_code: str, message: str = None, game_over: bool = False, winner: str = None, ranks: list = None, publish: bool = True):
     # Construct state for each player
     # We need to send personalized state (own hand) + public state (others' hand counts)
     
+    tracer = room_tracers.get(room_code)
+    if tracer is not None:
+        broadcast_started = time.perf_counter()
+
     # Calculate active voting players (exclude finishing player and finished players)
-    finishing_player_id = game.pending_revert_state.get("player_id") if game.pending_revert_state else None
+    finishing_player_id = game.last_move.player_id if game.last_move else None
     active_voting_players = len([pid for pid in game.players.keys() 
                                   if pid != finishing_player_id and game.players[pid].rank is None])
     
@@ -428,12 +1213,13 @@ async def broadcast_game_state(game: WordBasketGame, room_code: str, message: st
         "active_voting_players": active_voting_players,
         "finishing_check": game.status == "finishing_check",
         "game_settings": game.game_settings,  # ゲーム設定を追加
-        "finishing_player_id": finishing_player_id
+        "finishing_player_id": finishing_player_id,
+        "last_move_id": game.last_move.move_id if game.last_move else None,
     }
     
     # Players info (public)
     players_info = []
-    active_players = manager.active_connections.get(room_code, {})
+    active_players = game_manager.store.connected_players(room_code)
     
     for p in game.players.values():
         p_dict = p.to_dict()
@@ -441,25 +1227,48 @@ async def broadcast_game_state(game: WordBasketGame, room_code: str, message: st
         players_info.append(p_dict)
     common_state["players_info"] = players_info
 
+    if tracer is not None:
+        tracer.add("state_build", broadcast_started)
+
+    # Only changed fields go to connections that already hold the previous version
+    sync = manager.get_state_sync(room_code)
+    common_changes = sync.update_common(common_state)
+    # The common part is encoded once for the whole room; each player adds only their own fields
+    frames = BroadcastFrames(sync.version, common_state, common_changes)
+
+    sent_messages = 0
+    sent_bytes = 0
     if room_code in manager.active_connections:
         for player_id, ws in manager.active_connections[room_code].items():
             player = game.players.get(player_id)
             if player:
-                # Personal state
-                personal_state = common_state.copy()
-                personal_state["my_hand"] = [c.to_dict() for c in player.hand]
-                personal_state["my_player_id"] = player_id
-                personal_state["is_host"] = player.is_host
-                personal_state["my_priority"] = player.card_priority
-                personal_state["has_voted"] = player_id in game.approval_votes or player_id in game.opposition_votes
-                # 特殊カード情報を追加
-                personal_state["my_special_cards"] = [sc.to_dict() for sc in player.special_cards]
-                personal_state["my_pending_special_card"] = player.pending_special_card.to_dict() if player.pending_special_card else None
-                
-                try:
-                    await ws.send_json(personal_state)
-                except Exception:
-                    pass
+                if tracer is not None:
+                    player_started = time.perf_counter()
+                personal_state = build_personal_state(game, player)
+                personal_changes = sync.prepare(player_id, personal_state)
+                if personal_changes is None:
+                    frame = frames.snapshot(ws.codec, personal_state)
+                else:
+                    frame = frames.patch(ws.codec, personal_changes)
+                # Dropped: the client will notice the version gap and resync
+                if not manager.send(ws, frame, lambda player_id=player_id: sync.forget(player_id)):
+                    continue
+                sent_messages += 1
+                sent_bytes += frames.last_size
+                if tracer is not None:
+                    tracer.add("encode", player_started, args={"player_id": player_id, "bytes": frames.last_size})
+        broadcast_messages.observe(sent_messages)
+        broadcast_bytes.observe(sent_bytes)
+        broadcast_messages_total.inc(sent_messages)
+        broadcast_bytes_total.inc(sent_bytes)
+    if tracer is not None:
+        tracer.add("broadcast", broadcast_started, args={"messages": sent_messages, "bytes": sent_bytes})
+
+    if publish:
+        # Other workers render the same event for their own connections
+        publish_room_event(room_code, {"kind": "state", "state": {
+            "message": message, "game_over": game_over, "winner": winner, "ranks": ranks,
+        }})
 
 # Get the directory of the current file
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
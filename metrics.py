@@ -0,0 +1,213 @@
+import bisect
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Metrics are only touched from the event loop thread, so plain attribute updates are enough (no locks).
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_name(name: str, labels: LabelKey) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+class Counter:
+    __slots__ = ("name", "help", "labels", "_value", "_fn")
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: LabelKey = (), fn: Callable[[], float] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._value = 0
+        # A total kept elsewhere (e.g. a cache's hit count), read at scrape time; it must only go up
+        self._fn = fn
+
+    @property
+    def value(self) -> float:
+        return self._fn() if self._fn is not None else self._value
+
+    def inc(self, amount: float = 1):
+        self._value += amount
+
+
+class Gauge:
+    __slots__ = ("name", "help", "labels", "_value", "_fn")
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: LabelKey = (), fn: Callable[[], float] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._value = 0
+        self._fn = fn
+
+    @property
+    def value(self) -> float:
+        return self._fn() if self._fn is not None else self._value
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        self._value += amount
+
+    def dec(self, amount: float = 1):
+        self._value -= amount
+
+
+class Histogram:
+    __slots__ = ("name", "help", "labels", "buckets", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: LabelKey = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th quantile (None if empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class MetricFamily:
+    """
+    One metric per value of a single label (e.g. a latency histogram per action).
+    Children are created on first use and cached, so the hot path is one dict lookup.
+    """
+    __slots__ = ("_create", "label", "_children")
+
+    def __init__(self, create: Callable[[Dict[str, str]], object], label: str):
+        self._create = create
+        self.label = label
+        self._children: Dict[str, object] = {}
+
+    def get(self, value: str):
+        child = self._children.get(value)
+        if child is None:
+            child = self._children[value] = self._create({self.label: value})
+        return child
+
+
+def _json_bound(value: Optional[float]):
+    if value == float("inf"):
+        return "+Inf"
+    return value
+
+
+def _prometheus_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _prometheus_name(name: str, labels: LabelKey) -> str:
+    if not labels:
+        return name
+    inner = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                     for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, LabelKey], object] = {}
+
+    def _get_or_create(self, cls, name: str, help: str, labels: Optional[Dict[str, str]], **kwargs):
+        key = (name, _label_key(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = cls(name, help, key[1], **kwargs)
+            self._metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, help: str = "", labels: Dict[str, str] = None, fn: Callable[[], float] = None) -> Counter:
+        return self._get_or_create(Counter, name, help, labels, fn=fn)
+
+    def gauge(self, name: str, help: str = "", labels: Dict[str, str] = None, fn: Callable[[], float] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labels, fn=fn)
+
+    def histogram(self, name: str, help: str = "", labels: Dict[str, str] = None, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def family(self, kind: str, name: str, help: str = "", label: str = "", **kwargs) -> MetricFamily:
+        """A MetricFamily of counters, gauges or histograms labelled by `label`."""
+        create = getattr(self, kind)
+        return MetricFamily(lambda labels: create(name, help, labels, **kwargs), label)
+
+    def metrics(self):
+        return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        by_name: Dict[str, list] = {}
+        for metric in self._metrics.values():
+            by_name.setdefault(metric.name, []).append(metric)
+        lines = []
+        for name, metrics in by_name.items():
+            lines.append(f"# HELP {name} {_escape_help(metrics[0].help)}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, n in zip(metric.buckets + (float("inf"),), metric.counts):
+                        cumulative += n
+                        labels = metric.labels + (("le", _prometheus_number(bound)),)
+                        lines.append(f"{_prometheus_name(name + '_bucket', labels)} {cumulative}")
+                    lines.append(f"{_prometheus_name(name + '_sum', metric.labels)} {_prometheus_number(metric.sum)}")
+                    lines.append(f"{_prometheus_name(name + '_count', metric.labels)} {metric.count}")
+                else:
+                    lines.append(f"{_prometheus_name(name, metric.labels)} {_prometheus_number(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view of every metric."""
+        result = {}
+        for metric in self._metrics.values():
+            name = format_name(metric.name, metric.labels)
+            if isinstance(metric, Histogram):
+                result[name] = {
+                    "count": metric.count,
+                    "sum": metric.sum,
+                    "p50": _json_bound(metric.percentile(0.5)),
+                    "p99": _json_bound(metric.percentile(0.99)),
+                }
+            else:
+                result[name] = metric.value
+        return result
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Dict, Iterator, NamedTuple, Optional, Set
+
+
+class Move(NamedTuple):
+    """
+    One accepted word, with just enough to undo it.
+    Holds a card id and the (shared) previous word string rather than live objects.
+    """
+    move_id: int
+    player_id: str
+    card_id: int
+    hand_index: int
+    previous_word: str
+    was_finishing: bool
+
+
+class MoveHistory:
+    """
+    The last `capacity` moves of a room, newest on the right.
+
+    Backed by a deque with maxlen, so memory per room is fixed and the oldest move silently
+    drops off when a new one is recorded. Undo pops from the right in O(1). Move ids keep
+    increasing across undos, so a vote for a move that was undone or forgotten can never be
+    mistaken for a vote on a newer one.
+    Opposition votes are kept per move and dropped together with it.
+    """
+    __slots__ = ("_moves", "_votes", "_next_id")
+
+    def __init__(self, capacity: int = 32):
+        self._moves: deque = deque(maxlen=capacity)
+        self._votes: Dict[int, Set[str]] = {}
+        self._next_id = 1
+
+    @property
+    def capacity(self) -> int:
+        return self._moves.maxlen
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    def __iter__(self) -> Iterator[Move]:
+        """Oldest first."""
+        return iter(self._moves)
+
+    @property
+    def latest(self) -> Optional[Move]:
+        return self._moves[-1] if self._moves else None
+
+    def record(self, player_id: str, card_id: int, hand_index: int, previous_word: str, was_finishing: bool) -> Move:
+        if len(self._moves) == self._moves.maxlen:
+            self._votes.pop(self._moves[0].move_id, None)
+        move = Move(self._next_id, player_id, card_id, hand_index, previous_word, was_finishing)
+        self._next_id += 1
+        self._moves.append(move)
+        self._votes[move.move_id] = set()
+        return move
+
+    def get(self, move_id: int) -> Optional[Move]:
+        # Ids increase left to right: scan from the newest and stop once past it
+        for move in reversed(self._moves):
+            if move.move_id == move_id:
+                return move
+            if move.move_id < move_id:
+                break
+        return None
+
+    def votes(self, move_id: int) -> Set[str]:
+        """Players opposing a move still in the history (the set is live: add to it)."""
+        return self._votes.setdefault(move_id, set()) if self.get(move_id) else set()
+
+    def pop(self) -> Move:
+        move = self._moves.pop()
+        self._votes.pop(move.move_id, None)
+        return move
+
+    def clear(self):
+        self._moves.clear()
+        self._votes.clear()
@@ -0,0 +1,145 @@
+import math
+import os
+import random
+import threading
+import zlib
+from collections import deque
+from typing import Callable, Optional
+
+DIGITS = "0123456789"
+# Crockford base32 (no I, L, O, U)
+BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+ALPHABETS = {"digits": DIGITS, "base32": BASE32}
+
+
+def shard_for(room_code: str, shard_count: int) -> int:
+    """Shard that owns a room code (crc32 is stable across processes, unlike hash())."""
+    return zlib.crc32(room_code.strip().upper().encode("utf-8")) % shard_count
+
+
+def shard_filter(shard_index: int, shard_count: int) -> Optional[Callable[[str], bool]]:
+    """Allocator filter that only accepts the codes owned by one shard (None when unsharded)."""
+    if shard_count <= 1:
+        return None
+    return lambda code: shard_for(code, shard_count) == shard_index
+
+
+class RoomCodeAllocator:
+    """
+    Collision-free room codes with O(1) allocate/free.
+
+    Fresh codes come from a random affine permutation of the code space
+    (index -> (a * index + b) mod capacity, gcd(a, capacity) == 1), so every code is
+    visited exactly once in a scrambled order. Freed codes are reused first-in first-out
+    only after the fresh sequence runs out, so a just-closed room's code isn't handed out again right away.
+    """
+
+    def __init__(self, length: int = 4, alphabet: str = DIGITS, rng: random.Random = None,
+                 accept: Callable[[str], bool] = None):
+        if length < 1 or len(alphabet) < 2:
+            raise ValueError("Room codes need length >= 1 and at least 2 symbols")
+        self.length = length
+        self.alphabet = alphabet
+        self.capacity = len(alphabet) ** length
+        # Optional filter (e.g. "codes owned by this shard"); rejected codes are skipped, never allocated
+        self.accept = accept
+
+        rng = rng or random.Random()
+        self._multiplier = rng.randrange(1, self.capacity)
+        while math.gcd(self._multiplier, self.capacity) != 1:
+            self._multiplier = rng.randrange(1, self.capacity)
+        self._offset = rng.randrange(self.capacity)
+        self._inverse = pow(self._multiplier, -1, self.capacity)
+        self._next_index = 0
+        self._free = deque()
+        # Indexes of the fresh sequence reserved before it got to them (recovered rooms)
+        self._reserved = set()
+        self._lock = threading.Lock()
+        self.in_use = 0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "RoomCodeAllocator":
+        """ROOM_CODE_LENGTH (default 4) and ROOM_CODE_ALPHABET ("digits" or "base32")."""
+        length = int(os.environ.get("ROOM_CODE_LENGTH", 4))
+        alphabet = ALPHABETS.get(os.environ.get("ROOM_CODE_ALPHABET", "digits"), DIGITS)
+        return cls(length, alphabet, **kwargs)
+
+    def _encode(self, number: int) -> str:
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(self.length):
+            number, digit = divmod(number, base)
+            chars.append(self.alphabet[digit])
+        return "".join(reversed(chars))
+
+    def _decode(self, code: str) -> Optional[int]:
+        if len(code) != self.length:
+            return None
+        base = len(self.alphabet)
+        number = 0
+        for char in code:
+            digit = self.alphabet.find(char)
+            if digit < 0:
+                return None
+            number = number * base + digit
+        return number
+
+    def normalize(self, code: str) -> str:
+        return code.strip().upper()
+
+    def allocate(self) -> str:
+        with self._lock:
+            while self._next_index < self.capacity:
+                index = self._next_index
+                self._next_index += 1
+                if index in self._reserved:
+                    self._reserved.discard(index)
+                    continue
+                code = self._encode((self._multiplier * index + self._offset) % self.capacity)
+                if self.accept is None or self.accept(code):
+                    self.in_use += 1
+                    return code
+            if self._free:
+                self.in_use += 1
+                return self._free.popleft()
+        raise RuntimeError("No room codes available")
+
+    def reserve(self, code: str) -> bool:
+        """
+        Mark a code as in use without allocating it (a room recovered after a restart), so it is never
+        handed out while that room lives. Returns False if it isn't one of this allocator's free codes.
+        """
+        code = self.normalize(code)
+        number = self._decode(code)
+        if number is None or (self.accept is not None and not self.accept(code)):
+            return False
+        index = (number - self._offset) * self._inverse % self.capacity
+        with self._lock:
+            if index < self._next_index:
+                # The fresh sequence is past it: it can only come back through the free list
+                if code not in self._free:
+                    return False
+                self._free.remove(code)
+            elif index in self._reserved:
+                return False
+            else:
+                self._reserved.add(index)
+            self.in_use += 1
+        return True
+
+    def free(self, code: str):
+        if self.accept is not None and not self.accept(code):
+            # Another shard's code (e.g. a recovered or relayed room): never hand it out here
+            return
+        with self._lock:
+            self._free.append(code)
+            self.in_use = max(0, self.in_use - 1)  # a shared store may free codes another worker allocated
+
+    @property
+    def available(self) -> int:
+        """Codes that can still be handed out (an upper bound when a filter is set)."""
+        return self.capacity - self._next_index - len(self._reserved) + len(self._free)
+
+    def stats(self) -> dict:
+        return {"capacity": self.capacity, "in_use": self.in_use, "available": self.available}
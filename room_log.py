@@ -0,0 +1,227 @@
+import json
+import os
+import pickle
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+
+class RoomHistory(NamedTuple):
+    """What the log holds for one room: the latest snapshot (if any) and the records after it."""
+    room_code: str
+    snapshot: Optional[object]
+    records: List[dict]
+    last_seq: int
+
+
+class RoomLog:
+    """
+    Append-only journal of every room on local disk, so rooms survive a restart.
+
+    <directory>/<room_code>.log   one JSON record per line: {"seq": n, "op": "...", "args": [...]}
+                                  (the first record is {"op": "create"} with the RNG seed and settings)
+    <directory>/<room_code>.snap  pickled game and the last seq it includes (replaced atomically)
+
+    append() only buffers the record; a background thread writes all buffered records and fsyncs
+    each touched file once per batch (group commit), so a move costs the event loop a list append.
+    A crash loses at most the last flush interval. Every snapshot_every records the game is
+    snapshotted and the log truncated, which bounds both the log size and the replay time.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 0.05, snapshot_every: int = 200, fsync: bool = True):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        # room_code -> last seq handed out / records since the last snapshot
+        self._seq: Dict[str, int] = {}
+        self._since_snapshot: Dict[str, int] = {}
+        # room_code -> entries waiting for the writer, in order
+        self._pending: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self.batches = 0
+        self.fsyncs = 0
+        self._writer = threading.Thread(target=self._run, name="room-log-writer", daemon=True)
+        self._writer.start()
+
+    def _path(self, room_code: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{room_code}.{suffix}")
+
+    def _queue(self, room_code: str, entry: tuple):
+        with self._lock:
+            self._pending.setdefault(room_code, []).append(entry)
+
+    # --- called from the event loop -------------------------------------------------------
+
+    def create(self, room_code: str, seed: int, settings: Optional[dict]):
+        self._seq[room_code] = 0
+        self._since_snapshot[room_code] = 0
+        line = json.dumps({"seq": 0, "op": "create", "seed": seed, "settings": settings}, ensure_ascii=False)
+        # A reused room code starts from a clean slate
+        self._queue(room_code, ("reset",))
+        self._queue(room_code, ("record", line))
+
+    def attach(self, game):
+        """Journal every state-changing call on game from now on."""
+        room_code = game.room_code
+        game.journal = lambda op, args: self.append(room_code, op, args, game)
+
+    def append(self, room_code: str, op: str, args: tuple, game=None):
+        if game is not None and self._since_snapshot.get(room_code, 0) >= self.snapshot_every:
+            # Records are appended before the call runs, so the game is still at the previous seq
+            self.snapshot(game)
+        seq = self._seq.get(room_code, 0) + 1
+        self._seq[room_code] = seq
+        self._since_snapshot[room_code] = self._since_snapshot.get(room_code, 0) + 1
+        line = json.dumps({"seq": seq, "op": op, "args": list(args)}, ensure_ascii=False)
+        self._queue(room_code, ("record", line))
+
+    def snapshot(self, game):
+        """Snapshot the room as of its last record; the log is truncated once the snapshot is on disk."""
+        room_code = game.room_code
+        seq = self._seq.get(room_code, 0)
+        self._since_snapshot[room_code] = 0
+        self._queue(room_code, ("snapshot", pickle.dumps({"seq": seq, "game": game}, pickle.HIGHEST_PROTOCOL)))
+
+    def delete(self, room_code: str):
+        self._seq.pop(room_code, None)
+        self._since_snapshot.pop(room_code, None)
+        self._queue(room_code, ("delete",))
+
+    # --- writer -------------------------------------------------------------------------
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[ERROR] room log write failed: {e!r}")
+
+    def flush(self):
+        """Write and fsync everything appended so far (also called by the writer thread)."""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            replaced = False
+            for room_code, entries in pending.items():
+                replaced |= self._write_room(room_code, entries)
+            if replaced and self.fsync:
+                self._fsync_directory()
+            self.batches += 1
+
+    def _write_room(self, room_code: str, entries: list) -> bool:
+        """Returns True if a file was created, replaced or removed (the directory needs an fsync)."""
+        log_path = self._path(room_code, "log")
+        replaced = False
+        lines = []
+        for entry in entries:
+            kind = entry[0]
+            if kind == "record":
+                lines.append(entry[1])
+            elif kind == "reset":
+                lines = []
+                with open(log_path, "w"):
+                    pass
+                if os.path.exists(self._path(room_code, "snap")):
+                    os.remove(self._path(room_code, "snap"))
+                replaced = True
+            elif kind == "snapshot":
+                # The snapshot covers every record queued before it
+                self._append_lines(log_path, lines)
+                lines = []
+                self._write_snapshot(room_code, entry[1])
+                with open(log_path, "w"):
+                    pass
+                replaced = True
+            elif kind == "delete":
+                lines = []
+                for path in (log_path, self._path(room_code, "snap")):
+                    if os.path.exists(path):
+                        os.remove(path)
+                replaced = True
+        self._append_lines(log_path, lines)
+        return replaced
+
+    def _append_lines(self, path: str, lines: List[str]):
+        if not lines:
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+                self.fsyncs += 1
+
+    def _write_snapshot(self, room_code: str, data: bytes):
+        path = self._path(room_code, "snap")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+                self.fsyncs += 1
+        os.replace(tmp_path, path)
+
+    def _fsync_directory(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return  # Windows: directory entries can't be fsynced
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+            self.fsyncs += 1
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._closed.set()
+        self._writer.join()
+        self.flush()
+
+    # --- recovery -----------------------------------------------------------------------
+
+    def load(self) -> List[RoomHistory]:
+        """Read every room back from disk (call before any append)."""
+        rooms = {name.rsplit(".", 1)[0] for name in os.listdir(self.directory)
+                 if name.endswith(".log") or name.endswith(".snap")}
+        histories = []
+        for room_code in sorted(rooms):
+            snapshot, snapshot_seq = None, -1
+            snap_path = self._path(room_code, "snap")
+            if os.path.exists(snap_path):
+                with open(snap_path, "rb") as f:
+                    data = pickle.load(f)
+                snapshot, snapshot_seq = data["game"], data["seq"]
+            records = []
+            log_path = self._path(room_code, "log")
+            if os.path.exists(log_path):
+                with open(log_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            break  # torn write at the crash: nothing after it was acknowledged
+                        if record["seq"] > snapshot_seq:
+                            records.append(record)
+            last_seq = records[-1]["seq"] if records else max(snapshot_seq, 0)
+            self._seq[room_code] = last_seq
+            self._since_snapshot[room_code] = len(records)
+            histories.append(RoomHistory(room_code, snapshot, records, last_seq))
+        return histories
+
+    def stats(self) -> dict:
+        return {"rooms": len(self._seq), "batches": self.batches, "fsyncs": self.fsyncs}
+
+
+def room_log_from_env() -> Optional[RoomLog]:
+    """ROOM_LOG_DIR enables the journal; ROOM_LOG_FLUSH_INTERVAL and ROOM_LOG_SNAPSHOT_EVERY tune it."""
+    directory = os.environ.get("ROOM_LOG_DIR")
+    if not directory:
+        return None
+    return RoomLog(directory,
+                   flush_interval=float(os.environ.get("ROOM_LOG_FLUSH_INTERVAL", 0.05)),
+                   snapshot_every=int(os.environ.get("ROOM_LOG_SNAPSHOT_EVERY", 200)))
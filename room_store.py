@@ -0,0 +1,318 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+
+class RoomSummary(NamedTuple):
+    """What the sweeper (and the metrics) need to know about a room, without loading the game."""
+    room_code: str
+    status: str
+    last_activity: float
+    abandoned: bool
+    players: int
+
+
+class RoomBusy(Exception):
+    """Another process holds the store's write lock: nothing was read or changed, try again later."""
+
+
+class RoomStore:
+    """
+    Where GameManager keeps its rooms.
+
+    shared=False: rooms live in this process only (one worker).
+    shared=True: every worker process sees the same rooms; games are loaded and saved
+    around each mutation, and broadcasts must be relayed through publish()/events_since().
+    """
+    shared = False
+
+    def clock(self) -> float:
+        return time.monotonic()
+
+    def get(self, room_code: str):
+        raise NotImplementedError
+
+    def add(self, room_code: str, game) -> bool:
+        """Insert a new room. Returns False if the code is already taken."""
+        raise NotImplementedError
+
+    def mutate(self, room_code: str):
+        """
+        Context manager yielding the room's game (or None); changes are saved on a clean exit.
+        Raises RoomBusy on entry when the room can't be checked out right away.
+        """
+        raise NotImplementedError
+
+    def delete(self, room_code: str) -> bool:
+        raise NotImplementedError
+
+    def touch(self, room_code: str, now: float = None):
+        raise NotImplementedError
+
+    def mark_abandoned(self, room_code: str):
+        raise NotImplementedError
+
+    def summaries(self) -> List[RoomSummary]:
+        raise NotImplementedError
+
+    def set_connected(self, room_code: str, player_id: str, worker_id: str, connected: bool):
+        raise NotImplementedError
+
+    def connected_players(self, room_code: str) -> Set[str]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, room_code: str) -> bool:
+        return self.get(room_code) is not None
+
+
+class InMemoryRoomStore(RoomStore):
+    """Rooms as live objects in a dict (the default; single worker)."""
+
+    def __init__(self):
+        self.games: Dict[str, object] = {}
+        # room_code -> clock() of the last command
+        self.last_activity: Dict[str, float] = {}
+        # Rooms that can never resume (host left mid-game); evicted on the next sweep
+        self.abandoned: Set[str] = set()
+        self.connections: Dict[str, Set[str]] = {}
+
+    def get(self, room_code: str):
+        return self.games.get(room_code)
+
+    def add(self, room_code: str, game) -> bool:
+        if room_code in self.games:
+            return False
+        self.games[room_code] = game
+        return True
+
+    @contextmanager
+    def mutate(self, room_code: str):
+        # The game object is shared, so there is nothing to save
+        yield self.games.get(room_code)
+
+    def delete(self, room_code: str) -> bool:
+        self.last_activity.pop(room_code, None)
+        self.abandoned.discard(room_code)
+        self.connections.pop(room_code, None)
+        return self.games.pop(room_code, None) is not None
+
+    def touch(self, room_code: str, now: float = None):
+        if room_code in self.games:
+            self.last_activity[room_code] = self.clock() if now is None else now
+
+    def mark_abandoned(self, room_code: str):
+        if room_code in self.games:
+            self.abandoned.add(room_code)
+
+    def summaries(self) -> List[RoomSummary]:
+        now = self.clock()
+        return [RoomSummary(code, game.status, self.last_activity.get(code, now), code in self.abandoned, len(game.players))
+                for code, game in self.games.items()]
+
+    def set_connected(self, room_code: str, player_id: str, worker_id: str, connected: bool):
+        if connected:
+            self.connections.setdefault(room_code, set()).add(player_id)
+        elif room_code in self.connections:
+            self.connections[room_code].discard(player_id)
+            if not self.connections[room_code]:
+                del self.connections[room_code]
+
+    def connected_players(self, room_code: str) -> Set[str]:
+        return set(self.connections.get(room_code, ()))
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def __contains__(self, room_code: str) -> bool:
+        return room_code in self.games
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room_code TEXT PRIMARY KEY,
+    state BLOB NOT NULL,
+    status TEXT NOT NULL,
+    last_activity REAL NOT NULL,
+    abandoned INTEGER NOT NULL DEFAULT 0,
+    players INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS presence (
+    room_code TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (room_code, player_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_code TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteRoomStore(RoomStore):
+    """
+    Rooms pickled into a local SQLite database (WAL mode), shared by every worker on the host.
+
+    mutate() holds a write transaction (BEGIN IMMEDIATE) from load to save, which serializes
+    commands for the same room across processes. Callers must not suspend (await anything that
+    yields to the event loop) while a room is checked out: the connection is shared by the
+    worker's coroutines. mutate() waits at most MUTATE_BUSY_TIMEOUT for another process's
+    transaction and then raises RoomBusy, so a caller on the event loop can back off without blocking it.
+    Broadcast events are rows in the same database, so an event published inside mutate() is
+    committed together with the state it describes.
+    """
+    shared = True
+
+    # Presence rows not refreshed for this long belong to a dead worker
+    PRESENCE_TTL = 90.0
+    EVENT_RETENTION = 60.0
+    # Seconds a statement waits for another process's write lock (mutate() waits MUTATE_BUSY_TIMEOUT)
+    BUSY_TIMEOUT = 10.0
+    MUTATE_BUSY_TIMEOUT = 0.05
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=self.BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rooms)")}
+        if "players" not in columns:
+            # Databases created before the player count was kept
+            self._conn.execute("ALTER TABLE rooms ADD COLUMN players INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.RLock()
+        self._in_transaction = False
+
+    def clock(self) -> float:
+        # Wall clock: timestamps are compared across processes
+        return time.time()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            if self._in_transaction:
+                raise RuntimeError("A room is already checked out on this connection")
+            self._conn.execute(f"PRAGMA busy_timeout = {int(self.MUTATE_BUSY_TIMEOUT * 1000)}")
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e) or "busy" in str(e):
+                    raise RoomBusy(self.path) from e
+                raise
+            finally:
+                self._conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)}")
+            self._in_transaction = True
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._in_transaction = False
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def get(self, room_code: str):
+        row = self._execute("SELECT state FROM rooms WHERE room_code = ?", (room_code,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def add(self, room_code: str, game) -> bool:
+        try:
+            self._execute(
+                "INSERT INTO rooms (room_code, state, status, last_activity, players) VALUES (?, ?, ?, ?, ?)",
+                (room_code, pickle.dumps(game, pickle.HIGHEST_PROTOCOL), game.status, self.clock(), len(game.players)))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    @contextmanager
+    def mutate(self, room_code: str):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state FROM rooms WHERE room_code = ?", (room_code,)).fetchone()
+            game = pickle.loads(row[0]) if row else None
+            yield game
+            if game is not None:
+                conn.execute("UPDATE rooms SET state = ?, status = ?, players = ? WHERE room_code = ?",
+                             (pickle.dumps(game, pickle.HIGHEST_PROTOCOL), game.status, len(game.players), room_code))
+
+    def delete(self, room_code: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM rooms WHERE room_code = ?", (room_code,))
+            self._conn.execute("DELETE FROM presence WHERE room_code = ?", (room_code,))
+        return cursor.rowcount > 0
+
+    def touch(self, room_code: str, now: float = None):
+        self._execute("UPDATE rooms SET last_activity = ? WHERE room_code = ?",
+                      (self.clock() if now is None else now, room_code))
+
+    def mark_abandoned(self, room_code: str):
+        self._execute("UPDATE rooms SET abandoned = 1 WHERE room_code = ?", (room_code,))
+
+    def summaries(self) -> List[RoomSummary]:
+        rows = self._execute("SELECT room_code, status, last_activity, abandoned, players FROM rooms").fetchall()
+        return [RoomSummary(code, status, last_activity, bool(abandoned), players)
+                for code, status, last_activity, abandoned, players in rows]
+
+    def set_connected(self, room_code: str, player_id: str, worker_id: str, connected: bool):
+        if connected:
+            self._execute(
+                "INSERT OR REPLACE INTO presence (room_code, player_id, worker_id, seen_at) VALUES (?, ?, ?, ?)",
+                (room_code, player_id, worker_id, self.clock()))
+        else:
+            # Only the worker holding the connection may clear it (a reconnect may have moved it)
+            self._execute("DELETE FROM presence WHERE room_code = ? AND player_id = ? AND worker_id = ?",
+                          (room_code, player_id, worker_id))
+
+    def refresh_presence(self, worker_id: str):
+        self._execute("UPDATE presence SET seen_at = ? WHERE worker_id = ?", (self.clock(), worker_id))
+
+    def connected_players(self, room_code: str) -> Set[str]:
+        rows = self._execute("SELECT player_id FROM presence WHERE room_code = ? AND seen_at > ?",
+                             (room_code, self.clock() - self.PRESENCE_TTL)).fetchall()
+        return {row[0] for row in rows}
+
+    def publish(self, room_code: str, origin: str, event: dict):
+        self._execute("INSERT INTO events (room_code, origin, payload, created_at) VALUES (?, ?, ?, ?)",
+                      (room_code, origin, pickle.dumps(event, pickle.HIGHEST_PROTOCOL), self.clock()))
+
+    def last_event_id(self) -> int:
+        return self._execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def events_since(self, last_id: int) -> List[Tuple[int, str, str, dict]]:
+        rows = self._execute("SELECT id, room_code, origin, payload FROM events WHERE id > ? ORDER BY id",
+                             (last_id,)).fetchall()
+        return [(event_id, room_code, origin, pickle.loads(payload)) for event_id, room_code, origin, payload in rows]
+
+    def prune_events(self):
+        self._execute("DELETE FROM events WHERE created_at < ?", (self.clock() - self.EVENT_RETENTION,))
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+
+    def __contains__(self, room_code: str) -> bool:
+        return self._execute("SELECT 1 FROM rooms WHERE room_code = ?", (room_code,)).fetchone() is not None
+
+
+def store_from_env() -> RoomStore:
+    """ROOM_STORE=memory (default) or sqlite; ROOM_STORE_PATH for the SQLite file."""
+    kind = os.environ.get("ROOM_STORE", "memory")
+    if kind == "sqlite":
+        path = os.environ.get("ROOM_STORE_PATH", os.path.join(tempfile.gettempdir(), "word_basket_rooms.sqlite3"))
+        return SQLiteRoomStore(path)
+    return InMemoryRoomStore()
@@ -0,0 +1,100 @@
+from typing import Dict, Optional
+
+# Per-broadcast event fields: always sent, never diffed
+EVENT_FIELDS = ("message", "game_over", "winner", "ranks")
+
+
+def diff_state(old: Optional[dict], new: dict) -> dict:
+    """Top-level keys of new whose value differs from old."""
+    if old is None:
+        return dict(new)
+    return {key: value for key, value in new.items() if key not in old or old[key] != value}
+
+
+def drops_keys(old: Optional[dict], new: dict) -> bool:
+    """A patch can't remove a key (clients merge it into their copy): such a change needs a snapshot."""
+    return old is not None and not old.keys() <= new.keys()
+
+
+class RoomStateSync:
+    """
+    Versioned delta protocol for game_state broadcasts.
+    Each broadcast bumps the room version. A connection that received the previous version
+    gets a game_state_patch with only the changed fields; any other connection (new, reconnected,
+    or out of sync) gets a full game_state snapshot. So does everyone when a field disappears.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.common: Optional[dict] = None
+        self.personal: Dict[str, dict] = {}
+        self.delivered: Dict[str, int] = {}  # player_id -> last version sent
+
+    def update_common(self, common_state: dict) -> dict:
+        """Register a new common state and bump the version; returns the changed common fields."""
+        changes = diff_state(self.common, common_state)
+        if drops_keys(self.common, common_state):
+            # Nobody holds the previous version any more: everyone gets a snapshot
+            self.delivered.clear()
+        for field in EVENT_FIELDS:
+            if field in common_state:
+                changes[field] = common_state[field]
+        self.common = common_state
+        self.version += 1
+        return changes
+
+    def prepare(self, player_id: str, personal_state: dict) -> Optional[dict]:
+        """
+        Record that player_id is getting the current version.
+        Returns the changed personal fields if the player can take a patch, or None if it needs a snapshot.
+        """
+        version = self.version
+        previous_personal = self.personal.get(player_id)
+        in_sync = (self.delivered.get(player_id) == version - 1 and previous_personal is not None
+                   and not drops_keys(previous_personal, personal_state))
+
+        self.personal[player_id] = personal_state
+        self.delivered[player_id] = version
+
+        if in_sync:
+            return diff_state(previous_personal, personal_state)
+        return None
+
+    def render(self, player_id: str, common_state: dict, common_changes: dict, personal_state: dict) -> dict:
+        """Build the message for one connection at the current version."""
+        version = self.version
+        personal_changes = self.prepare(player_id, personal_state)
+
+        if personal_changes is not None:
+            changes = dict(common_changes)
+            changes.update(personal_changes)
+            changes.pop("type", None)
+            return {
+                "type": "game_state_patch",
+                "version": version,
+                "base_version": version - 1,
+                "changes": changes,
+            }
+
+        snapshot = dict(common_state)
+        snapshot.update(personal_state)
+        snapshot["version"] = version
+        return snapshot
+
+    def resend(self, player_id: str, personal_state: dict) -> Optional[dict]:
+        """
+        The current version again, as a snapshot for one player (resync after a missed patch).
+        The version doesn't change, so the rest of the room is unaffected. None before the first broadcast.
+        """
+        if self.common is None:
+            return None
+        self.forget(player_id)
+        self.prepare(player_id, personal_state)
+        # The last broadcast's message was already shown
+        common_state = dict(self.common, message=None)
+        return common_state
+
+    def forget(self, player_id: str):
+        """Next message to this player will be a full snapshot (reconnect / resync / failed send)."""
+        self.personal.pop(player_id, None)
+        self.delivered.pop(player_id, None)
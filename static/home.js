@@ -109,7 +109,7 @@ if (els.createRoomBtn) {
 if (els.joinRoomBtn) {
     els.joinRoomBtn.addEventListener('click', () => {
         const playerName = els.joinNameInput.value.trim();
-        const roomCode = els.roomCodeInput.value.trim();
+        const roomCode = els.roomCodeInput.value.trim().toUpperCase();
 
         if (!playerName || !roomCode) {
             alert('プレイヤー名とルームコードを入力してください');
@@ -257,10 +257,13 @@ console.log("Home screen functionality loaded");
 function collectSettings() {
     const isEnabled = document.getElementById('enable-special-cards').checked;
     const cardsPerPlayer = parseInt(document.getElementById('cards-per-player').value) || 0;
+    const strictDictionaryEl = document.getElementById('strict-dictionary');
+    const strictDictionary = strictDictionaryEl ? strictDictionaryEl.checked : false;
 
     if (!isEnabled || cardsPerPlayer === 0) {
         return {
             initial_hand_size: 7,
+            strict_dictionary: strictDictionary,
             num_special_cards_per_player: 0,
             special_cards_enabled: {
                 draw2: 0,
@@ -275,6 +278,7 @@ function collectSettings() {
 
     return {
         initial_hand_size: 7,
+        strict_dictionary: strictDictionary,
         num_special_cards_per_player: cardsPerPlayer,
         special_cards_enabled: {
             draw2: parseInt(document.getElementById('draw2-count').value) || 0,
@@ -305,6 +309,11 @@ function loadSettings() {
             enableCheckbox.checked = isEnabled;
         }
 
+        const strictDictionaryEl = document.getElementById('strict-dictionary');
+        if (strictDictionaryEl) {
+            strictDictionaryEl.checked = !!settings.strict_dictionary;
+        }
+
         const cardsPerPlayerInput = document.getElementById('cards-per-player');
         if (cardsPerPlayerInput) {
             cardsPerPlayerInput.value = settings.num_special_cards_per_player || 2;
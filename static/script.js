@@ -16,6 +16,7 @@ const els = {
     copyCodeBtn: document.getElementById('copy-code-btn'),
     playersList: document.getElementById('players-list'),
     startGameBtn: document.getElementById('start-game-btn'),
+    addBotBtn: document.getElementById('add-bot-btn'),
     waitingMessage: document.getElementById('waiting-message'),
 
     // Game
@@ -30,6 +31,7 @@ const els = {
     hand: document.getElementById('hand'),
     handLabel: document.getElementById('hand-label'),
     rerollBtn: document.getElementById('reroll-btn'),
+    hintBtn: document.getElementById('hint-btn'),
     opposeBtn: document.getElementById('oppose-btn'),
     approveBtn: document.getElementById('approve-btn'),
     menuBtn: document.getElementById('menu-btn'),
@@ -82,10 +84,15 @@ let state = {
     reconnectTimer: null,
     finishingCountdown: null, // Timer for countdown display
     isOpposing: false, // Toggle state for opposition
+    lastMoveId: null, // Move the oppose button refers to
     // Special Cards
     specialCards: [],
     pendingSpecialCard: null,
-    selectedPlayerForSwap: null
+    selectedPlayerForSwap: null,
+    exchangeSuggested: false,
+    // Versioned game_state (delta protocol)
+    gameState: null,
+    stateVersion: null
 };
 
 // --- Initialization ---
@@ -104,6 +111,7 @@ function setupEventListeners() {
     // Waiting
     els.copyCodeBtn.addEventListener('click', copyRoomCode);
     els.startGameBtn.addEventListener('click', sendStartGame);
+    els.addBotBtn.addEventListener('click', sendAddBot);
 
     // Game
     els.submitBtn.addEventListener('click', submitWord);
@@ -113,6 +121,7 @@ function setupEventListeners() {
     els.wordInput.addEventListener('input', handleInput);
     els.wordInput.addEventListener('input', handleInput);
     els.rerollBtn.addEventListener('click', sendReroll);
+    els.hintBtn.addEventListener('click', sendGetHint);
     els.opposeBtn.addEventListener('click', sendOppose);
     els.approveBtn.addEventListener('click', sendApprove);
     els.voteApproveBtn.addEventListener('click', sendApprove);
@@ -183,13 +192,13 @@ async function createRoom() {
 
 function joinRoom() {
     const name = els.playerNameInput.value.trim();
-    const code = els.roomCodeInput.value.trim();
+    const code = els.roomCodeInput.value.trim().toUpperCase();
 
     if (!name) {
         alert("名前を入力してください");
         return;
     }
-    if (!code || code.length !== 4) {
+    if (!code) {
         alert("正しいルームコードを入力してください");
         return;
     }
@@ -199,6 +208,9 @@ function joinRoom() {
     connectWebSocket();
 }
 
+const WIRE_MSGPACK = 'wordbasket.msgpack.v1';
+const WIRE_JSON = 'wordbasket.json.v1';
+
 function connectWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     let wsUrl = `${protocol}//${window.location.host}/ws/${state.roomCode}/${encodeURIComponent(state.playerName)}`;
@@ -208,7 +220,16 @@ function connectWebSocket() {
         wsUrl += `?player_id=${state.playerId}`;
     }
 
-    state.ws = new WebSocket(wsUrl);
+    // Offer the binary format first; the server falls back to JSON when it can't speak it.
+    // ?wire=json forces JSON (handy for reading frames in devtools)
+    const wire = new URLSearchParams(window.location.search).get('wire');
+    const subprotocols = wire === 'json' ? [WIRE_JSON] : [WIRE_MSGPACK, WIRE_JSON];
+
+    state.ws = new WebSocket(wsUrl, subprotocols);
+    state.ws.binaryType = 'arraybuffer';
+    state.wireKeys = null;
+    state.gameState = null;
+    state.stateVersion = null;
 
     state.ws.onopen = () => {
         console.log("Connected to WebSocket");
@@ -222,8 +243,17 @@ function connectWebSocket() {
     };
 
     state.ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        handleMessage(data);
+        if (typeof event.data === 'string') {
+            handleMessage(JSON.parse(event.data));
+            return;
+        }
+        const decoded = MsgPack.decode(event.data);
+        if (decoded.type === 'wire_schema') {
+            // First binary frame: key table for the short-key schema
+            state.wireKeys = decoded.keys;
+            return;
+        }
+        handleMessage(MsgPack.expandKeys(decoded, state.wireKeys || []));
     };
 
     state.ws.onclose = (event) => {
@@ -232,6 +262,9 @@ function connectWebSocket() {
             alert("ルームが見つかりません");
             showScreen('lobby-screen');
             clearPlayerState();
+        } else if (event.code === 4001) {
+            // Same player connected from another tab/device: don't fight over the connection
+            showMessage("別の接続に切り替わりました", true);
         } else {
             // Attempt auto-reconnect
             console.log("Attempting to reconnect...");
@@ -255,7 +288,19 @@ function handleMessage(data) {
     console.log("Received message:", data.type, data);
 
     if (data.type === 'game_state') {
+        // Full snapshot
+        state.gameState = data;
+        state.stateVersion = data.version;
         updateGameState(data);
+    } else if (data.type === 'game_state_patch') {
+        if (!state.gameState || data.base_version !== state.stateVersion) {
+            // Missed an update: ask the server for a full snapshot
+            requestResync();
+            return;
+        }
+        state.gameState = Object.assign({}, state.gameState, data.changes);
+        state.stateVersion = data.version;
+        updateGameState(state.gameState);
     } else if (data.type === 'error') {
         showMessage(data.message, true);
     } else if (data.type === 'return_to_title') {
@@ -269,6 +314,12 @@ function handleMessage(data) {
     } else if (data.type === 'view_hand') {
         console.log("Received view_hand message");
         showHandViewerModal(data.target_name, data.hand);
+    } else if (data.type === 'hint') {
+        if (data.hints.length === 0) {
+            showMessage('出せる単語が見つかりません。手札交換しましょう', false);
+        } else {
+            showMessage('ヒント: ' + data.hints.map(h => `${h.card.display} → ${h.words.join('、')}`).join(' / '), false);
+        }
     } else if (data.type === 'rematch_vote') {
         // Update rematch button text with vote count
         els.rematchBtn.textContent = `もう一度遊ぶ (${data.votes}/${data.total})`;
@@ -276,10 +327,26 @@ function handleMessage(data) {
     }
 }
 
+function requestResync() {
+    state.gameState = null;
+    state.stateVersion = null;
+    if (state.ws && state.ws.readyState === WebSocket.OPEN) {
+        state.ws.send(JSON.stringify({ action: "resync" }));
+    }
+}
+
 function sendStartGame() {
     state.ws.send(JSON.stringify({ action: "start_game" }));
 }
 
+function sendGetHint() {
+    state.ws.send(JSON.stringify({ action: "get_hint" }));
+}
+
+function sendAddBot() {
+    state.ws.send(JSON.stringify({ action: "add_bot" }));
+}
+
 function sendPlayWord(word, cardIndex) {
     state.ws.send(JSON.stringify({
         action: "play_word",
@@ -318,7 +385,8 @@ function sendOppose() {
 
     // Send action if opposing
     if (state.isOpposing) {
-        state.ws.send(JSON.stringify({ action: "oppose" }));
+        // Name the move we are looking at, so a vote that arrives after the next move still hits this one
+        state.ws.send(JSON.stringify({ action: "oppose", move_id: state.lastMoveId }));
     }
 }
 
@@ -362,6 +430,7 @@ function updateGameState(data) {
     state.playerId = data.my_player_id;
     state.isHost = data.is_host;
     state.hand = data.my_hand || [];
+    state.lastMoveId = data.last_move_id ?? null;
     // 特殊カード情報を更新
     state.specialCards = data.my_special_cards || [];
     state.pendingSpecialCard = data.my_pending_special_card || null;
@@ -393,9 +462,11 @@ function updateGameState(data) {
 
         if (state.isHost) {
             els.startGameBtn.classList.remove('hidden');
+            els.addBotBtn.classList.remove('hidden');
             els.waitingMessage.classList.add('hidden');
         } else {
             els.startGameBtn.classList.add('hidden');
+            els.addBotBtn.classList.add('hidden');
             els.waitingMessage.classList.remove('hidden');
         }
     }
@@ -439,6 +510,17 @@ function updateGameState(data) {
             els.wordInput.placeholder = "単語を入力 (ひらがな)";
         }
 
+        // 出せる単語がない場合は手札交換を提案
+        if (data.suggest_exchange) {
+            els.rerollBtn.classList.add('suggested');
+            if (!state.exchangeSuggested) {
+                showMessage("辞書に出せる単語がありません。手札交換がおすすめです", false);
+            }
+        } else {
+            els.rerollBtn.classList.remove('suggested');
+        }
+        state.exchangeSuggested = !!data.suggest_exchange;
+
         // Reject button: always show during playing or finishing_check
         if (data.status === 'playing' || data.status === 'finishing_check') {
             els.opposeBtn.classList.remove('hidden');
@@ -1100,6 +1182,11 @@ function renderGameSettings(settings) {
     const totalSpecialCards = Object.values(specialCardsEnabled).reduce((sum, count) => sum + count, 0);
     const isEnabled = totalSpecialCards > 0 && numPerPlayer > 0;
 
+    html += `<div class="setting-item">
+        <span class="setting-label">辞書チェック</span>
+        <span class="setting-value">${settings.strict_dictionary ? '有効' : '無効'}</span>
+    </div>`;
+
     html += `<div class="setting-item">
         <span class="setting-label">特殊カード機能</span>
         <span class="setting-value">${isEnabled ? '有効' : '無効'}</span>
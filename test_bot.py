@@ -0,0 +1,132 @@
+import unittest
+from bot import BotPlayer, bot_name, is_bot, new_bot_id
+from game import WordBasketGame, Card
+
+def apply(game: WordBasketGame, player_id: str, data: dict) -> bool:
+    """Run a bot action the way main.handle_action does. Returns whether the game accepted it."""
+    action = data["action"]
+    if action == "play_word":
+        card_index = game.auto_select_card(player_id, data["word"])
+        if card_index is None:
+            return False
+        result = game.check_move(player_id, data["word"], card_index)
+        return result["valid"]
+    if action == "approve":
+        result = game.approve_finish(player_id)
+        if result.get("approved"):
+            game.confirm_finish()
+        return result["success"]
+    if action == "oppose":
+        return game.oppose_move(player_id, data["move_id"])["success"]
+    if action == "reroll":
+        return game.exchange_hand(player_id, data["card_index"])["success"]
+    if action == "set_special_card_pending":
+        return game.set_special_card_pending(player_id, data["card_index"])["success"]
+    if action == "cancel_pending_special_card":
+        return game.cancel_pending_special_card(player_id)["success"]
+    if action == "execute_select_swap":
+        return game.execute_select_swap(player_id, data["target_player_id"])["success"]
+    if action == "start_game":
+        game.start_game()
+        return True
+    if action == "rematch":
+        return game.request_rematch(player_id)["success"]
+    raise AssertionError(f"unexpected action {data}")
+
+class TestBotPlayer(unittest.TestCase):
+    def setUp(self):
+        self.game = WordBasketGame("test_room", seed=7)
+        self.bots = {}
+        for seed in range(3):
+            player_id = new_bot_id()
+            self.game.add_player(player_id, bot_name(self.game))
+            self.bots[player_id] = BotPlayer(player_id, seed=seed)
+
+    def test_names_and_ids(self):
+        self.assertEqual([p.name for p in self.game.players.values()], ["ボット1", "ボット2", "ボット3"])
+        self.assertTrue(all(is_bot(pid) for pid in self.game.players))
+        self.assertFalse(is_bot("3f2b"))
+
+    def test_bots_play_a_game_to_the_end(self):
+        host = next(iter(self.bots.values()))
+        self.assertEqual(host.choose_action(self.game), {"action": "start_game"})
+        apply(self.game, host.player_id, host.choose_action(self.game))
+
+        rejected = 0
+        for _ in range(2000):
+            if self.game.status == "finished":
+                break
+            acted = False
+            for player_id, bot in self.bots.items():
+                data = bot.choose_action(self.game)
+                if data is not None and self.game.status != "finished":
+                    acted = True
+                    if not apply(self.game, player_id, data):
+                        rejected += 1
+            self.assertTrue(acted, f"nobody can act in status {self.game.status}")
+        self.assertEqual(self.game.status, "finished")
+        self.assertEqual(rejected, 0)
+
+        # Everyone votes for a rematch once, which restarts the game
+        for player_id, bot in self.bots.items():
+            self.assertEqual(bot.choose_action(self.game), {"action": "rematch"})
+            apply(self.game, player_id, bot.choose_action(self.game))
+        self.assertEqual(self.game.status, "waiting")
+
+    def test_does_not_start_a_room_with_people(self):
+        game = WordBasketGame("test_room")
+        bot = BotPlayer(new_bot_id())
+        game.add_player(bot.player_id, "ボット1")
+        game.add_player("p1", "Player 1")
+        self.assertIsNone(bot.choose_action(game))
+
+    def test_votes_by_dictionary(self):
+        p1, p2 = list(self.bots)[:2]
+        self.game.start_game()
+        self.game.players[p1].hand = [Card("char", "い", "い")]
+        self.game.current_word = "ゲーム開始_あ"
+        self.assertTrue(self.game.check_move(p1, "あいいい", 0)["valid"])
+        self.assertEqual(self.bots[p1].choose_action(self.game), None)  # the finishing player can't vote
+        self.assertEqual(self.bots[p2].choose_action(self.game), {"action": "oppose", "move_id": self.game.last_move.move_id})
+
+        self.game.revert_last_move()
+        word = next(w for w in self.game.dictionary.index.words_for_card("あ", Card("length", "4", "4文字"), 4))
+        self.game.players[p1].hand = [Card("length", "4", "4文字")]
+        self.assertTrue(self.game.check_move(p1, word, 0)["valid"])
+        self.assertEqual(self.bots[p2].choose_action(self.game), {"action": "approve"})
+
+    def test_stuck_hand_uses_no_penalty_then_exchanges(self):
+        player_id = next(iter(self.bots))
+        bot = self.bots[player_id]
+        self.game.start_game()
+        self.game.current_word = "ゲーム開始_ぬ"
+        player = self.game.players[player_id]
+        oracle = self.game.dictionary.oracle
+        player.hand = [card for card in self.game.deck if not oracle.can_play_card("ぬ", card)][:5]
+        self.game.initialize_special_deck()
+        player.special_cards = [sc for sc in self.game.special_deck if sc.card_type == "no_penalty"][:1]
+
+        self.assertEqual(bot.choose_action(self.game), {"action": "set_special_card_pending", "card_index": 0})
+        self.game.set_special_card_pending(player_id, 0)
+        data = bot.choose_action(self.game)
+        self.assertEqual(data["action"], "reroll")
+        self.assertEqual(player.hand[data["card_index"]].type, "char")
+
+    def test_draw_card_is_set_before_a_long_word(self):
+        player_id = next(iter(self.bots))
+        bot = self.bots[player_id]
+        self.game.start_game()
+        self.game.current_word = "ゲーム開始_あ"
+        player = self.game.players[player_id]
+        player.hand = [Card("length", "7", "7文字以上")]
+        self.game.initialize_special_deck()
+        player.special_cards = [sc for sc in self.game.special_deck if sc.card_type == "draw2"][:1]
+
+        self.assertEqual(bot.choose_action(self.game), {"action": "set_special_card_pending", "card_index": 0})
+        self.game.set_special_card_pending(player_id, 0)
+        data = bot.choose_action(self.game)
+        self.assertEqual(data["action"], "play_word")
+        self.assertGreaterEqual(len(data["word"]), 7)
+
+if __name__ == "__main__":
+    unittest.main()
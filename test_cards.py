@@ -0,0 +1,35 @@
+import copy
+import pickle
+import unittest
+from game import Card, Player, SpecialCard, STANDARD_DECK, WordBasketGame
+
+class TestCardRegistry(unittest.TestCase):
+    def test_cards_are_interned(self):
+        a = Card("char", "あ", "あ")
+        self.assertIs(a, Card("char", "あ", "あ"))
+        self.assertIs(Card.from_id(a.id), a)
+        self.assertIs(pickle.loads(pickle.dumps(a)), a)
+        self.assertIs(copy.deepcopy([a])[0], a)
+
+    def test_cards_are_immutable(self):
+        with self.assertRaises(AttributeError):
+            Card("char", "い", "い").value = "う"
+
+    def test_cached_forms(self):
+        card = Card("length", "7", "7文字以上")
+        self.assertEqual(card.to_dict(), {"type": "length", "value": "7", "display": "7文字以上"})
+        self.assertIs(card.to_dict(), card.to_dict())
+        self.assertEqual(card.to_json(), '{"type": "length", "value": "7", "display": "7文字以上"}')
+
+    def test_rooms_share_card_instances(self):
+        g1, g2 = WordBasketGame("1"), WordBasketGame("2")
+        self.assertEqual(len(g1.deck), 60)
+        self.assertTrue(all(a is b for a, b in zip(g1.deck, g2.deck)))
+        self.assertEqual(len({c.id for c in STANDARD_DECK}), 56)
+
+    def test_models_use_slots(self):
+        for obj in (Player("p", "name"), SpecialCard("draw2", "ドロー2", "")):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+from collections import Counter
+from deck import CardPile
+from game import Card, STANDARD_DECK, WordBasketGame
+
+def make_pile(cards=STANDARD_DECK, seed=0):
+    return CardPile(Card._by_id, cards, rng=random.Random(seed))
+
+class TestCardPile(unittest.TestCase):
+    def test_draw_order_and_swap_remove(self):
+        a, b, c = Card("char", "あ", "あ"), Card("char", "い", "い"), Card("char", "う", "う")
+        pile = make_pile([a, b, c])
+        self.assertIs(pile.top(), c)
+        self.assertEqual(pile.remove_at(0), a)
+        self.assertEqual(list(pile), [c, b])
+        self.assertEqual(pile.draw_many(5), [b, c])
+        self.assertFalse(pile)
+
+    def test_take_random(self):
+        pile = make_pile()
+        card = pile.take_random(lambda c: c.type == "row")
+        self.assertEqual(card.type, "row")
+        self.assertEqual(len(pile), 59)
+        self.assertIsNone(make_pile([Card("char", "あ", "あ")]).take_random(lambda c: c.type == "row"))
+
+    def test_shuffles_keep_the_same_cards(self):
+        deck = make_pile(STANDARD_DECK[:10])
+        discard = make_pile(STANDARD_DECK[10:])
+        top = discard.top()
+        discard.shuffle_into(deck, keep_top=True)
+        self.assertEqual(list(discard), [top])
+        self.assertEqual(Counter(deck) + Counter([top]), Counter(STANDARD_DECK))
+        deck.shuffle()
+        self.assertEqual(len(deck), 59)
+
+    def test_add_shuffled_is_uniform_enough(self):
+        positions = Counter()
+        for seed in range(3000):
+            pile = make_pile(STANDARD_DECK[:4], seed)
+            pile.add_shuffled([STANDARD_DECK[-1].id])
+            positions[list(pile.ids).index(STANDARD_DECK[-1].id)] += 1
+        self.assertEqual(set(positions), set(range(5)))
+        self.assertTrue(all(450 < n < 750 for n in positions.values()))
+
+class TestSeededGame(unittest.TestCase):
+    def deal(self, seed):
+        game = WordBasketGame("seeded", seed=seed)
+        game.add_player("p1", "A")
+        game.add_player("p2", "B")
+        game.start_game()
+        return game.current_word, [c.id for c in game.players["p1"].hand], list(game.deck.ids)
+
+    def test_same_seed_same_game(self):
+        self.assertEqual(self.deal(42), self.deal(42))
+        self.assertNotEqual(self.deal(1), self.deal(2))
+
+    def test_draw_cards_reshuffles_discard_pile(self):
+        game = WordBasketGame("draw", seed=3)
+        game.add_player("p1", "A")
+        game.add_player("p2", "B")
+        game.start_game()
+        game.discard_pile.extend(game.deck.draw_many(len(game.deck) - 1))
+        top = game.discard_pile.top()
+        result = game._execute_draw_cards("p1", 3, 7)
+        self.assertEqual(result["affected_players"][0]["cards_drawn"], 3)
+        self.assertEqual(list(game.discard_pile), [top])
+        self.assertEqual(len(game.players["p2"].hand), 10)
+
+if __name__ == '__main__':
+    unittest.main()
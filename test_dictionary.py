@@ -0,0 +1,156 @@
+import pickle
+import unittest
+from game import WordBasketGame, Card
+from dictionary import dictionary_registry, length_bucket, HintCache
+
+class TestDictionaryRegistry(unittest.TestCase):
+    def test_rooms_share_dictionary(self):
+        game1 = WordBasketGame("room1")
+        game2 = WordBasketGame("room2")
+        self.assertIs(game1.dictionary, game2.dictionary)
+        self.assertIs(game1.dictionary, dictionary_registry.get())
+        self.assertIn("あいず", game1.dictionary)
+
+    def test_dictionary_is_immutable(self):
+        dictionary = dictionary_registry.get()
+        with self.assertRaises(AttributeError):
+            dictionary.words = frozenset()
+        with self.assertRaises(AttributeError):
+            dictionary.words.add("てすと")
+
+    def test_missing_file_falls_back_to_dummy(self):
+        game = WordBasketGame("room3", dictionary_path="/nonexistent/words.json")
+        self.assertIn("ゴリラ", game.dictionary)
+
+class TestWordIndex(unittest.TestCase):
+    def setUp(self):
+        self.game = WordBasketGame("index_room")
+        self.game.add_player("p1", "Player 1")
+        self.game.status = "playing"
+        self.index = self.game.dictionary.index
+
+    def brute_force_count(self, start, card, hand_size):
+        # Count words that check_move itself would accept
+        count = 0
+        player = self.game.players["p1"]
+        for word in self.game.dictionary:
+            self.game.status = "playing"
+            self.game.current_word = "ゲーム開始_" + start
+            player.hand = [card] + [Card("char", "あ", "あ")] * (hand_size - 1)
+            if self.game.check_move("p1", word, 0)["valid"]:
+                count += 1
+        return count
+
+    def test_length_buckets(self):
+        self.assertIsNone(length_bucket(1))
+        self.assertEqual(length_bucket(2), 2)
+        self.assertEqual(length_bucket(7), 7)
+        self.assertEqual(length_bucket(12), 7)
+
+    def test_counts_match_check_move(self):
+        cards = [Card("char", "い", "い"), Card("row", "かきくけこ", "か行"), Card("length", "7", "7文字以上")]
+        for start in ["あ", "か", "し"]:
+            for card in cards:
+                for hand_size, min_length in [(2, 3), (1, 4)]:
+                    expected = self.brute_force_count(start, card, hand_size)
+                    self.assertEqual(self.index.count_for_card(start, card, min_length), expected)
+                    self.assertEqual(len(list(self.index.words_for_card(start, card, min_length))), expected)
+
+    def test_long_vowel_end(self):
+        # あいおーしー ends with ー after し -> effective end い
+        self.assertIn("あいおーしー", self.index.words("あ", "い", 6))
+
+class TestStrictDictionary(unittest.TestCase):
+    def setUp(self):
+        self.game = WordBasketGame("strict_room")
+        self.p1 = self.game.add_player("p1", "Player 1")
+        self.p2 = self.game.add_player("p2", "Player 2")
+        self.game.start_game()
+        self.game.current_word = "ゲーム開始_あ"
+        self.p1.hand = [Card("row", "さしすせそ", "さ行"), Card("char", "あ", "あ")]
+
+    def test_unknown_word_allowed_by_default(self):
+        result = self.game.check_move("p1", "あいうす", 0)
+        self.assertTrue(result["valid"])
+
+    def test_unknown_word_rejected_in_strict_mode(self):
+        self.game.game_settings["strict_dictionary"] = True
+        result = self.game.check_move("p1", "あいうす", 0)
+        self.assertFalse(result["valid"])
+        self.assertEqual(len(self.p1.hand), 2)
+
+    def test_katakana_matches_hiragana_entry(self):
+        self.game.game_settings["strict_dictionary"] = True
+        result = self.game.check_move("p1", "アイズ", 0)
+        self.assertTrue(result["valid"])
+
+class TestPlayabilityOracle(unittest.TestCase):
+    def setUp(self):
+        self.dictionary = dictionary_registry.get()
+        self.oracle = self.dictionary.oracle
+        self.cards = [Card("char", c, c) for c in "あいうえおかきくけこたちつてとわ"]
+        self.cards += [Card("row", "かきくけこ", "か行"), Card("row", "やゆよ", "や行")]
+        self.cards += [Card("length", v, v) for v in ("5", "6", "7")]
+
+    def test_agrees_with_index_counts(self):
+        for start in "あかさたなはまやらわぬ":
+            for min_length in (2, 3, 4):
+                for card in self.cards:
+                    expected = self.dictionary.index.count_for_card(start, card, min_length) > 0
+                    self.assertEqual(self.oracle.can_play_card(start, card, min_length), expected, (start, card.value, min_length))
+
+    def test_playable_cards_and_stuck_player(self):
+        game = WordBasketGame("oracle_room")
+        p1 = game.add_player("p1", "Player 1")
+        game.add_player("p2", "Player 2")
+        game.start_game()
+        game.current_word = "ゲーム開始_あ"
+        p1.hand = [Card("char", "ぬ", "ぬ"), Card("char", "い", "い")]
+        self.assertEqual(game.get_playable_cards("p1"), [1])
+        self.assertFalse(game.is_stuck("p1"))
+        p1.hand = [Card("char", "ぬ", "ぬ")]
+        self.assertTrue(game.is_stuck("p1"))
+
+class TestHints(unittest.TestCase):
+    def setUp(self):
+        dictionary = dictionary_registry.get()
+        self.cache = HintCache(dictionary.index, dictionary.oracle, maxsize=2)
+        self.char_i = Card("char", "い", "い")
+        self.char_nu = Card("char", "ぬ", "ぬ")
+        self.row_ka = Card("row", "かきくけこ", "か行")
+
+    def test_words_fit_their_card(self):
+        game = WordBasketGame("hint_room")
+        game.add_player("p1", "Player 1")
+        game.start_game()
+        game.current_word = "ゲーム開始_あ"
+        game.players["p1"].hand = [self.char_i, self.char_nu, self.row_ka]
+        result = game.get_hints("p1")
+        self.assertEqual([h["card_index"] for h in result["hints"]], [0, 2])
+        for hint in result["hints"]:
+            self.assertTrue(1 <= len(hint["words"]) <= 3)
+            for word in hint["words"]:
+                probe = pickle.loads(pickle.dumps(game))
+                self.assertTrue(probe.check_move("p1", word, hint["card_index"])["valid"], word)
+
+    def test_hand_order_and_duplicates_share_an_entry(self):
+        first = self.cache.lookup("あ", [self.char_i, self.row_ka], 3)
+        second = self.cache.lookup("あ", [self.row_ka, self.char_i, self.char_i], 3)
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.cache.lookup("あ", [self.char_i, self.row_ka], 4)  # another length constraint
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.lookup("あ", [self.char_i], 3)
+        self.cache.lookup("か", [self.char_i], 3)
+        self.cache.lookup("あ", [self.char_i], 3)  # hit: "か" is now the oldest
+        self.cache.lookup("さ", [self.char_i], 3)
+        stats = self.cache.stats()
+        self.assertEqual((stats["size"], stats["evictions"], stats["hits"], stats["misses"]), (2, 1, 1, 3))
+        self.assertEqual(stats["hit_rate"], 0.25)
+        self.cache.lookup("あ", [self.char_i], 3)
+        self.assertEqual(self.cache.hits, 2)
+
+if __name__ == '__main__':
+    unittest.main()
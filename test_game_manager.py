@@ -0,0 +1,47 @@
+import unittest
+from game import GameManager
+
+class TestRoomGarbageCollection(unittest.TestCase):
+    def setUp(self):
+        self.manager = GameManager()
+        self.connected = set()
+
+    def is_connected(self, room_code):
+        return room_code in self.connected
+
+    def test_idle_room_without_connections_is_evicted(self):
+        code = self.manager.create_room()
+        self.manager.touch(code, now=100.0)
+        self.assertEqual(self.manager.sweep(60, 600, self.is_connected, now=150.0), [])
+        self.assertEqual(self.manager.sweep(60, 600, self.is_connected, now=161.0), [code])
+        self.assertIsNone(self.manager.get_room(code))
+
+    def test_connected_room_is_kept(self):
+        code = self.manager.create_room()
+        self.manager.touch(code, now=100.0)
+        self.connected.add(code)
+        self.assertEqual(self.manager.sweep(60, 600, self.is_connected, now=500.0), [])
+
+    def test_finished_room_is_evicted_even_if_connected(self):
+        code = self.manager.create_room()
+        self.manager.get_room(code).status = "finished"
+        self.manager.touch(code, now=100.0)
+        self.connected.add(code)
+        self.assertEqual(self.manager.sweep(60, 600, self.is_connected, now=701.0), [code])
+
+    def test_abandoned_room_is_evicted_immediately(self):
+        code = self.manager.create_room()
+        self.connected.add(code)
+        self.manager.mark_abandoned(code)
+        self.assertEqual(self.manager.sweep(60, 600, self.is_connected), [code])
+
+    def test_room_stats(self):
+        code1 = self.manager.create_room()
+        code2 = self.manager.create_room()
+        self.connected.add(code1)
+        self.manager.mark_abandoned(code2)
+        self.manager.sweep(60, 600, self.is_connected)
+        self.assertEqual(self.manager.room_stats(self.is_connected), {"live": 1, "idle": 0, "evicted": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from kana import kana
+
+def legacy_normalize_kana(char):
+    # Per-call implementation that KanaNormalizer replaced
+    if 'ァ' <= char <= 'ン':
+        char = chr(ord(char) - 0x60)
+    elif char == 'ヵ': char = 'か'
+    elif char == 'ヶ': char = 'け'
+    elif char == 'ヴ': char = 'う'
+    mapping = {
+        'が': 'か', 'ぎ': 'き', 'ぐ': 'く', 'げ': 'け', 'ご': 'こ',
+        'ざ': 'さ', 'じ': 'し', 'ず': 'す', 'ぜ': 'せ', 'ぞ': 'そ',
+        'だ': 'た', 'ぢ': 'ち', 'づ': 'つ', 'で': 'て', 'ど': 'と',
+        'ば': 'は', 'び': 'ひ', 'ぶ': 'ふ', 'べ': 'へ', 'ぼ': 'ほ',
+        'ぱ': 'は', 'ぴ': 'ひ', 'ぷ': 'ふ', 'ぺ': 'へ', 'ぽ': 'ほ',
+        'ゃ': 'や', 'ゅ': 'ゆ', 'ょ': 'よ',
+        'ぁ': 'あ', 'ぃ': 'い', 'ぅ': 'う', 'ぇ': 'え', 'ぉ': 'お',
+        'っ': 'つ', 'ゎ': 'わ',
+    }
+    return mapping.get(char, char)
+
+class TestKanaNormalizer(unittest.TestCase):
+    def test_matches_legacy_for_every_kana(self):
+        for code in range(0x3040, 0x3100):
+            char = chr(code)
+            self.assertEqual(kana.normalize_char(char), legacy_normalize_kana(char), char)
+
+    def test_normalize_word(self):
+        word = "ガッコウ"
+        self.assertEqual(kana.normalize(word), "".join(legacy_normalize_kana(c) for c in word))
+        self.assertEqual(kana.normalize("ぎゅうにゅう"), "きゆうにゆう")
+
+    def test_effective_end(self):
+        self.assertEqual(kana.effective_end("すきー"), "い")
+        self.assertEqual(kana.effective_end("ばら"), "ら")
+        self.assertEqual(kana.end_key("ちゃ"), "や")
+        self.assertEqual(kana.end_key("でー"), "え")
+
+    def test_target_char(self):
+        self.assertEqual(kana.target_char(""), "")
+        self.assertEqual(kana.target_char("ゲーム開始_ぱ"), "は")
+        self.assertEqual(kana.target_char("たー"), "あ")
+
+    def test_to_hiragana(self):
+        self.assertEqual(kana.to_hiragana("アイスクリーム"), "あいすくりーむ")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+import main
+from fastapi import HTTPException
+from game import Card
+from room_store import RoomBusy
+from timers import TimerWheel
+from wire import JsonCodec
+
+class FakeConnection:
+    """Stands in for ClientConnection: keeps the frames it is given."""
+
+    def __init__(self, room_code: str, player_id: str):
+        self.room_code = room_code
+        self.player_id = player_id
+        self.codec = JsonCodec()
+        self.frames = []
+        self.closed = False
+
+    def send(self, message) -> bool:
+        self.frames.append(message if isinstance(message, (str, bytes)) else self.codec.encode(message))
+        return True
+
+    def close(self, code: int = 1000, reason: str = ""):
+        self.closed = True
+
+    def messages(self) -> list:
+        return [json.loads(frame) for frame in self.frames]
+
+class RoomTestCase(unittest.IsolatedAsyncioTestCase):
+    """A room of the app's GameManager with players p1 and p2 connected through FakeConnections."""
+
+    async def asyncSetUp(self):
+        self.room_code = main.game_manager.create_room()
+        self.game = main.game_manager.get_room(self.room_code)
+        self.connections = {}
+        for player_id in ("p1", "p2"):
+            self.game.add_player(player_id, player_id)
+            self.connections[player_id] = FakeConnection(self.room_code, player_id)
+        main.manager.active_connections[self.room_code] = dict(self.connections)
+
+    async def asyncTearDown(self):
+        main.evict_room(self.room_code)
+        main.game_manager.delete_room(self.room_code)
+
+    async def run_commands(self, *commands):
+        """
+        Submit (kind, player_id, data) commands to the room's actor, from the player's connection,
+        and wait until it has handled them (and anything queued before them).
+        """
+        actor = main.get_room_actor(self.room_code)
+        for kind, player_id, data in commands:
+            actor.submit(kind, player_id, data, self.connections.get(player_id))
+        await self.settle()
+
+    async def settle(self):
+        """Wait until the room's actor has handled every queued command."""
+        actor = main.get_room_actor(self.room_code)
+        target = actor.processed + actor.queue.qsize()
+        for _ in range(1000):
+            if actor.processed >= target:
+                return
+            await asyncio.sleep(0.001)
+        self.fail("the room actor did not handle its commands")
+
+class TestResync(RoomTestCase):
+    async def test_resync_only_answers_the_requesting_client(self):
+        self.game.start_game()
+        await main.broadcast_game_state(self.game, self.room_code)
+        version = self.connections["p1"].messages()[-1]["version"]
+
+        await main.handle_action(self.game, self.room_code, self.game.players["p1"], self.connections["p1"], {"action": "resync"})
+        snapshot = self.connections["p1"].messages()[-1]
+        self.assertEqual(snapshot["type"], "game_state")
+        self.assertEqual(snapshot["version"], version)
+        self.assertEqual(len(self.connections["p2"].frames), 1)
+
+        await main.broadcast_game_state(self.game, self.room_code, message="OK")
+        for connection in self.connections.values():
+            patch = connection.messages()[-1]
+            self.assertEqual(patch["type"], "game_state_patch")
+            self.assertEqual(patch["base_version"], version)
+
+class TestRoomActor(RoomTestCase):
+    async def test_commands_run_one_at_a_time_in_order(self):
+        order = []
+        handle_command = main.handle_command
+
+        async def recording(game, room_code, command):
+            order.append(("start", command.data["n"]))
+            result = await handle_command(game, room_code, command)
+            order.append(("end", command.data["n"]))
+            return result
+
+        priorities = [["char", "row", "length"], ["row", "length", "char"], ["length", "char", "row"]] * 2
+        with mock.patch.object(main, "handle_command", recording):
+            await self.run_commands(*[
+                ("action", "p1" if n % 2 else "p2", {"action": "set_priority", "priority": priority, "n": n})
+                for n, priority in enumerate(priorities)
+            ])
+        self.assertEqual(order, [(step, n) for n in range(len(priorities)) for step in ("start", "end")])
+        self.assertEqual(self.game.players["p1"].card_priority, priorities[-1])
+        self.assertEqual(self.game.players["p2"].card_priority, priorities[-2])
+
+    async def test_handler_may_not_suspend_with_the_room_checked_out(self):
+        async def suspending(game, room_code, command):
+            await main.broadcast_game_state(game, room_code, message="held")
+            await asyncio.sleep(0)
+
+        errors = main.command_errors.value
+        with mock.patch.object(main, "handle_command", suspending):
+            await self.run_commands(("action", "p1", {"action": "resync"}))
+        self.assertEqual(main.command_errors.value, errors + 1)
+        # The broadcast made before the failure was never sent
+        self.assertEqual(self.connections["p1"].frames, [])
+
+        await self.run_commands(("action", "p1", {"action": "set_priority", "priority": ["row", "char", "length"]}))
+        self.assertEqual(self.connections["p1"].messages()[-1]["type"], "game_state")
+
+    async def test_busy_room_is_retried(self):
+        mutate = main.game_manager.mutate
+        attempts = []
+
+        def busy_once(room_code):
+            attempts.append(room_code)
+            if len(attempts) == 1:
+                raise RoomBusy("held by another worker")
+            return mutate(room_code)
+
+        retries = main.room_busy_retries.value
+        with mock.patch.object(main.game_manager, "mutate", busy_once):
+            await self.run_commands(("action", "p1", {"action": "set_priority", "priority": ["row", "char", "length"]}))
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(main.room_busy_retries.value, retries + 1)
+        self.assertEqual(self.game.players["p1"].card_priority, ["row", "char", "length"])
+
+    async def test_leave_after_reconnect_is_ignored(self):
+        # p2's old socket closed after its new one registered: the queued leave must not remove it
+        await self.run_commands(("leave", "p2", {}))
+        self.assertIn("p2", self.game.players)
+
+        del main.manager.active_connections[self.room_code]["p2"]
+        await self.run_commands(("leave", "p2", {}))
+        self.assertNotIn("p2", self.game.players)
+
+    async def test_stale_voting_timeout_is_a_no_op(self):
+        self.game.start_game()
+        self.game.players["p1"].hand = [Card("char", "い", "い")]
+        self.game.current_word = "ゲーム開始_あ"
+        self.assertTrue(self.game.check_move("p1", "あいいい", 0)["valid"])
+        move_id = self.game.last_move.move_id
+
+        await self.run_commands(("voting_timeout", None, {"move_id": move_id - 1}))
+        self.assertEqual(self.game.status, "finishing_check")
+        self.assertEqual(self.game.last_move.move_id, move_id)
+
+        # The timeout of the current vote decides it (no votes: approved)
+        await self.run_commands(("voting_timeout", None, {"move_id": move_id}))
+        self.assertEqual(self.game.status, "finished")
+        self.assertEqual(self.game.players["p1"].rank, 1)
+
+class TestBotsWithSharedStore(RoomTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # Another worker shares the rooms: only the bots added here are run here
+        for patcher in (mock.patch.object(main.game_manager.store, "shared", True),
+                        mock.patch.object(main.game_manager.store, "publish", create=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.actor = main.get_room_actor(self.room_code)
+
+    async def test_only_the_worker_that_added_a_bot_runs_it(self):
+        self.game.add_player("bot-elsewhere", "ボット1")  # added through another worker
+        await self.run_commands(("add_bot", None, {"think_time": 5}))
+        ours = next(pid for pid in self.game.players if pid.startswith("bot-") and pid != "bot-elsewhere")
+
+        self.assertEqual(set(self.actor.bots), {ours})
+        self.assertEqual(self.actor.bots[ours].think_time, 5)
+        self.assertIn("bot:" + ours, self.actor.timers)
+        self.assertNotIn("bot:bot-elsewhere", self.actor.timers)
+
+        # A turn for the other worker's bot does nothing here
+        players = dict(self.game.players)
+        await self.run_commands(("bot_turn", "bot-elsewhere", {}))
+        self.assertNotIn("bot:bot-elsewhere", self.actor.timers)
+        self.assertEqual(self.game.players, players)
+
+    async def test_bot_removed_elsewhere_is_dropped(self):
+        await self.run_commands(("add_bot", None, {}))
+        ours = next(iter(self.actor.bots))
+        self.game.remove_player(ours)
+        self.actor.wake_bots(self.game)
+        self.assertEqual(self.actor.bots, {})
+        self.assertNotIn("bot:" + ours, self.actor.timers)
+
+class TestAddBots(RoomTestCase):
+    async def test_rest_endpoint_needs_the_admin_token(self):
+        with self.assertRaises(HTTPException) as raised:
+            await main.add_room_bots(self.room_code, {"count": 1}, x_admin_token=None)
+        self.assertEqual(raised.exception.status_code, 404)  # disabled without ADMIN_TOKEN
+
+        with mock.patch.object(main, "ADMIN_TOKEN", "secret"):
+            with self.assertRaises(HTTPException) as raised:
+                await main.add_room_bots(self.room_code, {"count": 1}, x_admin_token="p1")
+            self.assertEqual(raised.exception.status_code, 403)
+            result = await main.add_room_bots(self.room_code, {"count": 2}, x_admin_token="secret")
+            await self.settle()
+            self.assertEqual(len(result["bot_ids"]), 2)
+
+            with self.assertRaises(HTTPException) as raised:
+                await main.add_room_bots(self.room_code, {"count": main.MAX_BOTS_PER_ROOM - 1}, x_admin_token="secret")
+            self.assertEqual(raised.exception.status_code, 409)
+
+    async def test_bots_per_room_are_capped(self):
+        await self.run_commands(*[("add_bot", None, {}) for _ in range(main.MAX_BOTS_PER_ROOM + 2)])
+        self.assertEqual(main.bot_count(self.game), main.MAX_BOTS_PER_ROOM)
+
+        await self.run_commands(("action", "p1", {"action": "add_bot"}))
+        self.assertEqual(main.bot_count(self.game), main.MAX_BOTS_PER_ROOM)
+        self.assertEqual(self.connections["p1"].messages()[-1]["type"], "error")
+
+class GatedWebSocket:
+    """A websocket whose sends wait until the gate opens (never, unless the test opens it)."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text: str):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
+
+class TestClientConnection(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.now = 1000.0
+        self.wheel = TimerWheel(tick=0.05, clock=lambda: self.now)
+        patcher = mock.patch.object(main, "timer_wheel", self.wheel)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.websocket = GatedWebSocket()
+        self.connection = main.ClientConnection(self.websocket, "ROOM", "p1", max_queue=2)
+
+    async def asyncTearDown(self):
+        self.connection.close()
+        await asyncio.sleep(0)
+
+    async def fill(self):
+        self.assertTrue(self.connection.send({"n": 0}))
+        await asyncio.sleep(0)  # the writer takes it and blocks on the socket
+        self.assertTrue(self.connection.send({"n": 1}))
+        self.assertTrue(self.connection.send({"n": 2}))
+
+    async def test_full_queue_drops_messages(self):
+        await self.fill()
+        dropped = main.messages_dropped.value
+        self.assertFalse(self.connection.send({"n": 3}))
+        self.assertEqual(main.messages_dropped.value, dropped + 1)
+        self.assertFalse(self.connection.closed)
+
+    async def test_stalled_client_is_evicted_without_further_sends(self):
+        await self.fill()
+        evicted = main.slow_consumers_evicted.value
+        self.connection.send({"n": 3})
+        self.now += main.SLOW_CONSUMER_TIMEOUT + 1
+        self.wheel.advance()
+        await asyncio.sleep(0)
+        self.assertTrue(self.connection.closed)
+        self.assertEqual(self.websocket.close_code, 4008)
+        self.assertEqual(main.slow_consumers_evicted.value, evicted + 1)
+
+    async def test_client_that_catches_up_is_kept(self):
+        await self.fill()
+        self.connection.send({"n": 3})
+        self.websocket.gate.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertEqual(len(self.websocket.sent), 3)
+        self.now += main.SLOW_CONSUMER_TIMEOUT + 1
+        self.wheel.advance()
+        self.assertFalse(self.connection.closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from metrics import MetricsRegistry
+
+class TestPrometheusFormat(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        lines = self.registry.render_prometheus().splitlines()
+        self.assertEqual(lines[:2], ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"])
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("latency_seconds_sum 4.25", lines)
+        self.assertIn("latency_seconds_count 4", lines)
+
+    def test_family_shares_one_header(self):
+        family = self.registry.family("counter", "errors_total", "Errors", "error")
+        family.get("OSError").inc()
+        family.get("OSError").inc()
+        family.get('Bad"Name').inc()
+        self.assertIs(family.get("OSError"), family.get("OSError"))
+        text = self.registry.render_prometheus()
+        self.assertEqual(text.count("# TYPE errors_total counter"), 1)
+        self.assertIn('errors_total{error="OSError"} 2', text)
+        self.assertIn('errors_total{error="Bad\\"Name"} 1', text)
+
+    def test_gauge_callback(self):
+        self.registry.gauge("rooms", "Rooms", fn=lambda: 7)
+        self.assertIn("rooms 7\n", self.registry.render_prometheus())
+
+    def test_counter_callback(self):
+        hits = [3]
+        self.registry.counter("cache_hits_total", "Hits", fn=lambda: hits[0])
+        hits[0] += 2
+        text = self.registry.render_prometheus()
+        self.assertIn("# TYPE cache_hits_total counter", text)
+        self.assertIn("cache_hits_total 5\n", text)
+        self.assertEqual(self.registry.snapshot()["cache_hits_total"], 5)
+
+if __name__ == "__main__":
+    unittest.main()
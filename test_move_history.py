@@ -0,0 +1,101 @@
+import unittest
+from game import WordBasketGame, Card
+from move_history import MoveHistory
+
+class TestMoveHistory(unittest.TestCase):
+    def test_ring_keeps_the_newest_moves(self):
+        history = MoveHistory(capacity=3)
+        moves = [history.record("p1", i, 0, f"w{i}", False) for i in range(5)]
+        self.assertEqual([m.move_id for m in history], [3, 4, 5])
+        self.assertIsNone(history.get(moves[0].move_id))
+        self.assertEqual(history.votes(moves[0].move_id), set())
+        self.assertIs(history.get(4), moves[3])
+
+    def test_ids_are_not_reused_after_undo(self):
+        history = MoveHistory()
+        history.record("p1", 1, 0, "", False)
+        history.votes(1).add("p2")
+        history.pop()
+        move = history.record("p1", 2, 0, "", False)
+        self.assertEqual(move.move_id, 2)
+        self.assertEqual(history.votes(2), set())
+
+class TestMultiLevelUndo(unittest.TestCase):
+    def setUp(self):
+        self.game = WordBasketGame("test_room")
+        for pid in ("p1", "p2", "p3"):
+            self.game.add_player(pid, pid)
+        self.game.start_game()
+        self.game.current_word = "ゲーム開始_あ"
+        self.game.players["p1"].hand = [Card("char", "い", "い"), Card("length", "3", "3文字")]
+        self.game.players["p2"].hand = [Card("length", "4", "4文字"), Card("char", "か", "か")]
+        self.game.players["p3"].hand = [Card("char", "き", "き"), Card("length", "5", "5文字")]
+        self.hands = {pid: list(p.hand) for pid, p in self.game.players.items()}
+        self.discard = list(self.game.discard_pile.ids)
+
+    def play_three_moves(self):
+        self.assertTrue(self.game.check_move("p1", "あいいい", 0)["valid"])
+        self.assertTrue(self.game.check_move("p2", "いかか", 1)["valid"])
+        self.assertTrue(self.game.check_move("p3", "かきき", 0)["valid"])
+        return [m.move_id for m in self.game.history]
+
+    def test_late_oppose_undoes_back_to_its_move(self):
+        first, second, third = self.play_three_moves()
+        # Votes aimed at the first move don't count against the latest one
+        self.assertFalse(self.game.oppose_move("p2", first)["reverted"])
+        self.assertEqual(self.game.opposition_votes, set())
+
+        result = self.game.oppose_move("p3", first)
+        self.assertTrue(result["reverted"])
+        self.assertEqual(result["undone"], 3)
+        self.assertEqual(self.game.current_word, "ゲーム開始_あ")
+        self.assertEqual({pid: list(p.hand) for pid, p in self.game.players.items()}, self.hands)
+        self.assertEqual(list(self.game.discard_pile.ids), self.discard)
+        self.assertIsNone(self.game.last_move)
+
+    def test_single_undo_reopens_the_previous_move(self):
+        first, second, third = self.play_three_moves()
+        self.game.oppose_move("p1", second)
+        self.game.revert_last_move()
+        self.assertEqual(self.game.current_word, "いかか")
+        self.assertEqual(self.game.last_move.move_id, second)
+        # The vote already cast against the second move still stands
+        self.assertEqual(self.game.opposition_votes, {"p1"})
+
+    def test_late_oppose_after_a_reroll_is_refused(self):
+        first, _, _ = self.play_three_moves()
+        self.assertTrue(self.game.exchange_hand("p1", 0)["success"])
+        hands = {pid: list(p.hand) for pid, p in self.game.players.items()}
+        word = self.game.current_word
+
+        result = self.game.oppose_move("p2", first)
+        self.assertFalse(result["success"])
+        self.assertIsNone(self.game.last_move)
+        self.assertEqual({pid: list(p.hand) for pid, p in self.game.players.items()}, hands)
+        self.assertEqual(self.game.current_word, word)
+
+    def test_swaps_forget_the_moves(self):
+        self.play_three_moves()
+        self.assertTrue(self.game.execute_select_swap("p1", "p2")["success"])
+        self.assertIsNone(self.game.last_move)
+        self.game.history.record("p3", 0, 0, self.game.current_word, False)
+        self.assertTrue(self.game._execute_rotate_swap("p1")["success"])
+        self.assertIsNone(self.game.last_move)
+
+    def test_undo_does_not_return_a_card_that_was_dealt_again(self):
+        self.assertTrue(self.game.check_move("p1", "あいいい", 0)["valid"])
+        card = Card("char", "い", "い")
+        self.game.discard_pile.remove_topmost(card)
+        while self.game.deck.remove_topmost(card):
+            pass
+        self.game.revert_last_move()
+        self.assertEqual(self.game.players["p1"].hand, self.hands["p1"][1:])
+        self.assertEqual(self.game.current_word, "ゲーム開始_あ")
+
+    def test_forgotten_move_cannot_be_opposed(self):
+        self.play_three_moves()
+        result = self.game.oppose_move("p2", 999)
+        self.assertFalse(result["success"])
+
+if __name__ == "__main__":
+    unittest.main()
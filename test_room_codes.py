@@ -0,0 +1,87 @@
+import random
+import unittest
+from room_codes import RoomCodeAllocator, BASE32, shard_for, shard_filter
+from game import GameManager
+
+class TestRoomCodeAllocator(unittest.TestCase):
+    def test_whole_space_is_allocated_without_collisions(self):
+        allocator = RoomCodeAllocator(length=3, rng=random.Random(1))
+        codes = [allocator.allocate() for _ in range(allocator.capacity)]
+        self.assertEqual(len(set(codes)), 1000)
+        self.assertTrue(all(len(c) == 3 and c.isdigit() for c in codes))
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+    def test_freed_codes_are_reused_after_exhaustion(self):
+        allocator = RoomCodeAllocator(length=2, rng=random.Random(2))
+        codes = [allocator.allocate() for _ in range(100)]
+        allocator.free(codes[10])
+        self.assertEqual(allocator.stats(), {"capacity": 100, "in_use": 99, "available": 1})
+        self.assertEqual(allocator.allocate(), codes[10])
+
+    def test_base32_codes(self):
+        allocator = RoomCodeAllocator(length=6, alphabet=BASE32)
+        code = allocator.allocate()
+        self.assertEqual(len(code), 6)
+        self.assertTrue(set(code) <= set(BASE32))
+        self.assertEqual(allocator.capacity, 32 ** 6)
+
+    def test_accept_filter(self):
+        allocator = RoomCodeAllocator(length=2, accept=lambda c: c.endswith("7"))
+        codes = [allocator.allocate() for _ in range(10)]
+        self.assertTrue(all(c.endswith("7") for c in codes))
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+        # Rejected codes freed here (another shard's rooms) are dropped, not reused
+        allocator.free("12")
+        allocator.free(codes[0])
+        self.assertEqual(allocator.stats(), {"capacity": 100, "in_use": 9, "available": 1})
+        self.assertEqual(allocator.allocate(), codes[0])
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+    def test_reserved_codes_are_skipped(self):
+        allocator = RoomCodeAllocator(length=2, rng=random.Random(3))
+        first = RoomCodeAllocator(length=2, rng=random.Random(3)).allocate()
+        self.assertTrue(allocator.reserve(first))
+        self.assertFalse(allocator.reserve(first))
+        self.assertFalse(allocator.reserve("A1"))
+        codes = [allocator.allocate() for _ in range(99)]
+        self.assertNotIn(first, codes)
+        self.assertEqual(allocator.stats(), {"capacity": 100, "in_use": 100, "available": 0})
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+        # Past the fresh sequence only a freed code can be reserved
+        self.assertFalse(allocator.reserve(codes[0]))
+        allocator.free(codes[0])
+        self.assertTrue(allocator.reserve(codes[0]))
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+    def test_game_manager_frees_code_on_delete(self):
+        manager = GameManager(RoomCodeAllocator(length=6, alphabet=BASE32))
+        code = manager.create_room()
+        self.assertIs(manager.get_room(code.lower()), manager.get_room(code))
+        self.assertEqual(manager.code_allocator.in_use, 1)
+        manager.delete_room(code)
+        self.assertEqual(manager.code_allocator.in_use, 0)
+
+    def test_shards_partition_the_code_space(self):
+        allocators = [RoomCodeAllocator(length=3, rng=random.Random(i), accept=shard_filter(i, 4)) for i in range(4)]
+        owned = [set() for _ in allocators]
+        for i, allocator in enumerate(allocators):
+            try:
+                while True:
+                    owned[i].add(allocator.allocate())
+            except RuntimeError:
+                pass
+        self.assertEqual(sum(len(codes) for codes in owned), 1000)
+        self.assertEqual(set().union(*owned), {f"{n:03d}" for n in range(1000)})
+        self.assertTrue(all(shard_for(code, 4) == i for i, codes in enumerate(owned) for code in codes))
+        self.assertEqual(shard_for(" ab1 ", 4), shard_for("AB1", 4))
+        self.assertIsNone(shard_filter(0, 1))
+
+if __name__ == '__main__':
+    unittest.main()
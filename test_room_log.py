@@ -0,0 +1,125 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from game import GameManager
+from room_codes import RoomCodeAllocator
+from room_log import RoomLog
+
+def game_state(game):
+    """Everything a replay has to reproduce."""
+    return {
+        "deck": list(game.deck.ids),
+        "discard_pile": list(game.discard_pile.ids),
+        "hands": {pid: [card.id for card in p.hand] for pid, p in game.players.items()},
+        "special_cards": {pid: [sc.card_type for sc in p.special_cards] for pid, p in game.players.items()},
+        "current_word": game.current_word,
+        "status": game.status,
+        "rng": game.rng.getstate(),
+    }
+
+class TestRoomLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.logs = []
+
+    def tearDown(self):
+        for log in self.logs:
+            log.close()
+        shutil.rmtree(self.directory)
+
+    def new_manager(self, snapshot_every=200, accept=None):
+        log = RoomLog(self.directory, flush_interval=60, snapshot_every=snapshot_every)
+        self.logs.append(log)
+        # Every manager walks the same code sequence, like a restarted process could
+        return GameManager(RoomCodeAllocator(rng=random.Random(0), accept=accept), event_log=log)
+
+    def play(self, manager):
+        code = manager.create_room({"initial_hand_size": 5})
+        game = manager.get_room(code)
+        game.add_player("p1", "alice")
+        game.add_player("p2", "bob")
+        game.start_game()
+        game.exchange_hand("p1", 0)
+        game.check_move("p2", "りんご", 0)
+        game.set_card_priority("p1", ["row", "char", "length"])
+        game.exchange_hand("p2", 1)
+        return code, game
+
+    def test_restart_replays_the_log(self):
+        manager = self.new_manager()
+        code, game = self.play(manager)
+        manager.event_log.flush()
+
+        # A new process: nothing but the files on disk
+        restored = self.new_manager()
+        self.assertEqual(restored.recover_rooms(), [code])
+        room = restored.get_room(code)
+        self.assertEqual(game_state(room), game_state(game))
+        self.assertEqual(room.game_settings["initial_hand_size"], 5)
+        self.assertTrue(room.players["p1"].is_host)
+
+    def test_snapshot_and_tail(self):
+        manager = self.new_manager(snapshot_every=3)
+        code, game = self.play(manager)
+        manager.event_log.flush()
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f"{code}.snap")))
+        with open(os.path.join(self.directory, f"{code}.log")) as f:
+            self.assertLess(len(f.readlines()), 3)
+
+        restored = self.new_manager(snapshot_every=3)
+        restored.recover_rooms()
+        room = restored.get_room(code)
+        self.assertEqual(game_state(room), game_state(game))
+
+        # The recovered room keeps journaling
+        room.exchange_hand("p1", 0)
+        game.exchange_hand("p1", 0)
+        restored.event_log.flush()
+        again = self.new_manager()
+        again.recover_rooms()
+        self.assertEqual(game_state(again.get_room(code)), game_state(game))
+
+    def test_torn_last_record_is_ignored(self):
+        manager = self.new_manager()
+        code, game = self.play(manager)
+        manager.event_log.flush()
+        with open(os.path.join(self.directory, f"{code}.log"), "a") as f:
+            f.write('{"seq": 99, "op": "exchange_ha')
+
+        restored = self.new_manager()
+        restored.recover_rooms()
+        self.assertEqual(game_state(restored.get_room(code)), game_state(game))
+
+    def test_deleted_room_is_not_recovered(self):
+        manager = self.new_manager()
+        code, _ = self.play(manager)
+        manager.delete_room(code)
+        manager.event_log.flush()
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(self.new_manager().recover_rooms(), [])
+
+    def test_recovered_codes_are_not_allocated_again(self):
+        manager = self.new_manager()
+        codes = [self.play(manager)[0] for _ in range(3)]
+        manager.event_log.flush()
+
+        restored = self.new_manager()
+        self.assertEqual(sorted(restored.recover_rooms()), sorted(codes))
+        self.assertEqual(restored.code_allocator.in_use, 3)
+        created = [restored.create_room() for _ in range(3)]
+        self.assertFalse(set(created) & set(codes))
+        self.assertEqual(restored.code_allocator.in_use, 6)
+        self.assertEqual(restored.code_allocator.available, restored.code_allocator.capacity - 6)
+
+    def test_other_shards_rooms_are_not_recovered(self):
+        manager = self.new_manager()
+        code, _ = self.play(manager)
+        manager.event_log.flush()
+        restored = self.new_manager(accept=lambda c: c != code)
+        self.assertEqual(restored.recover_rooms(), [])
+        self.assertIsNone(restored.get_room(code))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from game import GameManager, WordBasketGame, Card
+from room_codes import RoomCodeAllocator
+from room_store import InMemoryRoomStore, RoomBusy, SQLiteRoomStore
+
+class TestGamePickling(unittest.TestCase):
+    def test_round_trip_keeps_cards_interned(self):
+        game = WordBasketGame("1234", seed=3)
+        game.use_dummy_dictionary()
+        game.add_player("p1", "alice")
+        game.add_player("p2", "bob")
+        game.start_game()
+
+        restored = pickle.loads(pickle.dumps(game))
+        self.assertEqual(list(restored.deck.ids), list(game.deck.ids))
+        self.assertIs(restored.discard_pile.top(), game.discard_pile.top())
+        self.assertIs(restored.players["p1"].hand[0], game.players["p1"].hand[0])
+        self.assertIsInstance(restored.players["p1"].hand[0], Card)
+        self.assertEqual(len(restored.dictionary.words), len(game.dictionary.words))
+        # The restored deck draws with the restored RNG
+        self.assertEqual(restored.deck.draw(), game.deck.draw())
+
+class TestInMemoryRoomStore(unittest.TestCase):
+    def test_mutate_yields_live_game(self):
+        store = InMemoryRoomStore()
+        game = WordBasketGame("1234")
+        self.assertTrue(store.add("1234", game))
+        self.assertFalse(store.add("1234", game))
+        with store.mutate("1234") as live:
+            self.assertIs(live, game)
+        with store.mutate("9999") as missing:
+            self.assertIsNone(missing)
+
+class TestSQLiteRoomStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "rooms.sqlite3")
+        self.store = SQLiteRoomStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_mutation_is_saved_and_visible_to_other_connections(self):
+        self.store.add("1234", WordBasketGame("1234"))
+        with self.store.mutate("1234") as game:
+            game.add_player("p1", "alice")
+        other = SQLiteRoomStore(self.path)
+        self.assertIn("p1", other.get("1234").players)
+        self.assertEqual(len(other), 1)
+
+    def test_failed_mutation_is_rolled_back(self):
+        self.store.add("1234", WordBasketGame("1234"))
+        with self.assertRaises(ValueError):
+            with self.store.mutate("1234") as game:
+                game.add_player("p1", "alice")
+                raise ValueError
+        self.assertEqual(self.store.get("1234").players, {})
+
+    def test_busy_room_raises_instead_of_waiting(self):
+        self.store.add("1234", WordBasketGame("1234"))
+        other = SQLiteRoomStore(self.path)  # another worker
+        with other.mutate("1234"):
+            started = time.monotonic()
+            with self.assertRaises(RoomBusy):
+                with self.store.mutate("1234"):
+                    self.fail("checked out twice")
+            self.assertLess(time.monotonic() - started, 1.0)
+        with self.store.mutate("1234") as game:
+            game.add_player("p1", "alice")
+        self.assertEqual([room.players for room in other.summaries()], [1])
+
+    def test_duplicate_code_is_rejected(self):
+        self.assertTrue(self.store.add("1234", WordBasketGame("1234")))
+        self.assertFalse(self.store.add("1234", WordBasketGame("1234")))
+
+    def test_presence_is_owned_by_worker(self):
+        self.store.set_connected("1234", "p1", "worker-a", True)
+        self.store.set_connected("1234", "p1", "worker-b", True)  # reconnected elsewhere
+        self.store.set_connected("1234", "p1", "worker-a", False)
+        self.assertEqual(self.store.connected_players("1234"), {"p1"})
+        self.store.set_connected("1234", "p1", "worker-b", False)
+        self.assertEqual(self.store.connected_players("1234"), set())
+
+    def test_events_are_read_in_order(self):
+        start = self.store.last_event_id()
+        self.store.publish("1234", "worker-a", {"kind": "message", "n": 1})
+        self.store.publish("1234", "worker-b", {"kind": "message", "n": 2})
+        events = self.store.events_since(start)
+        self.assertEqual([(origin, event["n"]) for _, _, origin, event in events], [("worker-a", 1), ("worker-b", 2)])
+        self.assertEqual(self.store.events_since(events[-1][0]), [])
+
+    def test_game_manager_with_shared_store(self):
+        manager = GameManager(RoomCodeAllocator(rng=random.Random(1)), self.store)
+        code = manager.create_room({"initial_hand_size": 5})
+        with manager.mutate(code) as game:
+            game.add_player("p1", "alice")
+        room = manager.get_room(code)
+        self.assertEqual(room.game_settings["initial_hand_size"], 5)
+        self.assertIn("p1", room.players)
+
+        # A second worker allocating the same code (same allocator sequence) moves on to another one;
+        # the taken code stays out of its free list
+        other = GameManager(RoomCodeAllocator(rng=random.Random(1)), SQLiteRoomStore(self.path))
+        fresh = other.create_room()
+        self.assertNotEqual(fresh, code)
+        self.assertEqual(other.code_allocator.available, other.code_allocator.capacity - 2)
+
+        self.assertEqual(manager.sweep(0, 0, lambda c: False, now=self.store.clock() + 1), [code, fresh])
+        self.assertEqual(len(self.store), 0)
+
+    def test_workers_sharing_a_store_run_out_of_codes(self):
+        managers = [GameManager(RoomCodeAllocator(length=1, rng=random.Random(i)), SQLiteRoomStore(self.path))
+                    for i in range(2)]
+        codes = []
+        for _ in range(5):
+            for manager in managers:
+                codes.append(manager.create_room())
+        self.assertEqual(sorted(codes), list("0123456789"))
+        for manager in managers:
+            with self.assertRaises(RuntimeError):
+                manager.create_room()
+
+        # A deleted room's code is reused by the worker that freed it
+        managers[0].delete_room(codes[1])
+        self.assertEqual(managers[0].create_room(), codes[1])
+        with self.assertRaises(RuntimeError):
+            managers[1].create_room()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from state_sync import RoomStateSync
+
+class TestRoomStateSync(unittest.TestCase):
+    def setUp(self):
+        self.sync = RoomStateSync()
+
+    def common(self, **fields):
+        state = {"type": "game_state", "status": "playing", "current_word": "あい", "deck_count": 40,
+                 "message": None, "game_over": False, "winner": None, "ranks": []}
+        state.update(fields)
+        return state
+
+    def broadcast(self, common, personal, player_id="p1"):
+        changes = self.sync.update_common(common)
+        return self.sync.render(player_id, common, changes, personal)
+
+    def test_first_message_is_full_snapshot(self):
+        msg = self.broadcast(self.common(), {"my_hand": []})
+        self.assertEqual(msg["type"], "game_state")
+        self.assertEqual(msg["version"], 1)
+        self.assertEqual(msg["current_word"], "あい")
+        self.assertEqual(msg["my_hand"], [])
+
+    def test_patch_contains_only_changes(self):
+        self.broadcast(self.common(), {"my_hand": [1, 2]})
+        msg = self.broadcast(self.common(current_word="いす", message="OK"), {"my_hand": [1, 2]})
+        self.assertEqual(msg["type"], "game_state_patch")
+        self.assertEqual(msg["version"], 2)
+        self.assertEqual(msg["base_version"], 1)
+        self.assertEqual(msg["changes"]["current_word"], "いす")
+        self.assertEqual(msg["changes"]["message"], "OK")
+        self.assertNotIn("deck_count", msg["changes"])
+        self.assertNotIn("my_hand", msg["changes"])
+        self.assertNotIn("type", msg["changes"])
+
+    def test_forgotten_player_gets_snapshot(self):
+        self.broadcast(self.common(), {"my_hand": []})
+        self.sync.forget("p1")
+        msg = self.broadcast(self.common(), {"my_hand": []})
+        self.assertEqual(msg["type"], "game_state")
+        self.assertEqual(msg["version"], 2)
+
+    def test_player_missing_a_version_gets_snapshot(self):
+        self.broadcast(self.common(), {"my_hand": []}, "p1")
+        # p1 is not sent version 2
+        changes = self.sync.update_common(self.common(current_word="いす"))
+        self.sync.render("p2", self.common(current_word="いす"), changes, {"my_hand": []})
+        msg = self.broadcast(self.common(current_word="すし"), {"my_hand": []}, "p1")
+        self.assertEqual(msg["type"], "game_state")
+
+    def test_removed_common_key_sends_snapshots(self):
+        self.broadcast(self.common(), {"my_hand": []})
+        common = self.common()
+        del common["deck_count"]
+        msg = self.broadcast(common, {"my_hand": []})
+        self.assertEqual(msg["type"], "game_state")
+        self.assertNotIn("deck_count", msg)
+
+    def test_removed_personal_key_sends_snapshot(self):
+        self.broadcast(self.common(), {"my_hand": [], "my_pending_special_card": None})
+        msg = self.broadcast(self.common(), {"my_hand": []})
+        self.assertEqual(msg["type"], "game_state")
+
+    def test_resend_keeps_the_version(self):
+        self.assertIsNone(self.sync.resend("p1", {"my_hand": []}))
+        changes = self.sync.update_common(self.common(message="OK"))
+        for player_id in ("p1", "p2"):
+            self.sync.render(player_id, self.common(message="OK"), changes, {"my_hand": []})
+        common = self.sync.resend("p1", {"my_hand": [1]})
+        self.assertEqual(self.sync.version, 1)
+        self.assertIsNone(common["message"])
+        # Both players take the next version as a patch
+        changes = self.sync.update_common(self.common(current_word="いす"))
+        for player_id in ("p1", "p2"):
+            msg = self.sync.render(player_id, self.common(current_word="いす"), changes, {"my_hand": [1]})
+            self.assertEqual(msg["type"], "game_state_patch")
+            self.assertEqual(msg["base_version"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from timers import TimerWheel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # Small wheels so the tests cross every level and the overflow slot
+        self.wheel = TimerWheel(tick=0.1, wheel_sizes=(8, 4, 4), clock=self.clock)
+        self.fired = []
+
+    def run_until(self, seconds):
+        end = self.clock.now + seconds
+        while self.clock.now < end:
+            self.clock.now = min(end, self.clock.now + 0.1)
+            self.wheel.advance()
+
+    def test_timers_fire_in_deadline_order_across_levels(self):
+        rng = random.Random(5)
+        delays = [rng.uniform(0, 20) for _ in range(300)]  # up to 200 ticks: beyond the 128-tick range
+        for delay in delays:
+            self.wheel.schedule(delay, self.fired.append, delay)
+        self.assertEqual(self.wheel.pending, 300)
+        self.run_until(21)
+        self.assertEqual(self.wheel.pending, 0)
+        self.assertEqual(sorted(self.fired), sorted(delays))
+        # Each timer fires within one tick of its deadline, in tick order
+        ticks = [int(d / 0.1 + 0.999999) for d in self.fired]
+        self.assertEqual(ticks, sorted(ticks))
+        self.assertLessEqual(self.wheel.max_lag, 0.1 + 1e-9)
+
+    def test_cancel(self):
+        keep = self.wheel.schedule(3.0, self.fired.append, "keep")
+        drop = self.wheel.schedule(3.0, self.fired.append, "drop")
+        drop.cancel()
+        drop.cancel()
+        self.assertEqual(self.wheel.pending, 1)
+        self.run_until(4)
+        self.assertEqual(self.fired, ["keep"])
+        self.assertTrue(keep.fired)
+        self.assertFalse(drop.fired)
+        keep.cancel()  # after firing: no effect
+        self.assertEqual(self.wheel.pending, 0)
+
+    def test_timer_not_early_after_late_advance(self):
+        self.run_until(0.35)
+        self.wheel.schedule(1.0, self.fired.append, "x")
+        self.clock.now += 0.95
+        self.wheel.advance()
+        self.assertEqual(self.fired, [])
+        self.clock.now += 0.1
+        self.wheel.advance()
+        self.assertEqual(self.fired, ["x"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import pickle
+import threading
+import time
+import unittest
+import tracing
+from game import WordBasketGame, Card
+from tracing import RoomTracer, SamplingProfiler
+
+class TestRoomTracer(unittest.TestCase):
+    def test_export_is_a_chrome_trace(self):
+        tracer = RoomTracer("1234")
+        start = time.perf_counter()
+        tracer.add("command.play_word", start, start + 0.002, args={"player_id": "p1"})
+        tracer.add("socket_send", start + 0.002, start + 0.003, lane="p1")
+        trace = tracer.export()
+        spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual([(e["name"], e["tid"]) for e in spans], [("command.play_word", 1), ("socket_send", 2)])
+        self.assertAlmostEqual(spans[0]["dur"], 2000, delta=1)
+        lanes = {e["tid"]: e["args"]["name"] for e in trace["traceEvents"] if e["name"] == "thread_name"}
+        self.assertEqual(lanes, {1: "room actor", 2: "socket p1"})
+
+    def test_buffer_is_bounded(self):
+        tracer = RoomTracer("1234", max_spans=3)
+        for i in range(5):
+            tracer.add(f"s{i}", time.perf_counter())
+        self.assertEqual([s.name for s in tracer.spans], ["s2", "s3", "s4"])
+        self.assertEqual(tracer.export()["otherData"]["dropped"], 2)
+
+    def test_game_methods_are_spans_while_traced(self):
+        game = WordBasketGame("test_room", seed=1)
+        game.add_player("p1", "p1")
+        game.tracer = RoomTracer("test_room")
+        game.start_game()
+        game.current_word = "ゲーム開始_あ"
+        game.players["p1"].hand = [Card("char", "い", "い"), Card("char", "う", "う")]
+        game.check_move("p1", "あいいい", 0)
+        self.assertEqual([s.name for s in game.tracer.spans], ["game.start_game", "game.check_move"])
+        # The tracer is never stored with the room
+        self.assertIsNone(pickle.loads(pickle.dumps(game)).tracer)
+
+def command_loop(done: threading.Event):
+    tracing.current_room = "1234"
+    try:
+        while not done.is_set():
+            busy_engine_call()
+    finally:
+        tracing.current_room = None
+
+def busy_engine_call():
+    return sum(i * i for i in range(2000))
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_folded_stacks_start_at_the_root(self):
+        done = threading.Event()
+        worker = threading.Thread(target=command_loop, args=(done,))
+        worker.start()
+        try:
+            while tracing.current_room is None:
+                time.sleep(0.001)
+            profiler = SamplingProfiler(command_loop, "1234", thread_id=worker.ident)
+            other_room = SamplingProfiler(command_loop, "9999", thread_id=worker.ident)
+            for _ in range(20):
+                profiler.sample()
+                other_room.sample()
+                time.sleep(0.001)
+        finally:
+            done.set()
+            worker.join()
+        self.assertEqual(other_room.samples, 0)
+        self.assertGreater(profiler.samples, 0)
+        for line in profiler.folded().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("command_loop (test_tracing.py:"), stack)
+            self.assertGreater(int(count), 0)
+        self.assertIn("busy_engine_call (test_tracing.py:", profiler.folded())
+
+if __name__ == "__main__":
+    unittest.main()
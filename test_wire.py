@@ -0,0 +1,81 @@
+import copy
+import json
+import unittest
+from wire import (JsonCodec, MsgpackCodec, MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL, SCHEMA_KEYS,
+                  expand_keys, negotiate, shorten_keys, msgpack)
+
+STATE = {
+    "type": "game_state_patch", "version": 3, "base_version": 2,
+    "changes": {"current_word": "りんご", "my_hand": [{"type": "char", "value": "ご", "display": "ご"}],
+                "game_settings": {"special_cards_enabled": {"draw2": 3}}, "unknown_field": [1, None]},
+}
+
+class TestWire(unittest.TestCase):
+    def test_schema_keys_are_unique(self):
+        self.assertEqual(len(SCHEMA_KEYS), len(set(SCHEMA_KEYS)))
+
+    def test_short_keys_round_trip(self):
+        short = shorten_keys(STATE)
+        self.assertIn(SCHEMA_KEYS.index("changes"), short)
+        self.assertIn("unknown_field", short[SCHEMA_KEYS.index("changes")])
+        self.assertEqual(expand_keys(short), STATE)
+
+    def test_negotiate(self):
+        self.assertIsNone(negotiate([]).subprotocol)
+        self.assertEqual(negotiate([JSON_SUBPROTOCOL]).subprotocol, JSON_SUBPROTOCOL)
+        expected = MSGPACK_SUBPROTOCOL if msgpack is not None else JSON_SUBPROTOCOL
+        self.assertEqual(negotiate([MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL]).subprotocol, expected)
+
+    def test_json_codec(self):
+        self.assertEqual(json.loads(JsonCodec().encode(STATE)), STATE)
+        self.assertIsNone(JsonCodec().encode_handshake())
+
+    @unittest.skipIf(msgpack is None, "msgpack not installed")
+    def test_msgpack_codec(self):
+        codec = MsgpackCodec()
+        handshake = msgpack.unpackb(codec.encode_handshake())
+        self.assertEqual(handshake, {"type": "wire_schema", "keys": list(SCHEMA_KEYS)})
+        decoded = msgpack.unpackb(codec.encode(STATE), strict_map_key=False)
+        self.assertEqual(expand_keys(decoded), STATE)
+        self.assertLess(len(codec.encode(STATE)), len(JsonCodec().encode(STATE).encode("utf-8")))
+
+if __name__ == '__main__':
+    unittest.main()
+
+class TestBroadcastFrames(unittest.TestCase):
+    def setUp(self):
+        from game import Card
+        from state_sync import RoomStateSync
+        self.hand = [Card("char", "あ", "あ"), Card("row", "かきくけこ", "か行")]
+        self.sync = RoomStateSync()
+        self.common = {"type": "game_state", "current_word": "りんご", "message": "開始",
+                       "players_info": [{"player_id": "p1", "hand_count": 2}]}
+
+    def expected(self, message):
+        # What the dict-based render path would put on the wire
+        return json.loads(json.dumps(message, default=lambda card: card.to_dict()))
+
+    def broadcast(self, common, personal, codec, decode):
+        from wire import BroadcastFrames
+        changes = self.sync.update_common(common)
+        # What render() would have sent, computed on a copy so delivery state is only advanced once
+        reference = copy.deepcopy(self.sync).render("p1", common, changes, personal)
+        frames = BroadcastFrames(self.sync.version, common, changes)
+        personal_changes = self.sync.prepare("p1", personal)
+        frame = frames.snapshot(codec, personal) if personal_changes is None else frames.patch(codec, personal_changes)
+        self.assertEqual(decode(frame), self.expected(reference))
+        # Bytes on the wire, counted without encoding the whole frame
+        self.assertEqual(frames.last_size, len(frame.encode() if isinstance(frame, str) else frame))
+
+    def run_codec(self, codec, decode):
+        self.broadcast(self.common, {"my_hand": self.hand, "has_voted": False}, codec, decode)
+        common = dict(self.common, current_word="ごりら", players_info=[{"player_id": "p1", "hand_count": 1}])
+        self.broadcast(common, {"my_hand": self.hand[1:], "has_voted": False}, codec, decode)
+
+    def test_json_frames_match_render(self):
+        self.run_codec(JsonCodec(), json.loads)
+
+    @unittest.skipIf(msgpack is None, "msgpack not installed")
+    def test_msgpack_frames_match_render(self):
+        self.run_codec(MsgpackCodec(), lambda frame: expand_keys(msgpack.unpackb(frame, strict_map_key=False)))
+
@@ -0,0 +1,141 @@
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class TimerHandle:
+    """A scheduled callback; cancel() is O(1) and safe to call more than once."""
+    __slots__ = ("deadline", "tick", "callback", "args", "_wheel", "_slot", "fired")
+
+    def __init__(self, wheel: "TimerWheel", deadline: float, tick: int, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self._wheel = wheel
+        self._slot: Optional[dict] = None
+        self.fired = False
+
+    @property
+    def pending(self) -> bool:
+        return self._slot is not None
+
+    def cancel(self):
+        if self._slot is not None:
+            del self._slot[self]
+            self._slot = None
+            self._wheel.pending -= 1
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: one per process, driving every room's timers from a single task.
+
+    Level 0 has one slot per tick; each slot of level n spans a whole revolution of level n-1.
+    A timer goes into the coarsest level it fits in and is moved down (cascaded) as the wheel
+    turns, so scheduling and cancelling are O(1) whatever the number of pending timers,
+    and each tick only touches the timers that are due. Timers beyond the top level wait in an
+    overflow slot. Timers fire on the tick after their deadline (at most `tick` seconds late,
+    plus event loop lag).
+    """
+
+    def __init__(self, tick: float = 0.05, wheel_sizes: Sequence[int] = (256, 64, 64),
+                 clock: Callable[[], float] = time.monotonic, lag_histogram=None):
+        self.tick = tick
+        self.wheel_sizes = tuple(wheel_sizes)
+        self.clock = clock
+        # Optional metrics.Histogram observing how late each timer fired
+        self.lag_histogram = lag_histogram
+        self.levels: List[List[dict]] = [[{} for _ in range(size)] for size in self.wheel_sizes]
+        # Ticks covered by one slot of each level
+        self.spans = [math.prod(self.wheel_sizes[:level]) for level in range(len(self.wheel_sizes))]
+        self.range = math.prod(self.wheel_sizes)
+        self.overflow: dict = {}
+        self.start = clock()
+        self.current_tick = 0
+        self.pending = 0
+        self.fired = 0
+        self.max_lag = 0.0
+
+    def schedule(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """Call callback(*args) after delay seconds."""
+        deadline = self.clock() + delay
+        tick = max(math.ceil((deadline - self.start) / self.tick), self.current_tick + 1)
+        handle = TimerHandle(self, deadline, tick, callback, args)
+        self._place(handle)
+        self.pending += 1
+        return handle
+
+    def _place(self, handle: TimerHandle):
+        # delta 0 only happens while cascading: the current tick's slot fires right after
+        delta = handle.tick - self.current_tick
+        for level, size in enumerate(self.wheel_sizes):
+            span = self.spans[level]
+            if delta < span * size:
+                slot = self.levels[level][(handle.tick // span) % size]
+                break
+        else:
+            slot = self.overflow
+        slot[handle] = None
+        handle._slot = slot
+
+    def _cascade(self):
+        tick = self.current_tick
+        if tick % self.range == 0 and self.overflow:
+            self._replace(self.overflow)
+            self.overflow = {}
+        # Coarsest first: timers it moves down may land in a finer slot that cascades at this tick too
+        for level in range(len(self.wheel_sizes) - 1, 0, -1):
+            span = self.spans[level]
+            if tick % span == 0:
+                index = (tick // span) % self.wheel_sizes[level]
+                slot = self.levels[level][index]
+                if slot:
+                    self.levels[level][index] = {}
+                    self._replace(slot)
+
+    def _replace(self, slot: dict):
+        for handle in slot:
+            self._place(handle)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Fire every timer due by now. Returns how many fired."""
+        if now is None:
+            now = self.clock()
+        target = int((now - self.start) / self.tick)
+        fired = 0
+        while self.current_tick < target:
+            self.current_tick += 1
+            self._cascade()
+            index = self.current_tick % self.wheel_sizes[0]
+            slot = self.levels[0][index]
+            if not slot:
+                continue
+            self.levels[0][index] = {}
+            for handle in slot:
+                handle._slot = None
+                handle.fired = True
+                self.pending -= 1
+                lag = max(0.0, now - handle.deadline)
+                self.max_lag = max(self.max_lag, lag)
+                if self.lag_histogram is not None:
+                    self.lag_histogram.observe(lag)
+                try:
+                    handle.callback(*handle.args)
+                except Exception as e:
+                    print(f"[ERROR] timer callback {handle.callback!r} failed: {e!r}")
+                fired += 1
+        self.fired += fired
+        return fired
+
+    async def run(self):
+        """Drive the wheel from the event loop (start once per process)."""
+        while True:
+            delay = self.start + (self.current_tick + 1) * self.tick - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.advance()
+
+    def stats(self) -> Dict[str, float]:
+        return {"pending": self.pending, "fired": self.fired, "max_lag": self.max_lag}
@@ -0,0 +1,140 @@
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional
+
+# Room whose command the event loop thread is executing right now (None between commands).
+# Set by the room actor; read by the sampling profiler thread.
+current_room: Optional[str] = None
+
+
+class Span(NamedTuple):
+    name: str
+    lane: str  # "room" for the actor, the player id for that player's socket writer
+    start: float  # perf_counter seconds
+    duration: float
+    args: Optional[dict]
+
+
+class RoomTracer:
+    """
+    Records timed spans for one room (receive -> queue -> command -> game methods -> state build ->
+    encode -> socket send) into a bounded buffer, exported in the Chrome trace event format
+    (open in https://ui.perfetto.dev or chrome://tracing).
+    Only touched from the event loop thread.
+    """
+
+    def __init__(self, room_code: str, max_spans: int = 20000):
+        self.room_code = room_code
+        self.spans: Deque[Span] = collections.deque(maxlen=max_spans)
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self.dropped = 0
+
+    def add(self, name: str, start: float, end: float = None, lane: str = "room", args: dict = None):
+        if len(self.spans) == self.spans.maxlen:
+            self.dropped += 1
+        if end is None:
+            end = time.perf_counter()
+        self.spans.append(Span(name, lane, start, end - start, args))
+
+    def export(self) -> dict:
+        lanes: Dict[str, int] = {"room": 1}
+        events = []
+        for span in self.spans:
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            event = {"name": span.name, "ph": "X", "pid": 1, "tid": tid,
+                     "ts": round((span.start - self.started) * 1e6, 1), "dur": round(span.duration * 1e6, 1)}
+            if span.args:
+                event["args"] = span.args
+            events.append(event)
+        for lane, tid in lanes.items():
+            name = "room actor" if lane == "room" else f"socket {lane}"
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}})
+        events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"room {self.room_code}"}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"room_code": self.room_code, "started": self.started_wall,
+                          "spans": len(self.spans), "dropped": self.dropped},
+        }
+
+
+# room_code -> active tracer (the hot path does one dict lookup per traced point)
+room_tracers: Dict[str, RoomTracer] = {}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack every `interval` seconds from a background thread, keeping
+    only samples taken while a room command runs (optionally one room's). Stacks are cut at the
+    `root` function (the room actor loop) and aggregated in the folded format of flamegraph.pl /
+    speedscope / inferno: "outer;inner;leaf count" per line.
+
+    Room commands usually finish within the interpreter's GIL switch interval (5 ms), so the
+    sampler thread would only ever see the loop idle. While profiling, the switch interval is
+    lowered to a hundredth of the sampling interval so samples can land inside commands.
+    """
+
+    def __init__(self, root: Callable, room_code: Optional[str] = None, interval: float = 0.005,
+                 thread_id: Optional[int] = None):
+        self.root_code = root.__code__
+        self.room_code = room_code
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.samples = 0  # samples kept
+        self.ticks = 0  # samples taken
+        self.started = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="room-profiler", daemon=True)
+        self._switch_interval = sys.getswitchinterval()
+
+    def start(self) -> "SamplingProfiler":
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 100))
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling (the thread exits within one interval; safe to call from the event loop)."""
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                self.sample()
+        finally:
+            sys.setswitchinterval(self._switch_interval)
+
+    def sample(self):
+        self.ticks += 1
+        room = current_room
+        if room is None or (self.room_code is not None and room != self.room_code):
+            return
+        frame = sys._current_frames().get(self.thread_id)
+        stack: List[str] = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            if frame.f_code is self.root_code:
+                break
+            frame = frame.f_back
+        else:
+            # Not inside a room command after all (it finished between the two reads)
+            return
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        # dict() copies in one step, so the sampler thread cannot change the stacks mid-iteration
+        stacks = dict(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
@@ -0,0 +1,259 @@
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional: without it every client gets JSON
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = "wordbasket.msgpack.v1"
+JSON_SUBPROTOCOL = "wordbasket.json.v1"
+
+# Short-key schema for the binary format: a key is sent as its position in this tuple.
+# Append only (reordering breaks clients that cached v1); unknown keys are sent as strings.
+SCHEMA_KEYS = (
+    # envelope / delta protocol
+    "type", "version", "base_version", "changes", "message",
+    # common state
+    "room_code", "status", "current_word", "target_char", "deck_count", "discard_pile_count",
+    "dictionary_size", "game_over", "winner", "ranks", "opposition_votes", "approval_votes",
+    "active_players", "active_voting_players", "finishing_check", "game_settings",
+    "finishing_player_id", "players_info",
+    # players
+    "player_id", "name", "hand_count", "is_host", "rank", "special_cards", "pending_special_card",
+    "is_connected",
+    # cards
+    "value", "display", "card_type", "description", "is_pending",
+    # personal state
+    "my_hand", "my_player_id", "my_priority", "has_voted", "playable_cards", "suggest_exchange",
+    "my_special_cards", "my_pending_special_card",
+    # game settings
+    "initial_hand_size", "strict_dictionary", "num_special_cards_per_player", "special_cards_enabled",
+    # other messages
+    "votes", "total", "target_name", "hand",
+    # move history
+    "last_move_id", "move_id",
+)
+KEY_IDS = {key: i for i, key in enumerate(SCHEMA_KEYS)}
+
+
+def shorten_keys(obj):
+    """Replace schema keys with their ids, recursively."""
+    if isinstance(obj, dict):
+        return {KEY_IDS.get(key, key): shorten_keys(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [shorten_keys(value) for value in obj]
+    return obj
+
+
+def expand_keys(obj):
+    """Inverse of shorten_keys (what the browser does after decoding)."""
+    if isinstance(obj, dict):
+        return {(SCHEMA_KEYS[key] if isinstance(key, int) else key): expand_keys(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [expand_keys(value) for value in obj]
+    return obj
+
+
+def _to_dict(obj):
+    # Cards in personal state are kept as objects (cheap to diff); encode them as their dict form
+    return obj.to_dict()
+
+
+def _is_card_list(value) -> bool:
+    return isinstance(value, (list, tuple)) and bool(value) and hasattr(value[0], "to_json")
+
+
+# Reused encoder: json.dumps with keyword arguments builds a new one on every call
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_to_dict)
+
+
+class Fragment(NamedTuple):
+    """Some encoded key/value pairs of a map, ready to be spliced into a frame."""
+    count: int
+    body: Union[str, bytes]
+
+
+class JsonCodec:
+    """Default wire format: JSON text frames."""
+    binary = False
+
+    def __init__(self, subprotocol: Optional[str] = None):
+        self.subprotocol = subprotocol
+
+    def encode(self, message: dict) -> str:
+        return _json_encoder.encode(message)
+
+    def encode_value(self, value) -> str:
+        if _is_card_list(value):
+            return "[" + ",".join(card.to_json() for card in value) + "]"
+        return _json_encoder.encode(value)
+
+    def fields(self, mapping: dict) -> Fragment:
+        # One encode call for the plain fields (braces stripped); card lists are spliced from cached JSON
+        plain = {}
+        parts = []
+        for key, value in mapping.items():
+            if _is_card_list(value):
+                parts.append(f"{_json_encoder.encode(key)}:[{','.join([card.to_json() for card in value])}]")
+            else:
+                plain[key] = value
+        if plain:
+            parts.append(_json_encoder.encode(plain)[1:-1])
+        return Fragment(len(mapping), ",".join(parts))
+
+    def raw_field(self, key: str, encoded_value: str) -> Fragment:
+        return Fragment(1, f"{_json_encoder.encode(key)}:{encoded_value}")
+
+    def join(self, fragments: List[Fragment]) -> str:
+        """Close a set of fragments into one JSON object."""
+        return "{" + ",".join(f.body for f in fragments if f.count) + "}"
+
+    def encode_handshake(self) -> Optional[str]:
+        return None
+
+
+def _map_header(count: int) -> bytes:
+    if count < 16:
+        return bytes((0x80 | count,))
+    if count < 0x10000:
+        return b"\xde" + count.to_bytes(2, "big")
+    return b"\xdf" + count.to_bytes(4, "big")
+
+
+def _array_header(count: int) -> bytes:
+    if count < 16:
+        return bytes((0x90 | count,))
+    if count < 0x10000:
+        return b"\xdc" + count.to_bytes(2, "big")
+    return b"\xdd" + count.to_bytes(4, "big")
+
+
+class MsgpackCodec:
+    """
+    Opt-in binary format: MessagePack with schema keys replaced by small integers.
+    The first frame on the connection carries the key table (with plain keys) so the browser
+    never needs its own copy. Client -> server messages stay JSON text.
+    """
+    binary = True
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    # card id -> encoded card (cards are interned and immutable)
+    _card_fragments: Dict[int, bytes] = {}
+
+    def _pack(self, value) -> bytes:
+        return msgpack.packb(shorten_keys(value), use_bin_type=True, default=lambda o: shorten_keys(o.to_dict()))
+
+    def encode(self, message: dict) -> bytes:
+        return self._pack(message)
+
+    def _card(self, card) -> bytes:
+        encoded = self._card_fragments.get(card.id)
+        if encoded is None:
+            encoded = self._card_fragments[card.id] = self._pack(card.to_dict())
+        return encoded
+
+    def encode_value(self, value) -> bytes:
+        if _is_card_list(value):
+            return _array_header(len(value)) + b"".join(self._card(card) for card in value)
+        return self._pack(value)
+
+    def fields(self, mapping: dict) -> Fragment:
+        plain = {}
+        parts = []
+        for key, value in mapping.items():
+            if _is_card_list(value):
+                parts.append(self._pack(KEY_IDS.get(key, key)) + self.encode_value(value))
+            else:
+                plain[key] = value
+        if plain:
+            # Pack the plain fields as one map and drop its header
+            parts.append(self._pack(plain)[len(_map_header(len(plain))):])
+        return Fragment(len(mapping), b"".join(parts))
+
+    def raw_field(self, key: str, encoded_value: bytes) -> Fragment:
+        return Fragment(1, self._pack(KEY_IDS.get(key, key)) + encoded_value)
+
+    def join(self, fragments: List[Fragment]) -> bytes:
+        return _map_header(sum(f.count for f in fragments)) + b"".join(f.body for f in fragments)
+
+    def encode_handshake(self) -> Optional[bytes]:
+        return msgpack.packb({"type": "wire_schema", "keys": list(SCHEMA_KEYS)}, use_bin_type=True)
+
+
+def _utf8_extra(text: str) -> int:
+    return 0 if text.isascii() else len(text.encode()) - len(text)
+
+
+class BroadcastFrames:
+    """
+    Frames for one game_state broadcast.
+    The common part (including players_info) is encoded once per wire format; each connection
+    only encodes its own personal fields, which are spliced in at the byte level.
+    """
+
+    def __init__(self, version: int, common_state: dict, common_changes: dict):
+        self.version = version
+        self.common_state = common_state
+        self.common_changes = {k: v for k, v in common_changes.items() if k != "type"}
+        self._snapshot_common: Dict[type, Fragment] = {}
+        self._patch_common: Dict[type, Fragment] = {}
+        self._patch_header: Dict[type, Fragment] = {}
+        # Fragment id -> UTF-8 bytes beyond its length in characters (text frames)
+        self._utf8_extra: Dict[int, int] = {}
+        # Size in bytes on the wire of the frame most recently returned
+        self.last_size = 0
+
+    def snapshot(self, codec, personal_state: dict) -> Union[str, bytes]:
+        key = type(codec)
+        common = self._snapshot_common.get(key)
+        if common is None:
+            common = self._snapshot_common[key] = codec.fields(self.common_state)
+        personal = codec.fields(personal_state)
+        frame = codec.join([common, personal, codec.fields({"version": self.version})])
+        self._measure(frame, common, personal)
+        return frame
+
+    def patch(self, codec, personal_changes: dict) -> Union[str, bytes]:
+        key = type(codec)
+        common = self._patch_common.get(key)
+        if common is None:
+            common = self._patch_common[key] = codec.fields(self.common_changes)
+            self._patch_header[key] = codec.fields({
+                "type": "game_state_patch",
+                "version": self.version,
+                "base_version": self.version - 1,
+            })
+        personal = codec.fields(personal_changes)
+        changes = codec.join([common, personal])
+        frame = codec.join([self._patch_header[key], codec.raw_field("changes", changes)])
+        self._measure(frame, common, personal)
+        return frame
+
+    def _measure(self, frame: Union[str, bytes], common: Fragment, personal: Fragment):
+        """
+        Set last_size. Text frames are sent as UTF-8: rather than encoding every frame just to count
+        its bytes, the shared common part is measured once per broadcast and only the personal part
+        per frame (everything else in a frame is ASCII).
+        """
+        if isinstance(frame, bytes):
+            self.last_size = len(frame)
+            return
+        extra = self._utf8_extra.get(id(common))
+        if extra is None:
+            extra = self._utf8_extra[id(common)] = _utf8_extra(common.body)
+        self.last_size = len(frame) + extra + _utf8_extra(personal.body)
+
+
+def negotiate(requested: Iterable[str]) -> Union[JsonCodec, MsgpackCodec]:
+    """
+    Pick the codec for a new connection from the client's Sec-WebSocket-Protocol list.
+    If the client offered any subprotocol we must select one of them, so JSON is offered as
+    a named fallback too; a client that offers nothing gets plain JSON.
+    """
+    requested = list(requested or ())
+    if MSGPACK_SUBPROTOCOL in requested and msgpack is not None:
+        return MsgpackCodec()
+    if JSON_SUBPROTOCOL in requested:
+        return JsonCodec(JSON_SUBPROTOCOL)
+    return JsonCodec()